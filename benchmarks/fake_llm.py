@@ -0,0 +1,404 @@
+"""Local OpenAI-compatible stub for offline load tests.
+
+    python -m benchmarks.fake_llm --port 8100 --latency 0.3 --dist lognormal
+    LLM_BASE_URL=http://127.0.0.1:8100/v1 python main.py day05 states.jsonl
+
+Serves ``POST .../chat/completions`` (plain and streamed) and
+``GET .../models`` for any path prefix, so it stands in for every
+endpoint in ``common.llm``. Replies are deterministic in shape:
+
+- a forced tool (``with_structured_output``) gets arguments built from
+  its schema: ``verdict`` -> ``--verdict``, ``score`` -> ``--score``;
+- bound tools are called once, then the model answers in text;
+- "YES or NO" prompts get ``--verdict``, "Score ... 1-10" prompts get
+  ``--score``;
+- anything else gets ``--reply-tokens`` words echoed from the prompt, so
+  lexical grounding checks (day07) pass.
+
+``--script rules.json`` overrides these: a list of ``{"match": regex,
+"content": str, "tool_calls": [{"name", "args"}], "status": int}``
+matched against the last message, first match wins.
+
+Latency to the first token is drawn from ``--dist`` around
+``--latency``; tokens then arrive at ``--tokens-per-second``. Faults
+(``--error-rate`` 500s, ``--rate-limit-rate`` 429s with Retry-After)
+hit only models containing ``--fault-model`` when it is given.
+``GET /stats`` returns call and simulated-time counters.
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import random
+import re
+import time
+import uuid
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Any, List
+
+from common.embeddings import tokenize
+
+YES_NO_PROMPT = re.compile(r"\bYES or NO\b", re.IGNORECASE)
+SCORE_PROMPT = re.compile(
+    r"\bscore\b.*\b1\s*(?:-|–|to)\s*10\b", re.IGNORECASE | re.DOTALL
+)
+DISTRIBUTIONS = ("fixed", "uniform", "exponential", "lognormal")
+
+
+@dataclass
+class FakeConfig:
+    # Seconds to the first token (mean for the random distributions)
+    latency: float = 0.2
+    dist: str = "fixed"
+    tokens_per_second: float = 200.0
+    reply_tokens: int = 40
+    error_rate: float = 0.0
+    rate_limit_rate: float = 0.0
+    retry_after: float = 1.0
+    # Substring of the model name that faults apply to ("" = all models)
+    fault_model: str = ""
+    verdict: bool = True
+    score: int = 8
+    script: List[dict] = field(default_factory=list)
+    seed: int | None = None
+
+
+# -----------------------------
+# 1. Scripted replies
+# -----------------------------
+def _text(content: Any) -> str:
+    if isinstance(content, list):
+        return " ".join(
+            part.get("text", "") for part in content if isinstance(part, dict)
+        )
+    return content or ""
+
+
+def schema_args(parameters: dict, config: FakeConfig) -> dict:
+    """Placeholder arguments satisfying a tool's JSON schema."""
+    args = {}
+    for name, prop in parameters.get("properties", {}).items():
+        kind = prop.get("type")
+        if name == "verdict" or kind == "boolean":
+            args[name] = config.verdict
+        elif name == "score" or kind in ("integer", "number"):
+            args[name] = config.score if name == "score" else prop.get("minimum", 1)
+        elif kind == "array":
+            args[name] = []
+        elif kind == "object":
+            args[name] = {}
+        else:
+            args[name] = "stub"
+    return args
+
+
+def echo(prompt: str, count: int) -> str:
+    words = tokenize(prompt) or ["ok"]
+    out = [words[i % len(words)] for i in range(count)]
+    # A sentence every 12 words keeps sentence-level checks busy
+    sentences = [" ".join(out[i : i + 12]) for i in range(0, len(out), 12)]
+    return " ".join(s.capitalize() + "." for s in sentences)
+
+
+def plan_reply(body: dict, config: FakeConfig) -> dict:
+    """``{"content", "tool_calls", "status"}`` for a chat request."""
+    messages = body.get("messages", [])
+    last = messages[-1] if messages else {}
+    prompt = _text(last.get("content"))
+
+    for rule in config.script:
+        if re.search(rule.get("match", ""), prompt):
+            return {
+                "content": rule.get("content", ""),
+                "tool_calls": rule.get("tool_calls", []),
+                "status": rule.get("status", 200),
+            }
+
+    tools = {
+        tool["function"]["name"]: tool["function"]
+        for tool in body.get("tools", [])
+        if tool.get("type") == "function"
+    }
+    choice = body.get("tool_choice")
+    forced = (
+        choice.get("function", {}).get("name") if isinstance(choice, dict) else None
+    )
+    if forced in tools:
+        args = schema_args(tools[forced].get("parameters", {}), config)
+        return {"content": "", "tool_calls": [{"name": forced, "args": args}]}
+    if tools and last.get("role") != "tool":
+        name, spec = next(iter(tools.items()))
+        args = schema_args(spec.get("parameters", {}), config)
+        return {"content": "", "tool_calls": [{"name": name, "args": args}]}
+
+    if YES_NO_PROMPT.search(prompt):
+        return {"content": "YES" if config.verdict else "NO", "tool_calls": []}
+    if SCORE_PROMPT.search(prompt):
+        return {"content": str(config.score), "tool_calls": []}
+    return {"content": echo(prompt, config.reply_tokens), "tool_calls": []}
+
+
+# -----------------------------
+# 2. Timing and faults
+# -----------------------------
+def first_token_delay(config: FakeConfig, rng: random.Random) -> float:
+    mean = config.latency
+    if mean <= 0 or config.dist == "fixed":
+        return max(mean, 0.0)
+    if config.dist == "uniform":
+        return rng.uniform(0, 2 * mean)
+    if config.dist == "exponential":
+        return rng.expovariate(1 / mean)
+    # lognormal with sigma 0.5, scaled so the mean is `latency`
+    sigma = 0.5
+    return rng.lognormvariate(0, sigma) * mean / math.exp(sigma**2 / 2)
+
+
+def pick_fault(model: str, config: FakeConfig, rng: random.Random) -> int | None:
+    if config.fault_model and config.fault_model not in model:
+        return None
+    roll = rng.random()
+    if roll < config.rate_limit_rate:
+        return 429
+    if roll < config.rate_limit_rate + config.error_rate:
+        return 500
+    return None
+
+
+# -----------------------------
+# 3. OpenAI wire format
+# -----------------------------
+def _tool_calls(calls: List[dict]) -> List[dict]:
+    return [
+        {
+            "index": i,
+            "id": f"call_{uuid.uuid4().hex[:12]}",
+            "type": "function",
+            "function": {"name": call["name"], "arguments": json.dumps(call["args"])},
+        }
+        for i, call in enumerate(calls)
+    ]
+
+
+def _usage(body: dict, completion_tokens: int) -> dict:
+    prompt_tokens = sum(
+        len(tokenize(_text(m.get("content")))) for m in body.get("messages", [])
+    )
+    return {
+        "prompt_tokens": prompt_tokens,
+        "completion_tokens": completion_tokens,
+        "total_tokens": prompt_tokens + completion_tokens,
+    }
+
+
+def completion(body: dict, reply: dict, tokens: int) -> dict:
+    message = {"role": "assistant", "content": reply["content"]}
+    if reply["tool_calls"]:
+        message["tool_calls"] = _tool_calls(reply["tool_calls"])
+    return {
+        "id": f"chatcmpl-{uuid.uuid4().hex[:16]}",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": body.get("model", "fake"),
+        "choices": [
+            {
+                "index": 0,
+                "message": message,
+                "finish_reason": "tool_calls" if reply["tool_calls"] else "stop",
+            }
+        ],
+        "usage": _usage(body, tokens),
+    }
+
+
+def chunk(body: dict, cid: str, delta: dict, finish: str | None = None) -> bytes:
+    data = {
+        "id": cid,
+        "object": "chat.completion.chunk",
+        "created": int(time.time()),
+        "model": body.get("model", "fake"),
+        "choices": [{"index": 0, "delta": delta, "finish_reason": finish}],
+    }
+    return f"data: {json.dumps(data)}\n\n".encode()
+
+
+# -----------------------------
+# 4. ASGI app
+# -----------------------------
+class FakeLLM:
+    def __init__(self, config: FakeConfig | None = None):
+        self.config = config or FakeConfig()
+        self.rng = random.Random(self.config.seed)
+        self.stats: Counter = Counter()
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] == "lifespan":
+            while True:
+                message = await receive()
+                if message["type"] == "lifespan.startup":
+                    await send({"type": "lifespan.startup.complete"})
+                elif message["type"] == "lifespan.shutdown":
+                    await send({"type": "lifespan.shutdown.complete"})
+                    return
+
+        path = scope["path"].rstrip("/")
+        if scope["method"] == "GET" and path.endswith("/stats"):
+            await self._json(send, 200, dict(self.stats))
+        elif scope["method"] == "GET" and path.endswith("/models"):
+            await self._json(send, 200, {"object": "list", "data": [{"id": "fake"}]})
+        elif scope["method"] == "POST" and path.endswith("/chat/completions"):
+            body = json.loads(await _read_body(receive) or b"{}")
+            await self._chat(send, body)
+        else:
+            await self._json(send, 404, {"error": {"message": "not found"}})
+
+    async def _json(self, send, status: int, payload: dict, headers=()) -> None:
+        await send(
+            {
+                "type": "http.response.start",
+                "status": status,
+                "headers": [(b"content-type", b"application/json"), *headers],
+            }
+        )
+        await send({"type": "http.response.body", "body": json.dumps(payload).encode()})
+
+    async def _sleep(self, seconds: float) -> None:
+        self.stats["simulated_seconds"] += seconds
+        await asyncio.sleep(seconds)
+
+    async def _chat(self, send, body: dict) -> None:
+        config = self.config
+        self.stats["requests"] += 1
+        reply = plan_reply(body, config)
+        status = pick_fault(body.get("model", ""), config, self.rng)
+        status = status or reply.get("status", 200)
+
+        await self._sleep(first_token_delay(config, self.rng))
+        if status != 200:
+            self.stats[f"status_{status}"] += 1
+            headers = [(b"retry-after", str(config.retry_after).encode())]
+            error = {"message": f"injected {status}", "code": status}
+            await self._json(
+                send, status, {"error": error}, headers if status == 429 else ()
+            )
+            return
+
+        if reply["tool_calls"]:
+            pieces = []
+        else:
+            pieces = re.findall(r"\S+\s*", reply["content"]) or [reply["content"]]
+        per_token = 1 / config.tokens_per_second if config.tokens_per_second > 0 else 0
+        self.stats["completion_tokens"] += len(pieces)
+
+        if not body.get("stream"):
+            await self._sleep(per_token * len(pieces))
+            await self._json(send, 200, completion(body, reply, len(pieces)))
+            return
+
+        await send(
+            {
+                "type": "http.response.start",
+                "status": 200,
+                "headers": [(b"content-type", b"text/event-stream")],
+            }
+        )
+
+        async def emit(frame: bytes) -> None:
+            await send({"type": "http.response.body", "body": frame, "more_body": True})
+
+        cid = f"chatcmpl-{uuid.uuid4().hex[:16]}"
+        await emit(chunk(body, cid, {"role": "assistant", "content": ""}))
+        for piece in pieces:
+            await self._sleep(per_token)
+            await emit(chunk(body, cid, {"content": piece}))
+        if reply["tool_calls"]:
+            await emit(
+                chunk(body, cid, {"tool_calls": _tool_calls(reply["tool_calls"])})
+            )
+        finish = "tool_calls" if reply["tool_calls"] else "stop"
+        await emit(chunk(body, cid, {}, finish))
+        if body.get("stream_options", {}).get("include_usage"):
+            usage = {
+                "id": cid,
+                "object": "chat.completion.chunk",
+                "choices": [],
+                "usage": _usage(body, len(pieces)),
+            }
+            await emit(f"data: {json.dumps(usage)}\n\n".encode())
+        await emit(b"data: [DONE]\n\n")
+        await send({"type": "http.response.body", "body": b""})
+
+
+async def _read_body(receive) -> bytes:
+    body = b""
+    while True:
+        message = await receive()
+        body += message.get("body", b"")
+        if not message.get("more_body"):
+            return body
+
+
+def add_arguments(parser: argparse.ArgumentParser) -> None:
+    """Stub settings, shared with ``benchmarks.load``."""
+    defaults = FakeConfig()
+    parser.add_argument("--latency", type=float, default=defaults.latency)
+    parser.add_argument("--dist", choices=DISTRIBUTIONS, default=defaults.dist)
+    parser.add_argument(
+        "--tokens-per-second", type=float, default=defaults.tokens_per_second
+    )
+    parser.add_argument("--reply-tokens", type=int, default=defaults.reply_tokens)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share of 500s")
+    parser.add_argument(
+        "--rate-limit-rate", type=float, default=0.0, help="share of 429s"
+    )
+    parser.add_argument("--retry-after", type=float, default=defaults.retry_after)
+    parser.add_argument("--fault-model", default="", help="faults only for this model")
+    parser.add_argument("--verdict", choices=("yes", "no"), default="yes")
+    parser.add_argument("--score", type=int, default=defaults.score)
+    parser.add_argument("--script", help="JSON file of reply rules")
+    parser.add_argument("--seed", type=int)
+
+
+def config_from_args(args: argparse.Namespace) -> FakeConfig:
+    script = []
+    if args.script:
+        with open(args.script) as f:
+            script = json.load(f)
+    return FakeConfig(
+        latency=args.latency,
+        dist=args.dist,
+        tokens_per_second=args.tokens_per_second,
+        reply_tokens=args.reply_tokens,
+        error_rate=args.error_rate,
+        rate_limit_rate=args.rate_limit_rate,
+        retry_after=args.retry_after,
+        fault_model=args.fault_model,
+        verdict=args.verdict == "yes",
+        score=args.score,
+        script=script,
+        seed=args.seed,
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8100)
+    add_arguments(parser)
+    args = parser.parse_args()
+
+    try:
+        import uvicorn
+    except ImportError as e:
+        raise SystemExit(
+            "The fake LLM server needs uvicorn: pip install uvicorn"
+        ) from e
+
+    app = FakeLLM(config_from_args(args))
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
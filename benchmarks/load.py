@@ -0,0 +1,264 @@
+"""Drive graphs against the local LLM stub and report latency.
+
+    python -m benchmarks.load day05 --concurrency 32 --requests 500
+    python -m benchmarks.load day06 day07 --rate 20 --duration 30
+    python -m benchmarks.load day04 --error-rate 0.3 --fault-model devstral
+
+Without ``--base-url`` a ``benchmarks.fake_llm`` server is started in a
+subprocess (stub options such as ``--latency`` are passed through) and
+every chat model is pointed at it through ``LLM_BASE_URL``, with the
+response cache off.
+
+Closed loop (default): ``--requests`` runs with ``--concurrency`` in
+flight. Open loop (``--rate``): Poisson arrivals for ``--duration``
+seconds, whether or not earlier runs have finished, so latency includes
+queueing. Reports throughput, p50/p95/p99 and, from the stub's
+counters, LLM calls per run and the time per run not spent waiting on
+the model (graph and framework overhead; exact when a run's LLM calls
+are sequential). ``--nodes`` adds mean wall time per node, from
+``common.metrics``.
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import socket
+import statistics
+import subprocess
+import sys
+import time
+from collections import Counter
+from typing import AsyncIterator, Callable, Dict, List
+
+from benchmarks.fake_llm import add_arguments
+from common.graphs import GRAPH_MODULES, get_graph, load_graph_module
+from common.metrics import node_summary, reset
+
+QUESTION = "Explain why retries are dangerous in agent systems."
+
+
+def _messages_state(**extra) -> Callable[[], dict]:
+    def build() -> dict:
+        from langchain_core.messages import HumanMessage
+
+        return {"messages": [HumanMessage(content=QUESTION)], **extra}
+
+    return build
+
+
+def _rag_state(**extra) -> Callable[[], dict]:
+    return lambda: {
+        "question": "What is agent memory?",
+        "documents": [],
+        "answer": "",
+        **extra,
+    }
+
+
+# Fresh initial state per run, as in each module's __main__
+SAMPLE_INPUTS: Dict[str, Callable[[], dict]] = {
+    "day01": lambda: {"message": "Hello, LangGraph!"},
+    "day02_state": lambda: {"input_text": "Hello LangGraph state!"},
+    "day02_reducers": lambda: {"events": []},
+    "day03": _messages_state(),
+    "day04": _messages_state(retries=0, error=None, retryable=False, retry_after=None),
+    "day05": _messages_state(score=0, iterations=0),
+    "day06": _rag_state(needs_web_search=False, filters=None),
+    "day07": _rag_state(grounded=False, verified=False, iterations=0),
+}
+
+
+# -----------------------------
+# 1. Stub server
+# -----------------------------
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def stub_argv(args: argparse.Namespace) -> List[str]:
+    """Re-serialise the stub options given to this command."""
+    stub = argparse.ArgumentParser()
+    add_arguments(stub)
+    argv = []
+    for action in stub._actions:
+        value = getattr(args, action.dest, None)
+        if action.option_strings and value is not None:
+            argv += [action.option_strings[0], str(value)]
+    return argv
+
+
+def start_stub(args: argparse.Namespace) -> tuple[subprocess.Popen, str]:
+    import httpx
+
+    port = _free_port()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "benchmarks.fake_llm", "--port", str(port)]
+        + stub_argv(args)
+    )
+    url = f"http://127.0.0.1:{port}/v1"
+    deadline = time.monotonic() + 15
+    while time.monotonic() < deadline:
+        try:
+            httpx.get(f"{url}/models").raise_for_status()
+            return process, url
+        except httpx.HTTPError:
+            if process.poll() is not None:
+                break
+            time.sleep(0.1)
+    process.kill()
+    raise SystemExit("the fake LLM server did not start")
+
+
+def stub_stats(url: str) -> Dict[str, float]:
+    import httpx
+
+    try:
+        response = httpx.get(f"{url}/stats")
+        response.raise_for_status()
+        return response.json()
+    except (httpx.HTTPError, ValueError):
+        # A real endpoint has no counters
+        return {}
+
+
+# -----------------------------
+# 2. Load shapes
+# -----------------------------
+def closed_loop(build: Callable[[], dict], requests: int):
+    return (build() for _ in range(requests))
+
+
+async def open_loop(
+    build: Callable[[], dict], rate: float, duration: float, seed: int | None
+) -> AsyncIterator[dict]:
+    rng = random.Random(seed)
+    end = time.monotonic() + duration
+    while (now := time.monotonic()) < end:
+        yield build()
+        await asyncio.sleep(min(rng.expovariate(rate), end - now))
+
+
+def prepare(name: str) -> None:
+    module = load_graph_module(name)
+    # RAG graphs need their seed corpus, as their __main__ ensures
+    seeds = getattr(module, "SEED_DOCUMENTS", None)
+    store = getattr(module, "vector_store", None)
+    if seeds and store and store.get_collection().count() == 0:
+        store.add_documents(seeds)
+
+
+async def drive(name: str, args: argparse.Namespace, url: str) -> dict:
+    from common.batch import run_batch
+
+    build = SAMPLE_INPUTS[name]
+    if args.rate:
+        inputs = open_loop(build, args.rate, args.duration, args.seed)
+        concurrency = args.max_in_flight
+    else:
+        inputs = closed_loop(build, args.requests)
+        concurrency = args.concurrency
+
+    graph = get_graph(name)
+    # Untimed runs pay for model construction and lazy imports
+    async for _ in run_batch(graph, closed_loop(build, args.warmup)):
+        pass
+
+    reset()
+    before = stub_stats(url)
+    latencies, errors = [], []
+    start = time.perf_counter()
+    async for result in run_batch(
+        graph, inputs, concurrency=concurrency, timeout=args.timeout
+    ):
+        latencies.append(result.elapsed)
+        # day04 ends a failed run normally, with the error in its state
+        error = result.error or (result.output or {}).get("error")
+        if error:
+            errors.append(str(error))
+    return {
+        "latencies": latencies,
+        "errors": errors,
+        "wall": time.perf_counter() - start,
+        "before": before,
+        "after": stub_stats(url),
+    }
+
+
+async def drive_all(names: List[str], args: argparse.Namespace, url: str) -> None:
+    # One event loop for every graph: pooled async clients are bound to it
+    for name in names:
+        prepare(name)
+        run = await drive(name, args, url)
+        print(report(name, run))
+        for error, count in Counter(run["errors"]).most_common(3):
+            print(f"{'':<16}{count} x {error[:100]}")
+        if args.nodes:
+            for node, (count, mean) in sorted(node_summary(name).items()):
+                print(f"{'':<16}{node:<20}{count:>7} runs {mean * 1000:>9.1f} ms mean")
+
+
+# -----------------------------
+# 3. Report
+# -----------------------------
+def report(name: str, run: dict) -> str:
+    latencies, before, after = run["latencies"], run["before"], run["after"]
+    count = len(latencies)
+    if count < 2:
+        return f"{name:<16}{count} runs: too few to report"
+
+    cuts = statistics.quantiles(latencies, n=100)
+    line = (
+        f"{name:<16}{count:>6}{len(run['errors']):>7}{count / run['wall']:>9.1f}"
+        f"{cuts[49] * 1000:>9.0f}{cuts[94] * 1000:>9.0f}{cuts[98] * 1000:>9.0f}"
+    )
+    if after:
+        calls = (after.get("requests", 0) - before.get("requests", 0)) / count
+        waited = after.get("simulated_seconds", 0) - before.get("simulated_seconds", 0)
+        overhead = (sum(latencies) - waited) / count
+        line += f"{calls:>8.1f}{overhead * 1000:>11.1f}"
+    return line
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("graphs", nargs="*", help="default: all graphs")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=100)
+    parser.add_argument("--rate", type=float, help="open loop: arrivals per second")
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--max-in-flight", type=int, default=1000)
+    parser.add_argument("--timeout", type=float, help="seconds per run")
+    parser.add_argument("--warmup", type=int, default=2, help="untimed runs")
+    parser.add_argument("--nodes", action="store_true", help="per-node breakdown")
+    parser.add_argument("--base-url", help="use this server instead of the stub")
+    add_arguments(parser.add_argument_group("stub server"))
+    args = parser.parse_args()
+
+    unknown = sorted(set(args.graphs) - set(GRAPH_MODULES))
+    if unknown:
+        parser.error(f"unknown graphs {unknown}; choose from {sorted(GRAPH_MODULES)}")
+
+    process, url = (None, args.base_url) if args.base_url else start_stub(args)
+    os.environ["LLM_BASE_URL"] = url
+    # Identical prompts would otherwise be served from the response cache
+    os.environ["LLM_CACHE"] = "0"
+    for key in ("OPENROUTER_API_KEY", "GEMINI_API_KEY"):
+        os.environ.setdefault(key, "load-test")
+
+    print(
+        f"{'graph':<16}{'runs':>6}{'errors':>7}{'runs/s':>9}"
+        f"{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'llm/run':>8}{'other ms':>11}"
+    )
+    try:
+        asyncio.run(drive_all(args.graphs or sorted(GRAPH_MODULES), args, url))
+    finally:
+        if process:
+            process.terminate()
+            process.wait()
+
+
+if __name__ == "__main__":
+    main()
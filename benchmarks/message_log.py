@@ -0,0 +1,102 @@
+"""Per-step cost of growing message history: operator.add vs AppendLog.
+
+    python -m benchmarks.message_log --steps 10000
+
+Prints the mean cost of one append in successive windows of the run,
+first for the bare reducer and then through a looping LangGraph graph.
+With ``operator.add`` the cost grows with history length; with
+``append_log`` it stays flat.
+"""
+
+import argparse
+import time
+from operator import add
+from typing import Annotated, Callable, List, TypedDict
+
+from langchain_core.messages import AIMessage
+from langgraph.graph import END, StateGraph
+
+from common.message_log import AppendLog, append_log
+
+WINDOWS = 5
+
+
+def window_means(timings: List[float]) -> List[float]:
+    size = max(1, len(timings) // WINDOWS)
+    return [
+        sum(timings[i : i + size]) / len(timings[i : i + size]) * 1e6
+        for i in range(0, size * WINDOWS, size)
+    ]
+
+
+# -----------------------------
+# 1. Reducer only
+# -----------------------------
+def bench_reducer(reducer: Callable, empty, steps: int) -> List[float]:
+    state = empty
+    message = AIMessage(content="x")
+    timings = []
+    for _ in range(steps):
+        start = time.perf_counter()
+        state = reducer(state, [message])
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+# -----------------------------
+# 2. Through a LangGraph loop
+# -----------------------------
+def bench_graph(state_type: type, steps: int) -> List[float]:
+    stamps: List[float] = []
+
+    def step(state):
+        stamps.append(time.perf_counter())
+        return {"messages": [AIMessage(content="x")]}
+
+    def loop(state):
+        return END if len(state["messages"]) >= steps else "step"
+
+    builder = StateGraph(state_type)
+    builder.add_node("step", step)
+    builder.set_entry_point("step")
+    builder.add_conditional_edges("step", loop)
+    graph = builder.compile()
+
+    graph.invoke({"messages": []}, {"recursion_limit": steps + 10})
+    return [b - a for a, b in zip(stamps, stamps[1:])]
+
+
+class ListState(TypedDict):
+    messages: Annotated[list, add]
+
+
+class LogState(TypedDict):
+    messages: Annotated[AppendLog, append_log]
+
+
+def report(label: str, timings: List[float]) -> None:
+    cells = "  ".join(f"{mean:9.2f}" for mean in window_means(timings))
+    print(f"{label:<28}{cells}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--steps", type=int, default=10_000)
+    parser.add_argument("--skip-graph", action="store_true")
+    args = parser.parse_args()
+
+    size = args.steps // WINDOWS
+    header = "  ".join(f"{f'<{(i + 1) * size}':>9}" for i in range(WINDOWS))
+    print(f"mean µs per step by history length ({args.steps} steps)")
+    print(f"{'':<28}{header}")
+
+    report("reducer operator.add", bench_reducer(add, [], args.steps))
+    report("reducer append_log", bench_reducer(append_log, AppendLog(), args.steps))
+
+    if not args.skip_graph:
+        report("graph operator.add", bench_graph(ListState, args.steps))
+        report("graph append_log", bench_graph(LogState, args.steps))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+"""Cold-start cost of each graph module.
+
+    python -m benchmarks.startup --repeat 5
+    python -m benchmarks.startup day06 day07 --top 10
+
+Every measurement runs in a fresh interpreter. For each module it
+reports the median wall time of importing it, building its graph with
+``get_graph()``, and resolving its module-level ``LazyLLM`` models (the
+``langchain_openai`` import, the chat model and its endpoint's
+connection pool; no network calls). Compiling a graph leaves those
+models unbuilt, so "models" is the cost the first request would pay.
+Then it lists the packages with the largest self time in
+``python -X importtime``.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from collections import Counter
+from typing import Dict, List
+
+from common.graphs import GRAPH_MODULES
+
+PHASES = ("import", "graph", "models")
+
+PROBE = """
+import importlib, json, sys, time
+start = time.perf_counter()
+module = importlib.import_module(sys.argv[1])
+imported = time.perf_counter()
+module.get_graph()
+built = time.perf_counter()
+# Resolve the LazyLLMs the first request would otherwise build
+llm = sys.modules.get("common.llm")
+for value in list(vars(module).values()):
+    if llm and isinstance(value, llm.LazyLLM):
+        value.resolve()
+resolved = time.perf_counter()
+print(json.dumps({
+    "import": imported - start,
+    "graph": built - imported,
+    "models": resolved - built,
+}))
+"""
+
+
+def _env() -> Dict[str, str]:
+    env = dict(os.environ)
+    # Model construction validates that a key is set; nothing is sent
+    env.setdefault("OPENROUTER_API_KEY", "benchmark")
+    env.setdefault("GEMINI_API_KEY", "benchmark")
+    return env
+
+
+# -----------------------------
+# 1. Phase timings
+# -----------------------------
+def time_phases(module: str, repeat: int) -> Dict[str, float]:
+    runs: Dict[str, List[float]] = {phase: [] for phase in PHASES}
+    for _ in range(repeat):
+        out = subprocess.run(
+            [sys.executable, "-c", PROBE, module],
+            capture_output=True,
+            text=True,
+            check=True,
+            env=_env(),
+        ).stdout
+        timings = json.loads(out.strip().splitlines()[-1])
+        for phase in PHASES:
+            runs[phase].append(timings[phase])
+    return {phase: statistics.median(values) for phase, values in runs.items()}
+
+
+# -----------------------------
+# 2. -X importtime breakdown
+# -----------------------------
+def import_profile(module: str) -> Counter:
+    """Self time (µs) per top-level package for ``import module``."""
+    err = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        check=True,
+        env=_env(),
+    ).stderr
+
+    totals: Counter = Counter()
+    for line in err.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, _, name = line.removeprefix("import time:").split("|")
+        totals[name.strip().split(".")[0]] += int(self_us)
+    return totals
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("graphs", nargs="*", default=sorted(GRAPH_MODULES))
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--top", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'graph':<16}{'import':>10}{'graph':>10}{'models':>10}{'total':>10}")
+    profiles = {}
+    for name in args.graphs:
+        module = GRAPH_MODULES[name]
+        timings = time_phases(module, args.repeat)
+        total = sum(timings.values())
+        print(
+            f"{name:<16}"
+            + "".join(f"{timings[phase] * 1000:>8.0f}ms" for phase in PHASES)
+            + f"{total * 1000:>8.0f}ms"
+        )
+        profiles[name] = import_profile(module)
+
+    print("\nSlowest packages by import self time:")
+    for name, totals in profiles.items():
+        top = ", ".join(
+            f"{package} {us / 1000:.0f}ms"
+            for package, us in totals.most_common(args.top)
+        )
+        print(f"  {name:<14} {top}")
+
+
+if __name__ == "__main__":
+    main()
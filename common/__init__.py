@@ -0,0 +1,5 @@
+"""Shared building blocks used by the day0x graphs.
+
+Run the graphs from the repository root as modules so this package is
+importable, e.g. ``python -m day06_agentic_rag.agentic_rag``.
+"""
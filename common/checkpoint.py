@@ -0,0 +1,555 @@
+"""Checkpointing so a crashed or interrupted run resumes where it stopped.
+
+Graphs compile with ``get_checkpointer()``. With a checkpointer, every
+finished node is saved under the run's ``thread_id``; re-running the same
+thread id skips the nodes (and LLM calls) that already completed.
+
+Configured from the environment:
+
+    CHECKPOINT_BACKEND=memory       keep checkpoints for this process only
+    CHECKPOINT_BACKEND=sqlite       persist to CHECKPOINT_PATH
+    CHECKPOINT_PATH=.checkpoints.sqlite
+
+Checkpointing is off unless a backend is set. Resume a thread with:
+
+    python -m common.checkpoint threads
+    python -m common.checkpoint resume day05 <thread_id>
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import sqlite3
+import threading
+import uuid
+import zlib
+from collections.abc import AsyncIterator, Iterator, Sequence
+from functools import lru_cache
+from typing import Any, Dict, List, Tuple
+
+from langgraph.checkpoint.base import (
+    WRITES_IDX_MAP,
+    BaseCheckpointSaver,
+    ChannelVersions,
+    Checkpoint,
+    CheckpointMetadata,
+    CheckpointTuple,
+    get_checkpoint_id,
+    get_checkpoint_metadata,
+)
+from langgraph.checkpoint.memory import InMemorySaver
+from langgraph.checkpoint.serde.jsonplus import JsonPlusSerializer
+
+from common.message_log import AppendLog
+
+# Blobs at least this large are zlib-compressed
+COMPRESS_MIN_BYTES = 1024
+APPEND_LOG = "appendlog:"
+COMPRESSED = "+zlib"
+# A message log stored as "previous version + new messages"
+DELTA = "appendlog-delta"
+# Threads whose last message log is remembered for delta encoding
+MAX_TRACKED_LOGS = 1024
+# A full copy of a message log is stored every this many versions, so
+# loading one never replays more than this many deltas
+SNAPSHOT_EVERY = 32
+# Channel has no value at this version (distinct from a stored ``None``)
+MISSING = object()
+
+
+# -----------------------------
+# 1. Serialization
+# -----------------------------
+class CheckpointSerializer(JsonPlusSerializer):
+    """msgpack (LangGraph's default) plus ``AppendLog`` and compression."""
+
+    def dumps_typed(self, obj: Any) -> Tuple[str, bytes]:
+        prefix = ""
+        if isinstance(obj, AppendLog):
+            prefix, obj = APPEND_LOG, list(obj)
+        type_, data = super().dumps_typed(obj)
+        type_ = prefix + type_
+        if len(data) >= COMPRESS_MIN_BYTES:
+            return type_ + COMPRESSED, zlib.compress(data)
+        return type_, data
+
+    def loads_typed(self, data: Tuple[str, bytes]) -> Any:
+        type_, payload = data
+        if type_.endswith(COMPRESSED):
+            type_, payload = type_.removesuffix(COMPRESSED), zlib.decompress(payload)
+        if type_.startswith(APPEND_LOG):
+            return AppendLog(
+                super().loads_typed((type_.removeprefix(APPEND_LOG), payload))
+            )
+        return super().loads_typed((type_, payload))
+
+
+# -----------------------------
+# 2. SQLite saver
+# -----------------------------
+class SQLiteSaver(BaseCheckpointSaver[str]):
+    """Durable checkpoint saver on a single SQLite file.
+
+    Like LangGraph's savers, each checkpoint only writes the channels
+    whose version changed. Message logs go one step further: a log that
+    grew by appending is stored as the previous version plus the new
+    messages, so a long loop writes O(new messages) per step instead of
+    the whole history. Every ``SNAPSHOT_EVERY`` versions the full log is
+    stored again, which bounds the delta chain a load has to replay.
+    """
+
+    def __init__(self, path: str = ":memory:", *, serde=None):
+        super().__init__(serde=serde or CheckpointSerializer())
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(
+            "CREATE TABLE IF NOT EXISTS checkpoints ("
+            " thread_id TEXT, checkpoint_ns TEXT, checkpoint_id TEXT,"
+            " parent_id TEXT, type TEXT, checkpoint BLOB,"
+            " metadata_type TEXT, metadata BLOB,"
+            " PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id));"
+            "CREATE TABLE IF NOT EXISTS blobs ("
+            " thread_id TEXT, checkpoint_ns TEXT, channel TEXT, version TEXT,"
+            " type TEXT, value BLOB,"
+            " PRIMARY KEY (thread_id, checkpoint_ns, channel, version));"
+            "CREATE TABLE IF NOT EXISTS writes ("
+            " thread_id TEXT, checkpoint_ns TEXT, checkpoint_id TEXT,"
+            " task_id TEXT, idx INTEGER, channel TEXT, type TEXT, value BLOB,"
+            " task_path TEXT,"
+            " PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id, task_id, idx));"
+        )
+        self._conn.commit()
+        # (thread_id, ns, channel) -> (version, log, deltas since a full
+        # copy) of the last stored log
+        self._logs: Dict[Tuple[str, str, str], Tuple[str, AppendLog, int]] = {}
+
+    # ---- channel blobs ----
+    def _encode_blob(self, key: Tuple[str, str, str], version: str, value: Any):
+        previous = self._logs.pop(key, None)
+        if isinstance(value, AppendLog):
+            if (
+                previous is not None
+                and previous[2] + 1 < SNAPSHOT_EVERY
+                and value.extends(previous[1])
+            ):
+                self._track(key, version, value, previous[2] + 1)
+                new = list(value[len(previous[1]) :])
+                return DELTA, json.dumps(previous[0]).encode() + b"\n" + b"".join(
+                    self._pack(new)
+                )
+            self._track(key, version, value, 0)
+        return self.serde.dumps_typed(value)
+
+    def _track(
+        self, key: Tuple[str, str, str], version: str, log: AppendLog, depth: int
+    ):
+        self._logs.pop(key, None)
+        self._logs[key] = version, log, depth
+        if len(self._logs) > MAX_TRACKED_LOGS:
+            # Oldest first: insertion order is recency order
+            del self._logs[next(iter(self._logs))]
+
+    def _pack(self, value: Any) -> Tuple[bytes, bytes]:
+        type_, data = self.serde.dumps_typed(value)
+        return type_.encode() + b"\n", data
+
+    def _unpack(self, payload: bytes) -> Any:
+        type_, data = payload.split(b"\n", 1)
+        return self.serde.loads_typed((type_.decode(), data))
+
+    def _load_blob(self, thread_id: str, ns: str, channel: str, version: str):
+        """``(value, number of deltas replayed)``; ``MISSING`` if absent."""
+        suffixes = []
+        while True:
+            row = self._conn.execute(
+                "SELECT type, value FROM blobs WHERE thread_id = ?"
+                " AND checkpoint_ns = ? AND channel = ? AND version = ?",
+                (thread_id, ns, channel, version),
+            ).fetchone()
+            if row is None or row[0] == "empty":
+                return MISSING, 0
+            if row[0] != DELTA:
+                break
+            head, payload = row[1].split(b"\n", 1)
+            suffixes.append(self._unpack(payload))
+            version = json.loads(head)
+
+        value = self.serde.loads_typed((row[0], row[1]))
+        if suffixes:
+            value = AppendLog(value)
+            for suffix in reversed(suffixes):
+                value = value.extend(suffix)
+        return value, len(suffixes)
+
+    def _load_channels(self, thread_id: str, ns: str, versions: ChannelVersions):
+        values = {}
+        for channel, version in versions.items():
+            value, depth = self._load_blob(thread_id, ns, channel, version)
+            if value is MISSING:
+                continue
+            values[channel] = value
+            if isinstance(value, AppendLog):
+                # Resumed runs append to this log; store those as deltas too
+                self._track((thread_id, ns, channel), version, value, depth)
+        return values
+
+    # ---- checkpoints ----
+    def _tuple(self, thread_id: str, ns: str, row) -> CheckpointTuple:
+        checkpoint_id, parent_id, type_, blob, metadata_type, metadata = row
+        checkpoint = self.serde.loads_typed((type_, blob))
+        writes = self._conn.execute(
+            "SELECT task_id, channel, type, value FROM writes WHERE thread_id = ?"
+            " AND checkpoint_ns = ? AND checkpoint_id = ? ORDER BY task_id, idx",
+            (thread_id, ns, checkpoint_id),
+        ).fetchall()
+
+        def config(checkpoint_id: str) -> dict:
+            return {
+                "configurable": {
+                    "thread_id": thread_id,
+                    "checkpoint_ns": ns,
+                    "checkpoint_id": checkpoint_id,
+                }
+            }
+
+        return CheckpointTuple(
+            config=config(checkpoint_id),
+            checkpoint={
+                **checkpoint,
+                "channel_values": self._load_channels(
+                    thread_id, ns, checkpoint["channel_versions"]
+                ),
+            },
+            metadata=self.serde.loads_typed((metadata_type, metadata)),
+            parent_config=config(parent_id) if parent_id else None,
+            pending_writes=[
+                (task_id, channel, self.serde.loads_typed((t, v)))
+                for task_id, channel, t, v in writes
+            ],
+        )
+
+    def get_tuple(self, config: dict) -> CheckpointTuple | None:
+        thread_id = config["configurable"]["thread_id"]
+        ns = config["configurable"].get("checkpoint_ns", "")
+        query = (
+            "SELECT checkpoint_id, parent_id, type, checkpoint, metadata_type,"
+            " metadata FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ?"
+        )
+        params: tuple = (thread_id, ns)
+        if checkpoint_id := get_checkpoint_id(config):
+            query += " AND checkpoint_id = ?"
+            params += (checkpoint_id,)
+        else:
+            query += " ORDER BY checkpoint_id DESC LIMIT 1"
+
+        with self._lock:
+            row = self._conn.execute(query, params).fetchone()
+            return self._tuple(thread_id, ns, row) if row else None
+
+    def list(
+        self,
+        config: dict | None,
+        *,
+        filter: Dict[str, Any] | None = None,
+        before: dict | None = None,
+        limit: int | None = None,
+    ) -> Iterator[CheckpointTuple]:
+        query = (
+            "SELECT thread_id, checkpoint_ns, checkpoint_id, parent_id, type,"
+            " checkpoint, metadata_type, metadata FROM checkpoints WHERE 1 = 1"
+        )
+        params: tuple = ()
+        if config:
+            query += " AND thread_id = ?"
+            params += (config["configurable"]["thread_id"],)
+            if (ns := config["configurable"].get("checkpoint_ns")) is not None:
+                query += " AND checkpoint_ns = ?"
+                params += (ns,)
+            if checkpoint_id := get_checkpoint_id(config):
+                query += " AND checkpoint_id = ?"
+                params += (checkpoint_id,)
+        if before and (before_id := get_checkpoint_id(before)):
+            query += " AND checkpoint_id < ?"
+            params += (before_id,)
+        query += " ORDER BY checkpoint_id DESC"
+
+        with self._lock:
+            rows = self._conn.execute(query, params).fetchall()
+
+        for thread_id, ns, *row in rows:
+            if limit is not None and limit <= 0:
+                return
+            metadata = self.serde.loads_typed((row[4], row[5]))
+            if filter and any(metadata.get(k) != v for k, v in filter.items()):
+                continue
+            if limit is not None:
+                limit -= 1
+            with self._lock:
+                item = self._tuple(thread_id, ns, row)
+            # Not under the lock: the caller may use the saver between items
+            yield item
+
+    def put(
+        self,
+        config: dict,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> dict:
+        thread_id = config["configurable"]["thread_id"]
+        ns = config["configurable"]["checkpoint_ns"]
+        checkpoint = checkpoint.copy()
+        values = checkpoint.pop("channel_values")
+
+        with self._lock:
+            # Only channels that changed since the parent checkpoint
+            for channel, version in new_versions.items():
+                if channel in values:
+                    type_, blob = self._encode_blob(
+                        (thread_id, ns, channel), version, values[channel]
+                    )
+                else:
+                    type_, blob = "empty", b""
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO blobs VALUES (?, ?, ?, ?, ?, ?)",
+                    (thread_id, ns, channel, version, type_, blob),
+                )
+            type_, blob = self.serde.dumps_typed(checkpoint)
+            metadata_type, metadata_blob = self.serde.dumps_typed(
+                get_checkpoint_metadata(config, metadata)
+            )
+            self._conn.execute(
+                "INSERT OR REPLACE INTO checkpoints VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    thread_id,
+                    ns,
+                    checkpoint["id"],
+                    config["configurable"].get("checkpoint_id"),
+                    type_,
+                    blob,
+                    metadata_type,
+                    metadata_blob,
+                ),
+            )
+            self._conn.commit()
+
+        return {
+            "configurable": {
+                "thread_id": thread_id,
+                "checkpoint_ns": ns,
+                "checkpoint_id": checkpoint["id"],
+            }
+        }
+
+    def put_writes(
+        self,
+        config: dict,
+        writes: Sequence[Tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        configurable = config["configurable"]
+        rows = []
+        for index, (channel, value) in enumerate(writes):
+            idx = WRITES_IDX_MAP.get(channel, index)
+            rows.append(
+                (
+                    # Special writes (errors, interrupts) may be replaced,
+                    # regular ones are written once per task
+                    "REPLACE" if idx < 0 else "IGNORE",
+                    (
+                        configurable["thread_id"],
+                        configurable.get("checkpoint_ns", ""),
+                        configurable["checkpoint_id"],
+                        task_id,
+                        idx,
+                        channel,
+                        *self.serde.dumps_typed(value),
+                        task_path,
+                    ),
+                )
+            )
+        with self._lock:
+            for conflict, row in rows:
+                self._conn.execute(
+                    f"INSERT OR {conflict} INTO writes"
+                    " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    row,
+                )
+            self._conn.commit()
+
+    def delete_thread(self, thread_id: str) -> None:
+        with self._lock:
+            for table in ("checkpoints", "blobs", "writes"):
+                self._conn.execute(
+                    f"DELETE FROM {table} WHERE thread_id = ?", (thread_id,)
+                )
+            self._conn.commit()
+            for key in [key for key in self._logs if key[0] == thread_id]:
+                del self._logs[key]
+
+    def threads(self) -> List[Tuple[str, str]]:
+        """``(thread_id, latest checkpoint id)`` for every stored thread."""
+        with self._lock:
+            return self._conn.execute(
+                "SELECT thread_id, MAX(checkpoint_id) FROM checkpoints"
+                " GROUP BY thread_id ORDER BY 2 DESC"
+            ).fetchall()
+
+    # ---- async twins: SQLite is blocking, keep it off the event loop ----
+    async def aget_tuple(self, config: dict) -> CheckpointTuple | None:
+        return await asyncio.to_thread(self.get_tuple, config)
+
+    async def alist(
+        self,
+        config: dict | None,
+        *,
+        filter: Dict[str, Any] | None = None,
+        before: dict | None = None,
+        limit: int | None = None,
+    ) -> AsyncIterator[CheckpointTuple]:
+        items = await asyncio.to_thread(
+            lambda: list(self.list(config, filter=filter, before=before, limit=limit))
+        )
+        for item in items:
+            yield item
+
+    async def aput(
+        self,
+        config: dict,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> dict:
+        return await asyncio.to_thread(
+            self.put, config, checkpoint, metadata, new_versions
+        )
+
+    async def aput_writes(
+        self,
+        config: dict,
+        writes: Sequence[Tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        await asyncio.to_thread(self.put_writes, config, writes, task_id, task_path)
+
+    async def adelete_thread(self, thread_id: str) -> None:
+        await asyncio.to_thread(self.delete_thread, thread_id)
+
+    def get_next_version(self, current: str | None, channel: None) -> str:
+        # Same scheme as InMemorySaver: zero-padded counter + random tiebreak
+        if current is None:
+            current_v = 0
+        elif isinstance(current, int):
+            current_v = current
+        else:
+            current_v = int(current.split(".")[0])
+        return f"{current_v + 1:032}.{random.random():016}"
+
+
+# -----------------------------
+# 3. Process-wide saver
+# -----------------------------
+@lru_cache(maxsize=None)
+def get_checkpointer() -> BaseCheckpointSaver | None:
+    """Build the shared saver from the environment, or ``None`` if disabled."""
+    backend = os.getenv("CHECKPOINT_BACKEND", "none")
+    if backend == "memory":
+        return InMemorySaver(serde=CheckpointSerializer())
+    if backend == "sqlite":
+        return SQLiteSaver(os.getenv("CHECKPOINT_PATH", ".checkpoints.sqlite"))
+    return None
+
+
+def thread_config(thread_id: str | None = None, config: dict | None = None) -> dict:
+    """``config`` with ``thread_id`` set (a fresh one if not given)."""
+    config = dict(config or {})
+    configurable = dict(config.get("configurable", {}))
+    if thread_id is not None:
+        configurable["thread_id"] = thread_id
+    configurable.setdefault("thread_id", uuid.uuid4().hex)
+    config["configurable"] = configurable
+    return config
+
+
+def ensure_thread(graph, config: dict | None = None) -> dict | None:
+    """Give a checkpointed run a thread id if the caller did not."""
+    if getattr(graph, "checkpointer", None) is None:
+        return config
+    return thread_config(config=config)
+
+
+# -----------------------------
+# 4. Resume by thread id
+# -----------------------------
+def run_or_resume(graph, inputs: dict | None, thread_id: str | None = None) -> dict:
+    """Continue ``thread_id`` if it stopped part-way, otherwise run ``inputs``.
+
+    A thread that already finished returns its saved final state without
+    calling any node again.
+    """
+    if graph.checkpointer is None:
+        return graph.invoke(inputs)
+
+    config = thread_config(thread_id)
+    snapshot = graph.get_state(config)
+    if snapshot.next:
+        return graph.invoke(None, config)
+    if snapshot.values:
+        return snapshot.values
+    return graph.invoke(inputs, config)
+
+
+async def arun_or_resume(
+    graph, inputs: dict | None, thread_id: str | None = None
+) -> dict:
+    if graph.checkpointer is None:
+        return await graph.ainvoke(inputs)
+
+    config = thread_config(thread_id)
+    snapshot = await graph.aget_state(config)
+    if snapshot.next:
+        return await graph.ainvoke(None, config)
+    if snapshot.values:
+        return snapshot.values
+    return await graph.ainvoke(inputs, config)
+
+
+def main() -> None:
+    # Resuming only makes sense against the durable store
+    os.environ.setdefault("CHECKPOINT_BACKEND", "sqlite")
+
+    from common.graphs import get_graph
+    from common.streaming import to_jsonable
+
+    parser = argparse.ArgumentParser(description="Inspect and resume graph runs.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("threads", help="list stored threads")
+    resume = commands.add_parser("resume", help="continue a stopped thread")
+    resume.add_argument("graph")
+    resume.add_argument("thread_id")
+    args = parser.parse_args()
+
+    saver = get_checkpointer()
+    if args.command == "threads":
+        if not isinstance(saver, SQLiteSaver):
+            parser.error("listing threads needs CHECKPOINT_BACKEND=sqlite")
+        for thread_id, checkpoint_id in saver.threads():
+            print(thread_id, checkpoint_id)
+        return
+
+    graph = get_graph(args.graph)
+    snapshot = graph.get_state(thread_config(args.thread_id))
+    if not snapshot.values:
+        parser.error(f"no checkpoint for thread {args.thread_id!r}")
+    print(f"resuming at {list(snapshot.next) or 'end'}")
+    result = run_or_resume(graph, None, args.thread_id)
+    print(json.dumps(to_jsonable(result), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,237 @@
+"""Keep prompts inside a token budget before every model call.
+
+``ContextBudget.fit(messages)`` keeps leading system messages and the
+original request, then as many of the most recent turns as fit. An
+``AIMessage`` with tool calls and its ``ToolMessage`` results are kept
+or dropped together, so the model never sees a dangling call. Dropped
+turns are either discarded or, with a ``summarizer``, folded into one
+summary message placed with the leading system messages. Token counts
+are cached per message object, so each message is counted once however
+many steps it survives.
+
+Summaries are cached by a content hash of the dropped prefix, so one
+budget can be shared by concurrent runs: a run only ever reuses a
+summary of exactly the messages it dropped, or extends one of a prefix.
+"""
+
+import hashlib
+import json
+import threading
+import weakref
+from collections import OrderedDict
+from functools import lru_cache
+from typing import TYPE_CHECKING, Callable, Dict, List, Sequence, Tuple
+
+if TYPE_CHECKING:
+    from langchain_core.messages import BaseMessage, SystemMessage
+
+# Per-message framing overhead in chat formats
+TOKENS_PER_MESSAGE = 3
+# Summaries remembered per budget, least recently used evicted first
+MAX_SUMMARIES = 256
+
+
+# -----------------------------
+# 1. Cached local token counting
+# -----------------------------
+@lru_cache(maxsize=None)
+def _encoder():
+    # tiktoken fetches its vocab on first use; fall back to an estimate
+    # when that isn't possible (offline, sandboxed)
+    try:
+        import tiktoken
+
+        return tiktoken.get_encoding("o200k_base")
+    except Exception:
+        return None
+
+
+class TokenCounter:
+    def __init__(self):
+        self._counts: Dict[int, Tuple[weakref.ref, int]] = {}
+        self._lock = threading.Lock()
+
+    def _count(self, message: "BaseMessage") -> int:
+        from langchain_core.messages import AIMessage
+        from langchain_core.messages.utils import count_tokens_approximately
+
+        encoder = _encoder()
+        if encoder is None:
+            return count_tokens_approximately([message])
+
+        content = message.content
+        text = content if isinstance(content, str) else json.dumps(content)
+        if isinstance(message, AIMessage) and message.tool_calls:
+            text += json.dumps(message.tool_calls)
+        return len(encoder.encode(text)) + TOKENS_PER_MESSAGE
+
+    def __call__(self, message: "BaseMessage") -> int:
+        key = id(message)
+        with self._lock:
+            entry = self._counts.get(key)
+            if entry is not None and entry[0]() is message:
+                return entry[1]
+
+        count = self._count(message)
+
+        def forget(_, key=key, counts=self._counts):
+            counts.pop(key, None)
+
+        with self._lock:
+            self._counts[key] = (weakref.ref(message, forget), count)
+        return count
+
+    def total(self, messages: Sequence["BaseMessage"]) -> int:
+        return sum(self(message) for message in messages)
+
+
+count_tokens = TokenCounter()
+
+
+# -----------------------------
+# 2. Turn grouping
+# -----------------------------
+def group_turns(messages: Sequence["BaseMessage"]) -> List[List["BaseMessage"]]:
+    """Split into atomic units: a tool-calling AIMessage plus its results
+    form one unit, every other message is its own unit."""
+    from langchain_core.messages import ToolMessage
+
+    groups: List[List["BaseMessage"]] = []
+    for message in messages:
+        if isinstance(message, ToolMessage) and groups:
+            groups[-1].append(message)
+        else:
+            groups.append([message])
+    return groups
+
+
+def prefix_hashes(messages: Sequence["BaseMessage"]) -> List[str]:
+    """Hash of ``messages[: i + 1]`` for every ``i``, chained."""
+    hashes, digest = [], b""
+    for message in messages:
+        fields = [
+            message.type,
+            message.content,
+            getattr(message, "tool_calls", None),
+            getattr(message, "tool_call_id", None),
+        ]
+        data = json.dumps(fields, sort_keys=True, default=str).encode()
+        digest = hashlib.sha256(digest + data).digest()
+        hashes.append(digest.hex())
+    return hashes
+
+
+def summarize_with(llm) -> Callable[[List["BaseMessage"]], str]:
+    """Build a summarizer that condenses dropped turns with ``llm``."""
+
+    def summarize(messages: List["BaseMessage"]) -> str:
+        transcript = "\n".join(f"{m.__class__.__name__}: {m.content}" for m in messages)
+        prompt = (
+            "Summarize the following conversation so far in a few sentences, "
+            "keeping facts, decisions and open questions.\n\n"
+            f"{transcript}"
+        )
+        return llm.invoke(prompt).content
+
+    return summarize
+
+
+# -----------------------------
+# 3. Budget manager
+# -----------------------------
+class ContextBudget:
+    def __init__(
+        self,
+        max_tokens: int,
+        keep_last: int = 1,
+        summarizer: Callable[[List["BaseMessage"]], str] | None = None,
+        summary_tokens: int = 256,
+        counter: TokenCounter = count_tokens,
+    ):
+        self.max_tokens = max_tokens
+        # Always keep at least this many recent turns, even over budget
+        self.keep_last = keep_last
+        self.summarizer = summarizer
+        # Room left for the summary message when a summarizer is set
+        self.summary_tokens = summary_tokens
+        self.counter = counter
+        # Prefix hash of the dropped messages -> their summary
+        self._summaries: OrderedDict[str, "SystemMessage"] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _cached(self, hashes: List[str]) -> Tuple[int, "SystemMessage | None"]:
+        """Longest dropped prefix already summarized, and its summary."""
+        with self._lock:
+            for length in range(len(hashes), 0, -1):
+                summary = self._summaries.get(hashes[length - 1])
+                if summary is not None:
+                    self._summaries.move_to_end(hashes[length - 1])
+                    return length, summary
+        return 0, None
+
+    def _summary(self, dropped: List["BaseMessage"]) -> "SystemMessage":
+        from langchain_core.messages import SystemMessage
+
+        hashes = prefix_hashes(dropped)
+        length, previous = self._cached(hashes)
+        if length == len(dropped):
+            return previous
+
+        # Usually only a turn or two was newly dropped: fold those into
+        # the previous summary instead of re-summarizing everything
+        to_summarize = ([previous] if previous else []) + dropped[length:]
+        # Not under the lock: concurrent runs must not wait on this call
+        summary = SystemMessage(
+            content=f"Summary of earlier conversation:\n{self.summarizer(to_summarize)}"
+        )
+        with self._lock:
+            self._summaries[hashes[-1]] = summary
+            if len(self._summaries) > MAX_SUMMARIES:
+                self._summaries.popitem(last=False)
+        return summary
+
+    def fit(self, messages: Sequence["BaseMessage"]) -> List["BaseMessage"]:
+        messages = list(messages)
+        if self.counter.total(messages) <= self.max_tokens:
+            return messages
+
+        from langchain_core.messages import HumanMessage, SystemMessage, ToolMessage
+
+        # Pinned: leading system messages and the first human request
+        pinned_count = 0
+        while pinned_count < len(messages) and isinstance(
+            messages[pinned_count], SystemMessage
+        ):
+            pinned_count += 1
+        system_count = pinned_count
+        if pinned_count < len(messages) and isinstance(
+            messages[pinned_count], HumanMessage
+        ):
+            pinned_count += 1
+        pinned, rest = messages[:pinned_count], messages[pinned_count:]
+
+        budget = self.max_tokens - self.counter.total(pinned)
+        if self.summarizer is not None:
+            budget -= self.summary_tokens
+        kept: List[List["BaseMessage"]] = []
+        groups = group_turns(rest)
+        # Leading ToolMessages (orphaned by a cut) belong to no call
+        while groups and isinstance(groups[0][0], ToolMessage):
+            groups.pop(0)
+
+        for group in reversed(groups):
+            cost = self.counter.total(group)
+            if cost > budget and len(kept) >= self.keep_last:
+                break
+            kept.append(group)
+            budget -= cost
+        kept.reverse()
+
+        dropped = [m for group in groups[: len(groups) - len(kept)] for m in group]
+        recent = [m for group in kept for m in group]
+        if dropped and self.summarizer is not None:
+            # With the leading system messages: several providers reject
+            # a system message after the conversation has started
+            system, request = pinned[:system_count], pinned[system_count:]
+            return system + [self._summary(dropped)] + request + recent
+        return pinned + recent
@@ -0,0 +1,122 @@
+"""Render graph diagrams offline, only when a graph's topology changed.
+
+    python -m common.diagrams                    # Mermaid text for every graph
+    python -m common.diagrams day05 --format ascii
+    python -m common.diagrams --format png       # Graphviz, needs pygraphviz
+
+Diagrams are written next to each graph's module (``<module>.mmd``,
+``.txt`` or ``.png``). A hash of the nodes and edges of every rendered
+diagram is kept in ``.diagrams.json``; unchanged graphs are skipped.
+Nothing here calls a remote renderer, and running a graph never renders.
+"""
+
+import argparse
+import hashlib
+import json
+import os
+from typing import Dict
+
+from common.graphs import GRAPH_MODULES, get_graph
+
+CACHE_PATH = os.getenv("DIAGRAMS_CACHE", ".diagrams.json")
+
+# Format -> (file extension, optional dependency)
+FORMATS = {
+    "mermaid": (".mmd", None),
+    "ascii": (".txt", "grandalf"),
+    "png": (".png", "pygraphviz"),
+}
+
+
+# -----------------------------
+# 1. Topology hash
+# -----------------------------
+def structure_hash(drawable) -> str:
+    """Hash of node ids and edges; node implementations don't matter."""
+    structure = {
+        "nodes": sorted(drawable.nodes),
+        "edges": sorted(
+            [edge.source, edge.target, edge.conditional, str(edge.data)]
+            for edge in drawable.edges
+        ),
+    }
+    return hashlib.sha256(json.dumps(structure).encode()).hexdigest()
+
+
+def output_path(name: str, fmt: str) -> str:
+    return GRAPH_MODULES[name].replace(".", os.sep) + FORMATS[fmt][0]
+
+
+# -----------------------------
+# 2. Local renderers
+# -----------------------------
+def render(drawable, fmt: str, path: str) -> None:
+    if fmt == "mermaid":
+        text = drawable.draw_mermaid()
+    elif fmt == "ascii":
+        text = drawable.draw_ascii()
+    else:
+        drawable.draw_png(output_file_path=path)
+        return
+
+    with open(path, "w") as f:
+        f.write(text if text.endswith("\n") else text + "\n")
+
+
+def _load_cache(path: str) -> Dict[str, str]:
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return {}
+
+
+def export_diagrams(
+    names=None, fmt: str = "mermaid", force: bool = False, cache_path: str = CACHE_PATH
+) -> Dict[str, str]:
+    """Render each graph whose topology changed; return name -> status."""
+    cache = _load_cache(cache_path)
+    statuses = {}
+
+    for name in names or sorted(GRAPH_MODULES):
+        drawable = get_graph(name).get_graph()
+        path = output_path(name, fmt)
+        digest = structure_hash(drawable)
+
+        if not force and cache.get(path) == digest and os.path.exists(path):
+            statuses[name] = f"unchanged  {path}"
+            continue
+
+        render(drawable, fmt, path)
+        cache[path] = digest
+        statuses[name] = f"rendered   {path}"
+
+    with open(cache_path, "w") as f:
+        json.dump(cache, f, indent=2, sort_keys=True)
+    return statuses
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("graphs", nargs="*", help="default: all graphs")
+    parser.add_argument("--format", choices=sorted(FORMATS), default="mermaid")
+    parser.add_argument("--force", action="store_true", help="ignore the cache")
+    args = parser.parse_args()
+
+    unknown = sorted(set(args.graphs) - set(GRAPH_MODULES))
+    if unknown:
+        parser.error(f"unknown graphs {unknown}; choose from {sorted(GRAPH_MODULES)}")
+
+    dependency = FORMATS[args.format][1]
+    if dependency:
+        try:
+            __import__(dependency)
+        except ImportError:
+            parser.error(f"--format {args.format} needs `pip install {dependency}`")
+
+    for name, status in export_diagrams(args.graphs, args.format, args.force).items():
+        print(f"{name:<16}{status}")
+
+
+if __name__ == "__main__":
+    main()
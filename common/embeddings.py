@@ -0,0 +1,48 @@
+import os
+import re
+from functools import lru_cache
+from typing import TYPE_CHECKING, List
+
+if TYPE_CHECKING:
+    from langchain_core.embeddings import Embeddings
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+
+def tokenize(text: str) -> List[str]:
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+# -----------------------------
+# 1. Pluggable default
+# -----------------------------
+@lru_cache(maxsize=None)
+def get_embeddings() -> "Embeddings":
+    """Return the process-wide embedding model.
+
+    ``EMBEDDINGS_BACKEND=openai`` uses ``OpenAIEmbeddings``; anything else
+    falls back to the offline hashing model.
+    """
+    backend = os.getenv("EMBEDDINGS_BACKEND", "hashing")
+
+    if backend == "openai":
+        from langchain_openai import OpenAIEmbeddings
+
+        return OpenAIEmbeddings(
+            model=os.getenv("EMBEDDINGS_MODEL", "text-embedding-3-small")
+        )
+
+    # Deferred like the OpenAI model: numpy + langchain_core are slow to
+    # import, and only graphs that embed something need them
+    from common.hashing_embeddings import HashingEmbeddings
+
+    return HashingEmbeddings(dim=int(os.getenv("EMBEDDINGS_DIM", "512")))
+
+
+def __getattr__(name: str):
+    # `from common.embeddings import HashingEmbeddings` still works
+    if name == "HashingEmbeddings":
+        from common.hashing_embeddings import HashingEmbeddings
+
+        return HashingEmbeddings
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,103 @@
+import asyncio
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import TYPE_CHECKING, List
+
+from common.verdicts import aask_yes_no, ask_yes_no
+
+if TYPE_CHECKING:
+    from langchain_core.documents import Document
+
+GRADING_PROMPT = (
+    "Determine if the following document is relevant "
+    "to answering the question.\n\n"
+    "Question: {question}\n\n"
+    "Document:\n{document}\n\n"
+    "Respond with YES or NO."
+)
+
+
+# -----------------------------
+# 1. Single-document grader
+# -----------------------------
+def is_relevant(llm, question: str, doc: "Document") -> bool:
+    prompt = GRADING_PROMPT.format(question=question, document=doc.page_content)
+    return ask_yes_no(llm, prompt)
+
+
+async def ais_relevant(llm, question: str, doc: "Document") -> bool:
+    prompt = GRADING_PROMPT.format(question=question, document=doc.page_content)
+    return await aask_yes_no(llm, prompt)
+
+
+# -----------------------------
+# 2. Concurrent fan-out with short-circuit
+# -----------------------------
+def grade_documents_concurrently(
+    llm,
+    question: str,
+    docs: List["Document"],
+    max_concurrency: int = 4,
+    min_relevant: int | None = None,
+) -> List["Document"]:
+    """Grade each document in its own LLM call and keep the relevant ones.
+
+    At most ``max_concurrency`` calls are in flight. Once ``min_relevant``
+    documents have passed, pending calls are cancelled and the relevant
+    documents found so far are returned in their original order.
+    """
+    if not docs:
+        return []
+
+    executor = ThreadPoolExecutor(max_workers=max(1, max_concurrency))
+    futures = {
+        executor.submit(is_relevant, llm, question, doc): index
+        for index, doc in enumerate(docs)
+    }
+    relevant: List[int] = []
+
+    try:
+        pending = set(futures)
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            relevant.extend(futures[f] for f in done if f.result())
+            if min_relevant is not None and len(relevant) >= min_relevant:
+                break
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    return [docs[index] for index in sorted(relevant)]
+
+
+async def agrade_documents_concurrently(
+    llm,
+    question: str,
+    docs: List["Document"],
+    max_concurrency: int = 4,
+    min_relevant: int | None = None,
+) -> List["Document"]:
+    """Async twin of ``grade_documents_concurrently``."""
+    if not docs:
+        return []
+
+    slots = asyncio.Semaphore(max(1, max_concurrency))
+
+    async def grade(index: int) -> tuple[int, bool]:
+        async with slots:
+            return index, await ais_relevant(llm, question, docs[index])
+
+    pending = {asyncio.create_task(grade(index)) for index in range(len(docs))}
+    relevant: List[int] = []
+
+    try:
+        while pending:
+            done, pending = await asyncio.wait(
+                pending, return_when=asyncio.FIRST_COMPLETED
+            )
+            relevant.extend(index for index, ok in (t.result() for t in done) if ok)
+            if min_relevant is not None and len(relevant) >= min_relevant:
+                break
+    finally:
+        for task in pending:
+            task.cancel()
+
+    return [docs[index] for index in sorted(relevant)]
@@ -0,0 +1,34 @@
+import importlib
+from types import ModuleType
+
+# Short name -> module exposing `get_graph()` (and optionally `STREAM_NODES`)
+GRAPH_MODULES = {
+    "day01": "day01_hello_langgraph.hello_langgraph",
+    "day02_state": "day02_graph_state.graph_state_basics",
+    "day02_reducers": "day02_graph_state.reducers_example",
+    "day03": "day03_react_agent.react_agent",
+    "day04": "day04_fault_tolerance.fault_tolerant_agent",
+    "day05": "day05_actor_evaluator.actor_evaluator_agent",
+    "day06": "day06_agentic_rag.agentic_rag",
+    "day07": "day07_reflection_self_rag.self_reflective_rag",
+}
+
+
+def load_graph_module(name: str) -> ModuleType:
+    if name not in GRAPH_MODULES:
+        raise KeyError(f"unknown graph {name!r}; choose from {sorted(GRAPH_MODULES)}")
+    return importlib.import_module(GRAPH_MODULES[name])
+
+
+def get_graph(name: str):
+    """The compiled graph for ``name``, built on first use."""
+    return load_graph_module(name).get_graph()
+
+
+def input_state(data: dict) -> dict:
+    """Initial state from JSON: ``messages`` dicts become LangChain messages."""
+    if isinstance(data.get("messages"), list):
+        from langchain_core.messages import convert_to_messages
+
+        return {**data, "messages": convert_to_messages(data["messages"])}
+    return data
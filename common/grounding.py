@@ -0,0 +1,266 @@
+import asyncio
+import re
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Iterable, List, Sequence
+
+from common.embeddings import tokenize
+from common.verdicts import aask_yes_no, ask_yes_no
+
+if TYPE_CHECKING:
+    from langchain_core.documents import Document
+
+# Share of a sentence's content words that must appear in the context
+SUPPORTED_OVERLAP = 0.8
+UNSUPPORTED_OVERLAP = 0.1
+# Sentences shorter than this are never rejected on overlap alone
+MIN_CONTENT_WORDS = 3
+
+SENTENCE_PROMPT = (
+    "Is the following sentence fully supported by the context?\n\n"
+    "Context:\n{context}\n\n"
+    "Sentence:\n{sentence}\n\n"
+    "Respond with YES or NO."
+)
+
+STOPWORDS = frozenset(
+    "a an and are as at be been but by can do does for from has have how if in "
+    "into is it its may more most not of on or our so such than that the their "
+    "them then there these they this to was were what when which while who why "
+    "will with would you your".split()
+)
+
+SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+
+
+@dataclass
+class GroundedAnswer:
+    answer: str
+    grounded: bool
+    # Generation was stopped at the first unsupported sentence
+    aborted: bool = False
+    unsupported: List[str] = field(default_factory=list)
+    llm_checks: int = 0
+
+
+# -----------------------------
+# 1. Sentence splitting
+# -----------------------------
+def split_sentences(text: str) -> List[str]:
+    return [s.strip() for s in SENTENCE_END.split(text) if s.strip()]
+
+
+class SentenceBuffer:
+    """Turn a token stream into complete sentences as soon as they end."""
+
+    def __init__(self):
+        self._pending = ""
+
+    def feed(self, chunk: str) -> List[str]:
+        self._pending += chunk
+        parts = SENTENCE_END.split(self._pending)
+        # The last part may still be growing
+        self._pending = parts.pop()
+        return [s.strip() for s in parts if s.strip()]
+
+    def flush(self) -> List[str]:
+        rest, self._pending = self._pending.strip(), ""
+        return [rest] if rest else []
+
+
+# -----------------------------
+# 2. Local lexical-overlap check
+# -----------------------------
+def content_words(text: str) -> List[str]:
+    # Crude plural folding keeps "agents" and "agent" together
+    return [
+        token[:-1] if len(token) > 3 and token.endswith("s") else token
+        for token in tokenize(text)
+        if token not in STOPWORDS
+    ]
+
+
+def vocabulary(texts: Iterable[str]) -> set[str]:
+    return {word for text in texts for word in content_words(text)}
+
+
+def lexical_overlap(sentence: str, vocab: set[str]) -> float:
+    words = content_words(sentence)
+    if not words:
+        return 1.0
+    return sum(word in vocab for word in words) / len(words)
+
+
+def lexical_grounding(sentence: str, vocab: set[str]) -> bool | None:
+    """``True``/``False`` when the overlap is clear-cut, ``None`` otherwise."""
+    overlap = lexical_overlap(sentence, vocab)
+    if overlap >= SUPPORTED_OVERLAP:
+        return True
+    if (
+        overlap < UNSUPPORTED_OVERLAP
+        and len(content_words(sentence)) >= MIN_CONTENT_WORDS
+    ):
+        return False
+    return None
+
+
+def answer_grounding(answer: str, documents: Sequence["Document"]) -> bool | None:
+    """Settle a whole answer locally when every sentence is clear-cut."""
+    vocab = vocabulary(doc.page_content for doc in documents)
+    verdicts = [lexical_grounding(s, vocab) for s in split_sentences(answer)]
+
+    if any(verdict is False for verdict in verdicts):
+        return False
+    if all(verdicts):
+        return True
+    return None
+
+
+# -----------------------------
+# 3. Single-sentence LLM check
+# -----------------------------
+def is_supported(llm, sentence: str, context: str) -> bool:
+    prompt = SENTENCE_PROMPT.format(context=context, sentence=sentence)
+    return ask_yes_no(llm, prompt)
+
+
+async def ais_supported(llm, sentence: str, context: str) -> bool:
+    prompt = SENTENCE_PROMPT.format(context=context, sentence=sentence)
+    return await aask_yes_no(llm, prompt)
+
+
+# -----------------------------
+# 4. Generation with overlapped verification
+# -----------------------------
+def speculative_generate(
+    llm,
+    prompt: str,
+    documents: Sequence["Document"],
+    verifier=None,
+    abort_early: bool = True,
+    max_concurrency: int = 4,
+) -> GroundedAnswer:
+    """Stream an answer and verify each sentence while the rest is generated.
+
+    Clearly supported sentences are accepted locally; ambiguous ones are
+    checked by ``verifier`` (default ``llm``) in the background. With
+    ``abort_early`` the stream is closed at the first unsupported sentence.
+    """
+    verifier = verifier or llm
+    context = "\n".join(doc.page_content for doc in documents)
+    vocab = vocabulary([context])
+    buffer = SentenceBuffer()
+    result = GroundedAnswer(answer="", grounded=False)
+    parts: List[str] = []
+    checks = {}
+
+    executor = ThreadPoolExecutor(max_workers=max(1, max_concurrency))
+
+    def settle(sentence: str) -> None:
+        verdict = lexical_grounding(sentence, vocab)
+        if verdict is None:
+            future = executor.submit(is_supported, verifier, sentence, context)
+            checks[future] = sentence
+            result.llm_checks += 1
+        elif not verdict:
+            result.unsupported.append(sentence)
+
+    def collect(done) -> None:
+        for future in done:
+            sentence = checks.pop(future)
+            if not future.result():
+                result.unsupported.append(sentence)
+
+    try:
+        stream = llm.stream(prompt)
+        try:
+            for chunk in stream:
+                parts.append(chunk.content)
+                for sentence in buffer.feed(chunk.content):
+                    settle(sentence)
+                collect([future for future in checks if future.done()])
+                if abort_early and result.unsupported:
+                    result.aborted = True
+                    break
+        finally:
+            stream.close()
+
+        if not result.aborted:
+            for sentence in buffer.flush():
+                settle(sentence)
+            while checks and not (abort_early and result.unsupported):
+                done, _ = wait(list(checks), return_when=FIRST_COMPLETED)
+                collect(done)
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    result.answer = "".join(parts)
+    result.grounded = not result.unsupported and not checks
+    return result
+
+
+async def aspeculative_generate(
+    llm,
+    prompt: str,
+    documents: Sequence["Document"],
+    verifier=None,
+    abort_early: bool = True,
+    max_concurrency: int = 4,
+) -> GroundedAnswer:
+    """Async twin of ``speculative_generate``."""
+    verifier = verifier or llm
+    context = "\n".join(doc.page_content for doc in documents)
+    vocab = vocabulary([context])
+    buffer = SentenceBuffer()
+    result = GroundedAnswer(answer="", grounded=False)
+    parts: List[str] = []
+    checks = {}
+    slots = asyncio.Semaphore(max(1, max_concurrency))
+
+    async def check(sentence: str) -> bool:
+        async with slots:
+            return await ais_supported(verifier, sentence, context)
+
+    def settle(sentence: str) -> None:
+        verdict = lexical_grounding(sentence, vocab)
+        if verdict is None:
+            checks[asyncio.create_task(check(sentence))] = sentence
+            result.llm_checks += 1
+        elif not verdict:
+            result.unsupported.append(sentence)
+
+    def collect(done) -> None:
+        for task in done:
+            sentence = checks.pop(task)
+            if not task.result():
+                result.unsupported.append(sentence)
+
+    try:
+        stream = llm.astream(prompt)
+        try:
+            async for chunk in stream:
+                parts.append(chunk.content)
+                for sentence in buffer.feed(chunk.content):
+                    settle(sentence)
+                collect([task for task in checks if task.done()])
+                if abort_early and result.unsupported:
+                    result.aborted = True
+                    break
+        finally:
+            await stream.aclose()
+
+        if not result.aborted:
+            for sentence in buffer.flush():
+                settle(sentence)
+            while checks and not (abort_early and result.unsupported):
+                done, _ = await asyncio.wait(
+                    list(checks), return_when=asyncio.FIRST_COMPLETED
+                )
+                collect(done)
+    finally:
+        for task in checks:
+            task.cancel()
+
+    result.answer = "".join(parts)
+    result.grounded = not result.unsupported and not checks
+    return result
@@ -0,0 +1,300 @@
+"""Hybrid retrieval: BM25 + vector search, fused by reciprocal rank.
+
+Embeddings miss exact tokens (error codes, product names) that keyword
+search gets right, and the other way round for paraphrases.
+``hybrid_search`` runs both over the same Chroma collection, fuses the
+two rankings with reciprocal rank fusion and, when a cross-encoder is
+configured, reranks the fused top ``RERANK_CANDIDATES`` in one batched
+forward pass. Each retriever then returns at least ``RERANK_CANDIDATES``
+hits, so the reranker gets a full pool.
+
+    HYBRID_CANDIDATES=20        hits taken from each retriever
+    RERANK_CANDIDATES=50        fused hits reranked (with RERANK_MODEL)
+    RERANK_MODEL=cross-encoder/ms-marco-MiniLM-L-6-v2
+                                needs `pip install sentence-transformers`
+
+The BM25 index lives in process memory, with each chunk's metadata, so
+a Chroma ``where`` filter is applied to keyword hits without querying
+the collection. It is built from the collection on first use; chunks
+added through ``vector_store.add_documents`` are indexed as they are
+upserted, and chunks added by another process are picked up from the
+tail of the collection when its size grows. Only a shrinking collection
+triggers a full rebuild.
+"""
+
+import heapq
+import math
+import os
+import threading
+from collections import Counter, defaultdict
+from functools import lru_cache
+from typing import TYPE_CHECKING, Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from common import vector_store
+from common.embeddings import tokenize
+
+if TYPE_CHECKING:
+    from langchain_core.documents import Document
+
+CANDIDATES = int(os.getenv("HYBRID_CANDIDATES", "20"))
+RERANK_MODEL = os.getenv("RERANK_MODEL") or None
+RERANK_CANDIDATES = int(os.getenv("RERANK_CANDIDATES", "50"))
+# Standard RRF constant; dampens the weight of the very top ranks
+RRF_K = 60
+# Page size when reading the collection into the index
+SCAN_BATCH_SIZE = 5000
+
+
+# -----------------------------
+# 1. Metadata filters
+# -----------------------------
+def _compare(op: str, value: Any, target: Any) -> bool:
+    if op == "$eq":
+        return value == target
+    if op == "$ne":
+        return value != target
+    if op == "$in":
+        return value in target
+    if op == "$nin":
+        return value not in target
+    if op in ("$gt", "$gte", "$lt", "$lte"):
+        # Chroma only orders numbers
+        if not all(
+            isinstance(v, (int, float)) and not isinstance(v, bool)
+            for v in (value, target)
+        ):
+            return False
+        if op == "$gt":
+            return value > target
+        if op == "$gte":
+            return value >= target
+        if op == "$lt":
+            return value < target
+        return value <= target
+    raise ValueError(f"unsupported where operator {op!r}")
+
+
+def matches(metadata: Optional[dict], where: dict) -> bool:
+    """Evaluate a Chroma metadata ``where`` filter against one chunk.
+
+    Like Chroma, a condition on a key the chunk does not have is false.
+    """
+    metadata = metadata or {}
+    for key, condition in where.items():
+        if key == "$and":
+            if not all(matches(metadata, clause) for clause in condition):
+                return False
+        elif key == "$or":
+            if not any(matches(metadata, clause) for clause in condition):
+                return False
+        elif key not in metadata:
+            return False
+        elif isinstance(condition, dict):
+            if not all(
+                _compare(op, metadata[key], target) for op, target in condition.items()
+            ):
+                return False
+        elif metadata[key] != condition:
+            return False
+    return True
+
+
+# -----------------------------
+# 2. In-process BM25 index
+# -----------------------------
+class BM25Index:
+    """Inverted index with Okapi BM25 scoring."""
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        # term -> {doc id: term frequency}
+        self.postings: Dict[str, Dict[str, int]] = defaultdict(dict)
+        self.lengths: Dict[str, int] = {}
+        self.metadata: Dict[str, Optional[dict]] = {}
+        self._total_length = 0
+
+    def __len__(self) -> int:
+        return len(self.lengths)
+
+    def add(self, doc_id: str, text: str, metadata: Optional[dict] = None) -> None:
+        if doc_id in self.lengths:
+            return
+        self.metadata[doc_id] = metadata
+        terms = Counter(tokenize(text))
+        for term, tf in terms.items():
+            self.postings[term][doc_id] = tf
+        length = sum(terms.values())
+        self.lengths[doc_id] = length
+        self._total_length += length
+
+    def idf(self, term: str) -> float:
+        df = len(self.postings.get(term, ()))
+        return math.log(1 + (len(self) - df + 0.5) / (df + 0.5))
+
+    def search(
+        self, query: str, k: int, where: Optional[dict] = None
+    ) -> List[Tuple[str, float]]:
+        """Top ``k`` ``(doc id, score)``, only chunks matching ``where``."""
+        if not self.lengths:
+            return []
+        avg_length = self._total_length / len(self)
+        scores: Dict[str, float] = defaultdict(float)
+        # Filter verdicts, evaluated once per chunk that has a query term
+        allowed: Dict[str, bool] = {}
+
+        for term in set(tokenize(query)):
+            postings = self.postings.get(term)
+            if not postings:
+                continue
+            idf = self.idf(term)
+            for doc_id, tf in postings.items():
+                if where:
+                    if doc_id not in allowed:
+                        allowed[doc_id] = matches(self.metadata[doc_id], where)
+                    if not allowed[doc_id]:
+                        continue
+                norm = self.k1 * (
+                    1 - self.b + self.b * self.lengths[doc_id] / avg_length
+                )
+                scores[doc_id] += idf * tf * (self.k1 + 1) / (tf + norm)
+
+        return heapq.nlargest(k, scores.items(), key=lambda item: item[1])
+
+
+_indexes: Dict[int, BM25Index] = {}
+_index_lock = threading.Lock()
+
+
+def _scan(collection, offset: int = 0) -> Iterable[Tuple[str, str, dict]]:
+    while True:
+        page = collection.get(
+            include=["documents", "metadatas"], limit=SCAN_BATCH_SIZE, offset=offset
+        )
+        if not page["ids"]:
+            return
+        yield from zip(page["ids"], page["documents"], page["metadatas"])
+        offset += len(page["ids"])
+
+
+def _fill(index: BM25Index, collection, offset: int = 0) -> BM25Index:
+    for doc_id, text, metadata in _scan(collection, offset):
+        index.add(doc_id, text or "", metadata)
+    return index
+
+
+def get_index(collection=None, count: Optional[int] = None) -> BM25Index:
+    """BM25 index over ``collection``, caught up with its current size."""
+    collection = collection or vector_store.get_collection()
+    if count is None:
+        count = collection.count()
+    with _index_lock:
+        index = _indexes.get(id(collection))
+        if index is not None and len(index) < count:
+            # Grown elsewhere: Chroma pages in insertion order, so the new
+            # chunks are at the tail
+            _fill(index, collection, offset=len(index))
+        if index is None or len(index) != count:
+            index = _indexes[id(collection)] = _fill(BM25Index(), collection)
+        return index
+
+
+def index_documents(collection, ids: Sequence[str], docs: Sequence["Document"]) -> None:
+    """Add freshly upserted chunks to ``collection``'s index, if built."""
+    with _index_lock:
+        index = _indexes.get(id(collection))
+        if index is None:
+            return
+        for doc_id, doc in zip(ids, docs):
+            index.add(doc_id, doc.page_content, doc.metadata or None)
+
+
+# -----------------------------
+# 3. Reciprocal rank fusion
+# -----------------------------
+def reciprocal_rank_fusion(
+    rankings: Sequence[Sequence[str]], k: int = RRF_K
+) -> List[Tuple[str, float]]:
+    """Fuse id rankings: ``score = sum(1 / (k + rank))``, best first."""
+    scores: Dict[str, float] = defaultdict(float)
+    for ranking in rankings:
+        for rank, doc_id in enumerate(ranking, start=1):
+            scores[doc_id] += 1 / (k + rank)
+    return sorted(scores.items(), key=lambda item: item[1], reverse=True)
+
+
+# -----------------------------
+# 4. Optional cross-encoder rerank
+# -----------------------------
+@lru_cache(maxsize=None)
+def get_reranker(model: str):
+    try:
+        from sentence_transformers import CrossEncoder
+    except ImportError as e:
+        raise ImportError(
+            f"RERANK_MODEL={model} needs `pip install sentence-transformers`"
+        ) from e
+    return CrossEncoder(model)
+
+
+def rerank(query: str, docs: List["Document"], model: str) -> List["Document"]:
+    """Order ``docs`` by cross-encoder relevance, all pairs in one batch."""
+    if len(docs) < 2:
+        return docs
+    scores = get_reranker(model).predict(
+        [(query, doc.page_content) for doc in docs], batch_size=len(docs)
+    )
+    order = sorted(range(len(docs)), key=lambda i: scores[i], reverse=True)
+    return [docs[i] for i in order]
+
+
+# -----------------------------
+# 5. Hybrid search
+# -----------------------------
+def _fetch(collection, ids: List[str]) -> Dict[str, "Document"]:
+    from langchain_core.documents import Document
+
+    if not ids:
+        return {}
+    found = collection.get(ids=ids, include=["documents", "metadatas"])
+    return {
+        doc_id: Document(id=doc_id, page_content=text, metadata=metadata or {})
+        for doc_id, text, metadata in zip(
+            found["ids"], found["documents"], found["metadatas"]
+        )
+    }
+
+
+def hybrid_search(
+    query: str,
+    k: int = 4,
+    where: Optional[dict] = None,
+    candidates: int = CANDIDATES,
+    rerank_model: Optional[str] = RERANK_MODEL,
+    collection=None,
+) -> List["Document"]:
+    """Top ``k`` documents for ``query`` by BM25 + vector RRF (+ rerank)."""
+    collection = collection or vector_store.get_collection()
+    count = collection.count()
+    if count == 0:
+        return []
+    # The reranker sees the fused top RERANK_CANDIDATES, so each retriever
+    # must return at least that many or the cross-encoder gets a short pool
+    pool = max(k, candidates, RERANK_CANDIDATES if rerank_model else 0)
+    pool = min(pool, count)
+
+    vector_hits = vector_store.similarity_search(query, pool, where, collection)
+    keyword_hits = get_index(collection, count).search(query, pool, where)
+
+    fused = reciprocal_rank_fusion(
+        [[doc.id for doc in vector_hits], [doc_id for doc_id, _ in keyword_hits]]
+    )
+    top = [doc_id for doc_id, _ in fused[: RERANK_CANDIDATES if rerank_model else k]]
+
+    docs = {doc.id: doc for doc in vector_hits}
+    docs.update(_fetch(collection, [doc_id for doc_id in top if doc_id not in docs]))
+    ranked = [docs[doc_id] for doc_id in top if doc_id in docs]
+
+    if rerank_model:
+        ranked = rerank(query, ranked, rerank_model)
+    return ranked[:k]
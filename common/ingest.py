@@ -0,0 +1,232 @@
+"""Stream a directory of text files into the vector store.
+
+    python -m common.ingest ./corpus --batch-size 256 --workers 4
+
+Files are read lazily, chunked and embedded in a process pool, and
+upserted in fixed-size batches. Chunks are keyed by content hash, so
+re-running on an unchanged corpus only costs the id lookups.
+"""
+
+import argparse
+import os
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from dataclasses import dataclass, field
+from itertools import batched
+from pathlib import Path
+from typing import Callable, Iterable, Iterator, List, Sequence, Tuple
+
+from common import vector_store
+from common.embeddings import get_embeddings
+
+DEFAULT_EXTENSIONS = (".md", ".txt", ".rst")
+CHUNK_SIZE = 1000
+CHUNK_OVERLAP = 150
+BATCH_SIZE = 256
+
+Chunk = Tuple[str, str, dict]  # (id, text, metadata)
+
+
+@dataclass
+class IngestStats:
+    files: int = 0
+    chunks: int = 0
+    skipped: int = 0
+    upserted: int = 0
+    errors: List[str] = field(default_factory=list)
+
+
+# -----------------------------
+# 1. Stream files
+# -----------------------------
+def iter_files(
+    root: str | Path, extensions: Sequence[str] = DEFAULT_EXTENSIONS
+) -> Iterator[Path]:
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames[:] = sorted(d for d in dirnames if not d.startswith("."))
+        for filename in sorted(filenames):
+            if filename.endswith(tuple(extensions)):
+                yield Path(dirpath) / filename
+
+
+# -----------------------------
+# 2. Chunking (runs in worker processes)
+# -----------------------------
+def split_text(
+    text: str, chunk_size: int = CHUNK_SIZE, overlap: int = CHUNK_OVERLAP
+) -> List[str]:
+    """Split on paragraph/line/word boundaries into overlapping windows."""
+    chunks = []
+    start = 0
+    text = text.strip()
+
+    while start < len(text):
+        end = min(start + chunk_size, len(text))
+        if end < len(text):
+            for separator in ("\n\n", "\n", " "):
+                cut = text.rfind(separator, start + overlap + 1, end)
+                if cut != -1:
+                    end = cut
+                    break
+        chunk = text[start:end].strip()
+        if chunk:
+            chunks.append(chunk)
+        if end >= len(text):
+            break
+        next_start = end - overlap
+        # Begin the overlap on a word boundary
+        space = text.find(" ", next_start, end)
+        if space != -1:
+            next_start = space + 1
+        start = max(next_start, start + 1)
+
+    return chunks
+
+
+def chunk_file(path: str, chunk_size: int, overlap: int) -> List[Chunk]:
+    text = Path(path).read_text(encoding="utf-8", errors="replace")
+    return [
+        (vector_store.content_id(chunk), chunk, {"source": path, "chunk": index})
+        for index, chunk in enumerate(split_text(text, chunk_size, overlap))
+    ]
+
+
+def embed_chunks(chunks: List[Chunk]) -> List[List[float]]:
+    return get_embeddings().embed_documents([text for _, text, _ in chunks])
+
+
+# -----------------------------
+# 3. Bounded parallel map
+# -----------------------------
+def bounded_map(
+    executor: ProcessPoolExecutor,
+    fn: Callable,
+    items: Iterable[tuple],
+    max_in_flight: int,
+) -> Iterator[Tuple[tuple, Future]]:
+    """Like ``executor.map`` but never holds more than ``max_in_flight``
+    pending tasks, so an unbounded input stream stays in bounded memory.
+    Each item is an argument tuple; yields ``(args, future)`` in order.
+    """
+    pending: deque[Tuple[tuple, Future]] = deque()
+
+    for args in items:
+        pending.append((args, executor.submit(fn, *args)))
+        if len(pending) >= max_in_flight:
+            yield pending.popleft()
+
+    yield from pending
+
+
+# -----------------------------
+# 4. Pipeline
+# -----------------------------
+def _new_chunks(chunks: Iterable[Chunk], collection) -> List[Chunk]:
+    unique = {chunk[0]: chunk for chunk in chunks}
+    existing = set(collection.get(ids=list(unique), include=[])["ids"])
+    return [chunk for key, chunk in unique.items() if key not in existing]
+
+
+def _iter_chunks(
+    executor,
+    paths: Iterable[Path],
+    chunk_size: int,
+    overlap: int,
+    stats: IngestStats,
+    max_in_flight: int,
+) -> Iterator[Chunk]:
+    work = ((str(path), chunk_size, overlap) for path in paths)
+    for (path, *_), future in bounded_map(executor, chunk_file, work, max_in_flight):
+        try:
+            chunks = future.result()
+        except OSError as e:
+            stats.errors.append(f"{path}: {e}")
+            continue
+        stats.files += 1
+        yield from chunks
+
+
+def ingest_directory(
+    root: str | Path,
+    collection=None,
+    extensions: Sequence[str] = DEFAULT_EXTENSIONS,
+    batch_size: int = BATCH_SIZE,
+    chunk_size: int = CHUNK_SIZE,
+    overlap: int = CHUNK_OVERLAP,
+    workers: int | None = None,
+) -> IngestStats:
+    """Chunk, dedup, embed and upsert every matching file under ``root``."""
+    collection = collection or vector_store.get_collection()
+    stats = IngestStats()
+    workers = workers or os.cpu_count() or 1
+    max_in_flight = workers * 2
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        chunks = _iter_chunks(
+            executor,
+            iter_files(root, extensions),
+            chunk_size,
+            overlap,
+            stats,
+            max_in_flight,
+        )
+
+        def new_batches():
+            for batch in batched(chunks, batch_size):
+                stats.chunks += len(batch)
+                fresh = _new_chunks(batch, collection)
+                stats.skipped += len(batch) - len(fresh)
+                if fresh:
+                    yield (fresh,)
+
+        embedded = bounded_map(executor, embed_chunks, new_batches(), max_in_flight)
+        for (batch,), future in embedded:
+            ids, texts, metadatas = zip(*batch)
+            collection.upsert(
+                ids=list(ids),
+                embeddings=future.result(),
+                documents=list(texts),
+                metadatas=list(metadatas),
+            )
+            stats.upserted += len(batch)
+
+    return stats
+
+
+# -----------------------------
+# 5. CLI
+# -----------------------------
+def main(argv: Sequence[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("root", help="directory to ingest")
+    parser.add_argument("--collection", default=vector_store.COLLECTION_NAME)
+    parser.add_argument("--path", default=vector_store.CHROMA_PATH)
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    parser.add_argument("--overlap", type=int, default=CHUNK_OVERLAP)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument(
+        "--ext", action="append", help="file extension to include (repeatable)"
+    )
+    args = parser.parse_args(argv)
+
+    stats = ingest_directory(
+        args.root,
+        collection=vector_store.get_collection(args.collection, args.path),
+        extensions=tuple(args.ext) if args.ext else DEFAULT_EXTENSIONS,
+        batch_size=args.batch_size,
+        chunk_size=args.chunk_size,
+        overlap=args.overlap,
+        workers=args.workers,
+    )
+
+    print(
+        f"files={stats.files} chunks={stats.chunks} "
+        f"upserted={stats.upserted} skipped={stats.skipped} errors={len(stats.errors)}"
+    )
+    for error in stats.errors:
+        print(f"  ! {error}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+"""One connection pool per endpoint, shared by every chat model.
+
+``get_llm`` hands out role-specific ``ChatOpenAI`` views (model,
+temperature) that all reuse the same httpx clients for their endpoint,
+so hosting several graphs in one process costs one pool and one set of
+TLS handshakes per provider.
+
+``LazyLLM`` defers all of that (and the slow ``langchain_openai``
+import) until a model is actually called, so importing a graph module
+stays cheap.
+"""
+
+import os
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    import httpx
+    from langchain_openai import ChatOpenAI
+
+
+@dataclass(frozen=True)
+class Endpoint:
+    base_url: str
+    api_key_env: str
+    default_model: str
+
+
+ENDPOINTS = {
+    "openrouter": Endpoint(
+        base_url="https://openrouter.ai/api/v1",
+        api_key_env="OPENROUTER_API_KEY",
+        default_model="mistralai/devstral-2512:free",
+    ),
+    "gemini": Endpoint(
+        base_url="https://generativelanguage.googleapis.com/v1beta/openai/",
+        api_key_env="GEMINI_API_KEY",
+        default_model="gemini-2.5-flash",
+    ),
+}
+
+# Pool sizing, overridable per deployment
+MAX_CONNECTIONS = int(os.getenv("LLM_MAX_CONNECTIONS", "100"))
+MAX_KEEPALIVE = int(os.getenv("LLM_MAX_KEEPALIVE", "20"))
+KEEPALIVE_EXPIRY = float(os.getenv("LLM_KEEPALIVE_EXPIRY", "30"))
+REQUEST_TIMEOUT = float(os.getenv("LLM_REQUEST_TIMEOUT", "60"))
+# Requires the optional `h2` package
+HTTP2 = os.getenv("LLM_HTTP2", "0") == "1"
+
+
+def base_url(endpoint: str) -> str:
+    # LLM_BASE_URL points every endpoint at one server, e.g. the local
+    # stub in benchmarks.fake_llm; read per call so tests can set it late
+    return os.getenv("LLM_BASE_URL") or ENDPOINTS[endpoint].base_url
+
+
+# -----------------------------
+# 1. Pooled HTTP clients
+# -----------------------------
+def _client_options() -> dict:
+    import httpx
+
+    return {
+        "limits": httpx.Limits(
+            max_connections=MAX_CONNECTIONS,
+            max_keepalive_connections=MAX_KEEPALIVE,
+            keepalive_expiry=KEEPALIVE_EXPIRY,
+        ),
+        "timeout": httpx.Timeout(REQUEST_TIMEOUT),
+        "http2": HTTP2,
+    }
+
+
+@lru_cache(maxsize=None)
+def get_http_client(endpoint: str) -> "httpx.Client":
+    import httpx
+
+    return httpx.Client(**_client_options())
+
+
+@lru_cache(maxsize=None)
+def get_async_http_client(endpoint: str) -> "httpx.AsyncClient":
+    import httpx
+
+    return httpx.AsyncClient(**_client_options())
+
+
+# -----------------------------
+# 2. Role-specific model views
+# -----------------------------
+@lru_cache(maxsize=None)
+def get_llm(
+    endpoint: str = "openrouter",
+    model: str | None = None,
+    temperature: float = 0,
+    cached: bool | None = None,
+    max_retries: int | None = None,
+) -> "ChatOpenAI":
+    """Return a chat model for ``endpoint`` sharing that endpoint's pool.
+
+    Responses are cached by default only at ``temperature=0``; sampled
+    roles are expected to produce a different answer on each call. Pass
+    ``max_retries=0`` when the graph owns retries (see ``common.retry``).
+    """
+    # Deferred: openai + langchain_openai are the slowest imports in the repo
+    from langchain_openai import ChatOpenAI
+
+    from common.llm_cache import get_llm_cache
+
+    config = ENDPOINTS[endpoint]
+    if cached is None:
+        cached = temperature == 0
+
+    return ChatOpenAI(
+        model=model or config.default_model,
+        base_url=base_url(endpoint),
+        api_key=os.getenv(config.api_key_env),
+        temperature=temperature,
+        http_client=get_http_client(endpoint),
+        http_async_client=get_async_http_client(endpoint),
+        cache=get_llm_cache() if cached else False,
+        max_retries=max_retries,
+    )
+
+
+class LazyLLM:
+    """Stand-in for ``get_llm(...)`` that builds the model on first use.
+
+    Attribute access (``invoke``, ``bind_tools``, ...) is forwarded to the
+    real model, so module-level ``llm = LazyLLM()`` reads like before.
+    """
+
+    def __init__(self, *args: Any, **kwargs: Any):
+        self._args = args
+        self._kwargs = kwargs
+
+    def resolve(self) -> "ChatOpenAI":
+        return get_llm(*self._args, **self._kwargs)
+
+    # Defined explicitly so that inspecting a node (RunnableLambda looks
+    # up ``llm.invoke`` while compiling a graph) does not build the model
+    def invoke(self, *args: Any, **kwargs: Any) -> Any:
+        return self.resolve().invoke(*args, **kwargs)
+
+    async def ainvoke(self, *args: Any, **kwargs: Any) -> Any:
+        return await self.resolve().ainvoke(*args, **kwargs)
+
+    def stream(self, *args: Any, **kwargs: Any) -> Any:
+        return self.resolve().stream(*args, **kwargs)
+
+    def astream(self, *args: Any, **kwargs: Any) -> Any:
+        return self.resolve().astream(*args, **kwargs)
+
+    def __getattr__(self, name: str) -> Any:
+        # Probes like ``__self__`` or ``__deepcopy__`` must not build it either
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return getattr(self.resolve(), name)
+
+    def __repr__(self) -> str:
+        args = [repr(a) for a in self._args]
+        args += [f"{k}={v!r}" for k, v in self._kwargs.items()]
+        return f"LazyLLM({', '.join(args)})"
+
+
+def resolve_llm(llm):
+    """The real model behind ``llm`` (itself unless it is a ``LazyLLM``)."""
+    return llm.resolve() if isinstance(llm, LazyLLM) else llm
@@ -0,0 +1,282 @@
+"""Response cache shared by every chat model in the repo.
+
+Plugs into LangChain's ``BaseCache`` hook, so ``llm.invoke`` checks it
+transparently. Entries are keyed on the model configuration string
+(model, temperature, bound tools, ...) plus the whitespace-normalised
+serialized messages. An optional semantic tier reuses a response when a
+new prompt embeds within ``similarity_threshold`` of a cached one.
+
+Configured from the environment:
+
+    LLM_CACHE=0                     disable caching
+    LLM_CACHE_BACKEND=sqlite        persist to LLM_CACHE_PATH
+    LLM_CACHE_TTL=3600              seconds, 0 = never expire
+    LLM_CACHE_SIMILARITY=0.97       enable the semantic tier
+"""
+
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Protocol
+
+import numpy as np
+from langchain_core.caches import RETURN_VAL_TYPE, BaseCache
+from langchain_core.load import dumps, loads
+
+from common.embeddings import get_embeddings
+
+MAX_ENTRIES = 10_000
+WHITESPACE = re.compile(r"\s+")
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    semantic_hits: int = 0
+    misses: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.semantic_hits + self.misses
+        return (self.hits + self.semantic_hits) / total if total else 0.0
+
+
+# -----------------------------
+# 1. Storage backends (LRU + TTL)
+# -----------------------------
+class CacheBackend(Protocol):
+    def get(self, key: str) -> Optional[RETURN_VAL_TYPE]: ...
+
+    def set(self, key: str, value: RETURN_VAL_TYPE) -> None: ...
+
+    def clear(self) -> None: ...
+
+
+class InMemoryBackend:
+    def __init__(self, max_entries: int = MAX_ENTRIES, ttl: float = 0):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: OrderedDict[str, tuple[float, RETURN_VAL_TYPE]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[RETURN_VAL_TYPE]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            stored_at, value = entry
+            if self.ttl and time.monotonic() - stored_at > self.ttl:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: RETURN_VAL_TYPE) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+class SQLiteBackend:
+    def __init__(
+        self,
+        path: str,
+        max_entries: int = MAX_ENTRIES,
+        ttl: float = 0,
+        table: str = "llm_cache",
+    ):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        # Lets other caches (e.g. common.web_search) reuse this backend
+        self.table = table
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            f"CREATE TABLE IF NOT EXISTS {table} ("
+            " key TEXT PRIMARY KEY, value TEXT NOT NULL,"
+            " stored_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+        )
+        self._conn.execute(
+            f"CREATE INDEX IF NOT EXISTS {table}_accessed ON {table} (accessed_at)"
+        )
+        self._conn.commit()
+
+    def get(self, key: str) -> Optional[RETURN_VAL_TYPE]:
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT value, stored_at FROM {self.table} WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            if self.ttl and now - row[1] > self.ttl:
+                self._conn.execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+                self._conn.commit()
+                return None
+            self._conn.execute(
+                f"UPDATE {self.table} SET accessed_at = ? WHERE key = ?", (now, key)
+            )
+            self._conn.commit()
+        return loads(row[0], allowed_objects="core")
+
+    def set(self, key: str, value: RETURN_VAL_TYPE) -> None:
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                f"INSERT OR REPLACE INTO {self.table} VALUES (?, ?, ?, ?)",
+                (key, dumps(value), now, now),
+            )
+            self._conn.execute(
+                f"DELETE FROM {self.table} WHERE key IN ("
+                f" SELECT key FROM {self.table} ORDER BY accessed_at DESC"
+                " LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            )
+            self._conn.commit()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute(f"DELETE FROM {self.table}")
+            self._conn.commit()
+
+
+# -----------------------------
+# 2. Exact + semantic cache
+# -----------------------------
+def normalize_prompt(prompt: str) -> str:
+    return WHITESPACE.sub(" ", prompt).strip()
+
+
+def prompt_text(prompt: str) -> str:
+    """Pull the human-readable message contents out of a serialized prompt."""
+    try:
+        messages = json.loads(prompt)
+    except ValueError:
+        return prompt
+
+    parts = []
+    for message in messages if isinstance(messages, list) else [messages]:
+        content = (
+            message.get("kwargs", {}).get("content", "")
+            if isinstance(message, dict)
+            else ""
+        )
+        parts.append(content if isinstance(content, str) else json.dumps(content))
+    return "\n".join(parts)
+
+
+class ResponseCache(BaseCache):
+    def __init__(
+        self,
+        backend: CacheBackend,
+        similarity_threshold: float | None = None,
+        embeddings=None,
+    ):
+        self.backend = backend
+        self.similarity_threshold = similarity_threshold
+        self.embeddings = embeddings
+        self.stats = CacheStats()
+        # llm_string -> (keys, unit vectors); only populated by this process
+        self._semantic_index: Dict[str, tuple[List[str], List[np.ndarray]]] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(prompt: str, llm_string: str) -> str:
+        raw = f"{llm_string}\x00{normalize_prompt(prompt)}"
+        return hashlib.sha256(raw.encode()).hexdigest()
+
+    def _embed(self, prompt: str) -> np.ndarray:
+        embeddings = self.embeddings or get_embeddings()
+        vec = np.asarray(embeddings.embed_query(prompt_text(prompt)), np.float32)
+        norm = np.linalg.norm(vec)
+        return vec / norm if norm else vec
+
+    def _semantic_lookup(
+        self, prompt: str, llm_string: str
+    ) -> Optional[RETURN_VAL_TYPE]:
+        with self._lock:
+            keys, vectors = self._semantic_index.get(llm_string, ([], []))
+            keys, matrix = list(keys), np.stack(vectors) if vectors else None
+        if matrix is None:
+            return None
+
+        scores = matrix @ self._embed(prompt)
+        best = int(np.argmax(scores))
+        if scores[best] < self.similarity_threshold:
+            return None
+        return self.backend.get(keys[best])
+
+    def lookup(self, prompt: str, llm_string: str) -> Optional[RETURN_VAL_TYPE]:
+        value = self.backend.get(self.key(prompt, llm_string))
+        if value is not None:
+            with self._lock:
+                self.stats.hits += 1
+            return value
+
+        if self.similarity_threshold is not None:
+            value = self._semantic_lookup(prompt, llm_string)
+            if value is not None:
+                with self._lock:
+                    self.stats.semantic_hits += 1
+                return value
+
+        with self._lock:
+            self.stats.misses += 1
+        return None
+
+    def update(self, prompt: str, llm_string: str, return_val: RETURN_VAL_TYPE) -> None:
+        key = self.key(prompt, llm_string)
+        self.backend.set(key, return_val)
+
+        if self.similarity_threshold is not None:
+            vector = self._embed(prompt)
+            with self._lock:
+                keys, vectors = self._semantic_index.setdefault(llm_string, ([], []))
+                keys.append(key)
+                vectors.append(vector)
+                # Keep the index no larger than the backend can hold
+                max_entries = getattr(self.backend, "max_entries", MAX_ENTRIES)
+                del keys[:-max_entries], vectors[:-max_entries]
+
+    def clear(self, **kwargs: Any) -> None:
+        self.backend.clear()
+        with self._lock:
+            self._semantic_index.clear()
+        self.stats = CacheStats()
+
+
+# -----------------------------
+# 3. Process-wide cache
+# -----------------------------
+@lru_cache(maxsize=None)
+def get_llm_cache() -> ResponseCache | None:
+    """Build the shared cache from the environment, or ``None`` if disabled."""
+    if os.getenv("LLM_CACHE", "1") == "0":
+        return None
+
+    ttl = float(os.getenv("LLM_CACHE_TTL", "3600"))
+    max_entries = int(os.getenv("LLM_CACHE_MAX_ENTRIES", str(MAX_ENTRIES)))
+
+    if os.getenv("LLM_CACHE_BACKEND", "memory") == "sqlite":
+        backend = SQLiteBackend(
+            os.getenv("LLM_CACHE_PATH", ".llm_cache.sqlite"), max_entries, ttl
+        )
+    else:
+        backend = InMemoryBackend(max_entries, ttl)
+
+    similarity = os.getenv("LLM_CACHE_SIMILARITY")
+    return ResponseCache(backend, float(similarity) if similarity else None)
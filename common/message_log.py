@@ -0,0 +1,104 @@
+"""Append-only log for graph state with O(1) append.
+
+``operator.add`` and ``state["messages"] + [new]`` copy the whole
+history on every step, so a run of n steps costs O(n^2). An
+``AppendLog`` is an immutable view (buffer, length) over a shared,
+growing buffer: appending to the newest version extends the buffer in
+place and returns a new view, older views keep seeing their own
+prefix. Only appending to an *older* version has to copy.
+
+    class AgentState(TypedDict):
+        messages: Annotated[AppendLog, append_log]
+"""
+
+import threading
+from collections.abc import Iterable, Iterator, Sequence
+from typing import Any, overload
+
+
+class AppendLog(Sequence):
+    __slots__ = ("_buffer", "_length", "_lock")
+
+    def __init__(self, items: Iterable[Any] = ()):
+        self._buffer = list(items)
+        self._length = len(self._buffer)
+        self._lock = threading.Lock()
+
+    @classmethod
+    def _view(cls, buffer: list, length: int, lock: threading.Lock) -> "AppendLog":
+        log = cls.__new__(cls)
+        log._buffer = buffer
+        log._length = length
+        log._lock = lock
+        return log
+
+    def extend(self, items: Iterable[Any]) -> "AppendLog":
+        """Return a new log with ``items`` appended; ``self`` is unchanged."""
+        items = list(items)
+        end = self._length + len(items)
+        with self._lock:
+            if self._length == len(self._buffer):
+                # We are the newest version: share the buffer
+                self._buffer.extend(items)
+                return self._view(self._buffer, end, self._lock)
+            if end <= len(self._buffer) and all(
+                a is b for a, b in zip(self._buffer[self._length : end], items)
+            ):
+                # Same items were already appended from this version (LangGraph
+                # applies writes to a scratch copy for conditional edges first)
+                return self._view(self._buffer, end, self._lock)
+        # Branching from an older version: copy our prefix
+        return AppendLog(self._buffer[: self._length] + items)
+
+    def append(self, item: Any) -> "AppendLog":
+        return self.extend((item,))
+
+    def extends(self, other: "AppendLog") -> bool:
+        """True if ``other`` is an earlier version of this log."""
+        return other._buffer is self._buffer and other._length <= self._length
+
+    def __len__(self) -> int:
+        return self._length
+
+    @overload
+    def __getitem__(self, index: int) -> Any: ...
+
+    @overload
+    def __getitem__(self, index: slice) -> list: ...
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self._buffer[i] for i in range(*index.indices(self._length))]
+        if index < 0:
+            index += self._length
+        if not 0 <= index < self._length:
+            raise IndexError("AppendLog index out of range")
+        return self._buffer[index]
+
+    def __iter__(self) -> Iterator[Any]:
+        for index in range(self._length):
+            yield self._buffer[index]
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, (AppendLog, list, tuple)):
+            return len(self) == len(other) and all(a == b for a, b in zip(self, other))
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return f"AppendLog({list(self)!r})"
+
+    def __reduce__(self):
+        # Pickle/checkpoint only our own prefix, not the shared buffer
+        return AppendLog, (list(self),)
+
+
+# -----------------------------
+# Reducer
+# -----------------------------
+def append_log(left: Sequence | None, right: Any) -> AppendLog:
+    """LangGraph reducer: append one item or a list of items in O(k)."""
+    if not isinstance(left, AppendLog):
+        left = AppendLog(left or ())
+    if isinstance(right, (list, tuple, AppendLog)):
+        return left.extend(right)
+    return left.append(right)
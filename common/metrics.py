@@ -0,0 +1,393 @@
+"""Per-node, per-model instrumentation for every compiled graph.
+
+Each day's ``get_graph()`` wraps its compiled graph in
+``instrument(graph, name)``, which attaches a ``MetricsHandler``
+callback. The handler records:
+
+    graph_run_seconds{graph}                    whole run
+    graph_overhead_seconds{graph}               run time outside model calls
+    graph_node_seconds{graph,node}              each node execution
+    graph_node_visits{graph,node}               executions per run (loops)
+    llm_call_seconds{graph,node,model}          each model call
+    llm_errors_total{graph,node,model}
+    llm_tokens_total{graph,node,model,kind}     prompt / completion
+    llm_cache_requests_total{result}            hit / semantic_hit / miss
+
+``render()`` returns them in the Prometheus text format; ``serve(port)``
+exposes ``/metrics`` from a background thread, and the SSE server and
+``main.py --metrics`` export them too.
+
+    GRAPH_METRICS=0     compile graphs without the handler
+"""
+
+import os
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Sequence, Tuple
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+ENABLED = os.getenv("GRAPH_METRICS", "1") != "0"
+
+SECONDS_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+VISIT_BUCKETS = (1, 2, 3, 4, 5, 10, 20)
+
+_lock = threading.Lock()
+_registry: List["Metric"] = []
+
+
+# -----------------------------
+# 1. Metric types
+# -----------------------------
+class Metric(ABC):
+    kind = "untyped"
+
+    def __init__(self, name: str, help: str, labels: Sequence[str]):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self.series: Dict[Tuple[str, ...], Any] = {}
+        _registry.append(self)
+
+    def _label_text(self, values: Sequence[str], extra: str = "") -> str:
+        pairs = [f'{k}="{_escape(str(v))}"' for k, v in zip(self.labels, values)] + (
+            [extra] if extra else []
+        )
+        return "{" + ",".join(pairs) + "}" if pairs else ""
+
+    @abstractmethod
+    def lines(self) -> List[str]:
+        """Sample lines in the Prometheus text format, without HELP/TYPE."""
+
+
+class CounterMetric(Metric):
+    kind = "counter"
+
+    def inc(self, *labels: str, amount: float = 1) -> None:
+        with _lock:
+            self.series[labels] = self.series.get(labels, 0) + amount
+
+    def lines(self) -> List[str]:
+        return [
+            f"{self.name}{self._label_text(labels)} {value}"
+            for labels, value in sorted(self.series.items())
+        ]
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name, help, labels, buckets: Sequence[float] = SECONDS_BUCKETS):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value: float, *labels: str) -> None:
+        with _lock:
+            # Per-bucket counts, then sum and count
+            series = self.series.setdefault(labels, [0] * len(self.buckets) + [0.0, 0])
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[i] += 1
+                    break
+            series[-2] += value
+            series[-1] += 1
+
+    def lines(self) -> List[str]:
+        out = []
+        for labels, series in sorted(self.series.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets, series):
+                cumulative += count
+                le = self._label_text(labels, f'le="{bound}"')
+                out.append(f"{self.name}_bucket{le} {cumulative}")
+            inf = self._label_text(labels, 'le="+Inf"')
+            out.append(f"{self.name}_bucket{inf} {series[-1]}")
+            out.append(f"{self.name}_sum{self._label_text(labels)} {series[-2]}")
+            out.append(f"{self.name}_count{self._label_text(labels)} {series[-1]}")
+        return out
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+RUN_SECONDS = Histogram("graph_run_seconds", "Wall time of a graph run", ["graph"])
+OVERHEAD_SECONDS = Histogram(
+    "graph_overhead_seconds",
+    "Run wall time not spent waiting on model calls",
+    ["graph"],
+)
+NODE_SECONDS = Histogram(
+    "graph_node_seconds", "Wall time of a node execution", ["graph", "node"]
+)
+NODE_VISITS = Histogram(
+    "graph_node_visits",
+    "Executions of a node within one run",
+    ["graph", "node"],
+    VISIT_BUCKETS,
+)
+LLM_SECONDS = Histogram(
+    "llm_call_seconds", "Wall time of a model call", ["graph", "node", "model"]
+)
+LLM_ERRORS = CounterMetric(
+    "llm_errors_total", "Model calls that raised", ["graph", "node", "model"]
+)
+LLM_TOKENS = CounterMetric(
+    "llm_tokens_total",
+    "Tokens reported by the model",
+    ["graph", "node", "model", "kind"],
+)
+
+
+# -----------------------------
+# 2. Callback handler
+# -----------------------------
+@dataclass
+class _Root:
+    start: float
+    model_seconds: float = 0.0
+    visits: Counter = field(default_factory=Counter)
+
+
+@dataclass
+class _Span:
+    start: float
+    root: UUID | None
+    node: str = ""
+    model: str = ""
+
+
+class MetricsHandler(BaseCallbackHandler):
+    """Turns LangChain run callbacks for one graph into metrics."""
+
+    # Bookkeeping only: run in the caller, never hop to an executor
+    run_inline = True
+
+    def __init__(self, graph: str):
+        self.graph = graph
+        # Callbacks fire concurrently from node worker threads
+        self._lock = threading.Lock()
+        self._roots: Dict[UUID, _Root] = {}
+        # Chain run -> root run, so nested runs find their graph run
+        self._root_of: Dict[UUID, UUID] = {}
+        self._nodes: Dict[UUID, _Span] = {}
+        self._llms: Dict[UUID, _Span] = {}
+
+    # Chains: the graph run itself and one chain per node execution
+    def on_chain_start(
+        self,
+        serialized,
+        inputs,
+        *,
+        run_id: UUID,
+        parent_run_id: UUID | None = None,
+        metadata: Dict[str, Any] | None = None,
+        **kwargs: Any,
+    ) -> None:
+        now = time.perf_counter()
+        node = (metadata or {}).get("langgraph_node")
+        with self._lock:
+            root = self._root_of.get(parent_run_id) if parent_run_id else None
+            if root is None:
+                root = run_id
+                self._roots[run_id] = _Root(now)
+            self._root_of[run_id] = root
+
+            # A node's task runs directly under the graph run; the function
+            # it wraps is a child chain with the same name, not counted twice
+            if node and kwargs.get("name") == node and parent_run_id == root:
+                self._nodes[run_id] = _Span(now, root, node=node)
+
+    # Tools and retrievers only need to be known as part of the run
+    def on_tool_start(
+        self, serialized, input_str, *, run_id: UUID, parent_run_id=None, **kwargs
+    ) -> None:
+        with self._lock:
+            if parent_run_id in self._root_of:
+                self._root_of[run_id] = self._root_of[parent_run_id]
+
+    on_retriever_start = on_tool_start
+
+    def on_tool_end(self, output, *, run_id: UUID, **kwargs: Any) -> None:
+        with self._lock:
+            self._root_of.pop(run_id, None)
+
+    on_tool_error = on_retriever_end = on_retriever_error = on_tool_end
+
+    def on_chain_end(self, outputs, *, run_id: UUID, **kwargs: Any) -> None:
+        self._finish_chain(run_id)
+
+    def on_chain_error(self, error, *, run_id: UUID, **kwargs: Any) -> None:
+        self._finish_chain(run_id)
+
+    def _finish_chain(self, run_id: UUID) -> None:
+        now = time.perf_counter()
+        with self._lock:
+            self._root_of.pop(run_id, None)
+            span = self._nodes.pop(run_id, None)
+            if span is not None and span.root in self._roots:
+                self._roots[span.root].visits[span.node] += 1
+            root = self._roots.pop(run_id, None)
+
+        if span is not None:
+            NODE_SECONDS.observe(now - span.start, self.graph, span.node)
+        if root is not None:
+            elapsed = now - root.start
+            RUN_SECONDS.observe(elapsed, self.graph)
+            # Concurrent model calls can add up to more than the run
+            OVERHEAD_SECONDS.observe(max(0.0, elapsed - root.model_seconds), self.graph)
+            for node, visits in root.visits.items():
+                NODE_VISITS.observe(visits, self.graph, node)
+
+    # Models
+    def on_chat_model_start(
+        self,
+        serialized,
+        messages,
+        *,
+        run_id: UUID,
+        parent_run_id: UUID | None = None,
+        metadata: Dict[str, Any] | None = None,
+        **kwargs: Any,
+    ) -> None:
+        metadata = metadata or {}
+        with self._lock:
+            self._llms[run_id] = _Span(
+                time.perf_counter(),
+                self._root_of.get(parent_run_id) if parent_run_id else None,
+                node=metadata.get("langgraph_node", ""),
+                model=metadata.get("ls_model_name", ""),
+            )
+
+    on_llm_start = on_chat_model_start
+
+    def on_llm_end(self, response, *, run_id: UUID, **kwargs: Any) -> None:
+        span = self._finish_llm(run_id)
+        if span is None:
+            return
+        prompt, completion = _token_usage(response)
+        labels = self.graph, span.node, span.model
+        if prompt:
+            LLM_TOKENS.inc(*labels, "prompt", amount=prompt)
+        if completion:
+            LLM_TOKENS.inc(*labels, "completion", amount=completion)
+
+    def on_llm_error(self, error, *, run_id: UUID, **kwargs: Any) -> None:
+        span = self._finish_llm(run_id)
+        if span is not None:
+            LLM_ERRORS.inc(self.graph, span.node, span.model)
+
+    def _finish_llm(self, run_id: UUID) -> _Span | None:
+        now = time.perf_counter()
+        with self._lock:
+            span = self._llms.pop(run_id, None)
+            if span is None:
+                return None
+            elapsed = now - span.start
+            if span.root in self._roots:
+                self._roots[span.root].model_seconds += elapsed
+        LLM_SECONDS.observe(elapsed, self.graph, span.node, span.model)
+        return span
+
+
+def _token_usage(response) -> Tuple[int, int]:
+    """(prompt, completion) tokens from an ``LLMResult``."""
+    prompt = completion = 0
+    for generations in response.generations:
+        for generation in generations:
+            usage = getattr(
+                getattr(generation, "message", None), "usage_metadata", None
+            )
+            if usage:
+                prompt += usage.get("input_tokens", 0)
+                completion += usage.get("output_tokens", 0)
+    if not (prompt or completion):
+        usage = (response.llm_output or {}).get("token_usage") or {}
+        prompt = usage.get("prompt_tokens", 0)
+        completion = usage.get("completion_tokens", 0)
+    return prompt, completion
+
+
+def instrument(graph, name: str):
+    """``graph`` with a ``MetricsHandler`` labelled ``name`` attached."""
+    if not ENABLED:
+        return graph
+    # Pregel.with_config returns a compiled graph, not a RunnableBinding
+    return graph.with_config(callbacks=[MetricsHandler(name)])
+
+
+# -----------------------------
+# 3. Export
+# -----------------------------
+def _cache_lines() -> List[str]:
+    from common.llm_cache import get_llm_cache
+
+    cache = get_llm_cache()
+    if cache is None:
+        return []
+    name = "llm_cache_requests_total"
+    stats = cache.stats
+    return [
+        f"# HELP {name} Response cache lookups",
+        f"# TYPE {name} counter",
+        f'{name}{{result="hit"}} {stats.hits}',
+        f'{name}{{result="semantic_hit"}} {stats.semantic_hits}',
+        f'{name}{{result="miss"}} {stats.misses}',
+    ]
+
+
+def render() -> str:
+    """Every metric in the Prometheus text exposition format."""
+    lines = []
+    with _lock:
+        for metric in _registry:
+            if metric.series:
+                lines.append(f"# HELP {metric.name} {metric.help}")
+                lines.append(f"# TYPE {metric.name} {metric.kind}")
+                lines.extend(metric.lines())
+    lines.extend(_cache_lines())
+    return "\n".join(lines) + "\n"
+
+
+def node_summary(graph: str) -> Dict[str, Tuple[int, float]]:
+    """node -> (executions, mean seconds) recorded so far for ``graph``."""
+    with _lock:
+        return {
+            labels[1]: (series[-1], series[-2] / series[-1])
+            for labels, series in NODE_SECONDS.series.items()
+            if labels[0] == graph and series[-1]
+        }
+
+
+def reset() -> None:
+    with _lock:
+        for metric in _registry:
+            metric.series.clear()
+
+
+def serve(port: int = 9100, host: str = "127.0.0.1"):
+    """Serve ``/metrics`` from a daemon thread; returns the server."""
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.rstrip("/") != "/metrics":
+                self.send_error(404)
+                return
+            body = render().encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
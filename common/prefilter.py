@@ -0,0 +1,63 @@
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, List, Sequence
+
+from common.embeddings import get_embeddings
+
+if TYPE_CHECKING:
+    import numpy as np
+    from langchain_core.documents import Document
+
+ACCEPT_THRESHOLD = 0.6
+REJECT_THRESHOLD = 0.05
+
+
+@dataclass
+class PrefilterResult:
+    accepted: List["Document"] = field(default_factory=list)
+    rejected: List["Document"] = field(default_factory=list)
+    # Only these need an LLM judgement
+    ambiguous: List["Document"] = field(default_factory=list)
+
+
+# -----------------------------
+# 1. Vectorised cosine scoring
+# -----------------------------
+def cosine_scores(query: str, texts: Sequence[str], embeddings=None) -> "np.ndarray":
+    """Cosine similarity of ``query`` against every text in one matmul."""
+    import numpy as np
+
+    if not texts:
+        return np.zeros(0, dtype=np.float32)
+
+    embeddings = embeddings or get_embeddings()
+    matrix = np.asarray(embeddings.embed_documents(list(texts)), dtype=np.float32)
+    query_vec = np.asarray(embeddings.embed_query(query), dtype=np.float32)
+
+    norms = np.linalg.norm(matrix, axis=1) * np.linalg.norm(query_vec)
+    return np.divide(
+        matrix @ query_vec, norms, out=np.zeros(len(texts), np.float32), where=norms > 0
+    )
+
+
+# -----------------------------
+# 2. Accept / reject / ambiguous bands
+# -----------------------------
+def prefilter_documents(
+    question: str,
+    docs: List["Document"],
+    accept: float = ACCEPT_THRESHOLD,
+    reject: float = REJECT_THRESHOLD,
+) -> PrefilterResult:
+    """Split documents into clear hits, clear misses and the middle band."""
+    scores = cosine_scores(question, [doc.page_content for doc in docs])
+    result = PrefilterResult()
+
+    for doc, score in zip(docs, scores):
+        if score >= accept:
+            result.accepted.append(doc)
+        elif score < reject:
+            result.rejected.append(doc)
+        else:
+            result.ambiguous.append(doc)
+
+    return result
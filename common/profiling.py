@@ -0,0 +1,90 @@
+"""Profile one graph run.
+
+    python -m common.profiling day05 state.json                # cProfile
+    python -m common.profiling day05 state.json -o day05.prof  # for snakeviz
+    python -m common.profiling day07 state.json --tool pyinstrument
+
+``state.json`` holds the initial state (``-`` reads stdin). The run is
+synchronous, so the profile covers node code, LangGraph's scheduling and
+client-side model overhead in one call tree. Only the calling thread is
+profiled: nodes LangGraph runs in parallel on worker threads are not.
+"""
+
+import argparse
+import cProfile
+import io
+import json
+import pstats
+import sys
+from typing import Any
+
+from common.graphs import GRAPH_MODULES, get_graph, input_state
+
+TOOLS = ("cprofile", "pyinstrument")
+
+
+def profile_run(
+    graph,
+    inputs: dict,
+    config: dict | None = None,
+    tool: str = "cprofile",
+    output: str | None = None,
+    top: int = 25,
+) -> Any:
+    """Invoke ``graph`` once under ``tool``; print or save the profile."""
+    from common.checkpoint import ensure_thread
+
+    config = ensure_thread(graph, config)
+
+    if tool == "pyinstrument":
+        from pyinstrument import Profiler
+
+        profiler = Profiler()
+        profiler.start()
+        try:
+            result = graph.invoke(inputs, config)
+        finally:
+            profiler.stop()
+        if output:
+            with open(output, "w") as f:
+                f.write(profiler.output_html())
+        else:
+            print(profiler.output_text(unicode=True))
+        return result
+
+    profiler = cProfile.Profile()
+    try:
+        result = profiler.runcall(graph.invoke, inputs, config)
+    finally:
+        if output:
+            profiler.dump_stats(output)
+    if not output:
+        text = io.StringIO()
+        pstats.Stats(profiler, stream=text).sort_stats("cumulative").print_stats(top)
+        print(text.getvalue())
+    return result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("graph", choices=sorted(GRAPH_MODULES))
+    parser.add_argument("state", help="JSON file with the initial state, - = stdin")
+    parser.add_argument("--tool", choices=TOOLS, default="cprofile")
+    parser.add_argument("-o", "--output", help=".prof (cProfile) or .html file")
+    parser.add_argument("--top", type=int, default=25)
+    args = parser.parse_args()
+
+    if args.tool == "pyinstrument":
+        try:
+            import pyinstrument  # noqa: F401
+        except ImportError:
+            parser.error("--tool pyinstrument needs `pip install pyinstrument`")
+
+    source = sys.stdin if args.state == "-" else open(args.state)
+    with source:
+        inputs = input_state(json.load(source))
+    profile_run(get_graph(args.graph), inputs, None, args.tool, args.output, args.top)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+"""Retry policy and circuit breaking for LLM calls.
+
+Errors are classified before anyone retries: rate limits, timeouts,
+connection errors and 5xx/409 responses are retryable, other 4xx are
+fatal. Delays use exponential backoff with full jitter and never go
+below a provider's ``Retry-After``. A circuit breaker per endpoint,
+shared by every graph in the process, stops calls once an endpoint
+keeps failing so a provider outage doesn't turn into a retry storm.
+"""
+
+import random
+import threading
+import time
+from dataclasses import dataclass
+from email.utils import parsedate_to_datetime
+from functools import lru_cache
+
+
+@lru_cache(maxsize=None)
+def retryable_errors() -> tuple:
+    # Deferred: importing openai is slow, and by the time an error needs
+    # classifying the client has loaded it anyway
+    import httpx
+    import openai
+
+    return (
+        openai.RateLimitError,
+        openai.APITimeoutError,
+        openai.APIConnectionError,
+        openai.InternalServerError,
+        openai.ConflictError,
+        httpx.TransportError,
+        TimeoutError,
+        ConnectionError,
+    )
+
+
+class CircuitOpenError(RuntimeError):
+    pass
+
+
+# -----------------------------
+# 1. Error classification
+# -----------------------------
+def is_retryable(error: BaseException) -> bool:
+    import openai
+
+    if isinstance(error, retryable_errors()):
+        return True
+    if isinstance(error, openai.APIStatusError):
+        return error.status_code >= 500
+    return False
+
+
+def retry_after(error: BaseException) -> float | None:
+    """Seconds the provider asked us to wait, if it said so."""
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None)
+    if not headers:
+        return None
+
+    if "retry-after-ms" in headers:
+        try:
+            return float(headers["retry-after-ms"]) / 1000
+        except ValueError:
+            pass
+
+    value = headers.get("retry-after")
+    if value is None:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+# -----------------------------
+# 2. Backoff with jitter
+# -----------------------------
+@dataclass(frozen=True)
+class RetryPolicy:
+    max_retries: int = 2
+    base_delay: float = 0.5
+    max_delay: float = 30.0
+    multiplier: float = 2.0
+    # Upper bound on how long a Retry-After header may make us wait
+    max_retry_after: float = 60.0
+
+    def backoff(self, attempt: int) -> float:
+        """Full-jitter exponential backoff for the given 0-based attempt."""
+        ceiling = min(self.max_delay, self.base_delay * self.multiplier**attempt)
+        return random.uniform(0, ceiling)
+
+    def delay(self, attempt: int, server_hint: float | None = None) -> float:
+        delay = self.backoff(attempt)
+        if server_hint is not None:
+            delay = max(delay, min(server_hint, self.max_retry_after))
+        return delay
+
+
+# -----------------------------
+# 3. Circuit breaker
+# -----------------------------
+class CircuitBreaker:
+    """Closed -> open after ``failure_threshold`` consecutive retryable
+    failures; after ``recovery_timeout`` one probe call is let through
+    (half-open) and its outcome closes or re-opens the circuit.
+    """
+
+    def __init__(self, failure_threshold: int = 5, recovery_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.failures = 0
+        self.opened_at: float | None = None
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.recovery_timeout:
+            return "half_open"
+        return "open"
+
+    def admit(self) -> str | None:
+        """``"closed"``, ``"probe"`` (the one half-open call) or ``None``."""
+        with self._lock:
+            state = self.state
+            if state == "closed":
+                return "closed"
+            if state == "half_open" and not self._probe_in_flight:
+                self._probe_in_flight = True
+                return "probe"
+            return None
+
+    def allow(self) -> bool:
+        return self.admit() is not None
+
+    def release_probe(self) -> None:
+        """The probe ended with no verdict (e.g. it was cancelled); let
+        the next call probe instead."""
+        with self._lock:
+            self._probe_in_flight = False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._probe_in_flight = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            if self._probe_in_flight or self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+            self._probe_in_flight = False
+
+
+@lru_cache(maxsize=None)
+def get_circuit_breaker(endpoint: str) -> CircuitBreaker:
+    return CircuitBreaker()
@@ -0,0 +1,256 @@
+"""Fallback routing across model backends.
+
+``ModelRouter`` tries backends in order of health. A backend is demoted
+for ``cooldown`` seconds after ``failure_threshold`` consecutive
+failures or when the p95 of its rolling latency window exceeds
+``p95_budget``. Only the failure that demotes a backend passes the call
+on to the next one; earlier failures are re-raised unchanged, so the
+caller's retry policy sees the real error. Backends whose endpoint has
+no API key configured are skipped. With ``hedge_after`` set, a second
+call goes to the next backend if the first hasn't answered in time, and
+whichever returns first wins.
+"""
+
+import asyncio
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import Any, List
+
+from common.retry import CircuitOpenError, get_circuit_breaker, is_retryable
+
+LATENCY_WINDOW = 100
+# Don't judge p95 on fewer samples than this
+MIN_LATENCY_SAMPLES = 20
+
+
+# -----------------------------
+# 1. Per-backend health
+# -----------------------------
+@dataclass
+class Backend:
+    name: str
+    llm: Any
+    # Key for the shared circuit breaker
+    endpoint: str
+    latencies: deque = field(default_factory=lambda: deque(maxlen=LATENCY_WINDOW))
+    failures: int = 0
+    demoted_until: float = 0.0
+
+    def p95(self) -> float | None:
+        if len(self.latencies) < MIN_LATENCY_SAMPLES:
+            return None
+        import numpy as np
+
+        return float(np.percentile(self.latencies, 95))
+
+    def configured(self) -> bool:
+        """False if the endpoint's API key is missing from the environment."""
+        from common.llm import ENDPOINTS
+
+        config = ENDPOINTS.get(self.endpoint)
+        return config is None or bool(os.getenv(config.api_key_env))
+
+
+class ModelRouter:
+    def __init__(
+        self,
+        backends: List[Backend],
+        failure_threshold: int = 2,
+        p95_budget: float | None = None,
+        cooldown: float = 30.0,
+        hedge_after: float | None = None,
+    ):
+        self.backends = backends
+        self.failure_threshold = failure_threshold
+        self.p95_budget = p95_budget
+        self.cooldown = cooldown
+        self.hedge_after = hedge_after
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(thread_name_prefix="router")
+
+    def order(self) -> List[Backend]:
+        """Healthy backends first, each group in configured order."""
+        now = time.monotonic()
+        candidates = [
+            b
+            for b in self.backends
+            if b.configured() and get_circuit_breaker(b.endpoint).state != "open"
+        ]
+        return sorted(candidates, key=lambda b: b.demoted_until > now)
+
+    # -----------------------------
+    # 2. Outcome bookkeeping
+    # -----------------------------
+    def _record_success(self, backend: Backend, elapsed: float) -> None:
+        get_circuit_breaker(backend.endpoint).record_success()
+        with self._lock:
+            backend.failures = 0
+            backend.latencies.append(elapsed)
+            p95 = backend.p95()
+            if (
+                self.p95_budget is not None
+                and p95 is not None
+                and p95 > self.p95_budget
+            ):
+                self._demote(backend)
+
+    def _record_failure(self, backend: Backend, error: BaseException) -> None:
+        breaker = get_circuit_breaker(backend.endpoint)
+        if is_retryable(error):
+            breaker.record_failure()
+        else:
+            breaker.record_success()
+        with self._lock:
+            backend.failures += 1
+            if backend.failures >= self.failure_threshold:
+                self._demote(backend)
+
+    def _fell_over(self, backend: Backend, error: BaseException) -> bool:
+        """Whether a failed call may move on to the next backend."""
+        # An open circuit rejected the call without trying it
+        if isinstance(error, CircuitOpenError):
+            return True
+        with self._lock:
+            return backend.demoted_until > time.monotonic()
+
+    def _demote(self, backend: Backend) -> None:
+        backend.demoted_until = time.monotonic() + self.cooldown
+        backend.failures = 0
+        # Fresh window once it's back in rotation
+        backend.latencies.clear()
+
+    def _call(self, backend: Backend, messages) -> Any:
+        breaker = get_circuit_breaker(backend.endpoint)
+        admitted = breaker.admit()
+        if admitted is None:
+            raise CircuitOpenError(f"circuit open for {backend.endpoint}")
+        start = time.monotonic()
+        try:
+            response = backend.llm.invoke(messages)
+        except Exception as e:
+            self._record_failure(backend, e)
+            raise
+        except BaseException:
+            # Cancelled (a hedged loser) or interrupted: no verdict on the
+            # endpoint, but a probe must not hold the breaker forever
+            if admitted == "probe":
+                breaker.release_probe()
+            raise
+        self._record_success(backend, time.monotonic() - start)
+        return response
+
+    async def _acall(self, backend: Backend, messages) -> Any:
+        breaker = get_circuit_breaker(backend.endpoint)
+        admitted = breaker.admit()
+        if admitted is None:
+            raise CircuitOpenError(f"circuit open for {backend.endpoint}")
+        start = time.monotonic()
+        try:
+            response = await backend.llm.ainvoke(messages)
+        except Exception as e:
+            self._record_failure(backend, e)
+            raise
+        except BaseException:
+            # Cancelled (a hedged loser) or interrupted: no verdict on the
+            # endpoint, but a probe must not hold the breaker forever
+            if admitted == "probe":
+                breaker.release_probe()
+            raise
+        self._record_success(backend, time.monotonic() - start)
+        return response
+
+    # -----------------------------
+    # 3. Sync invoke (with optional hedging)
+    # -----------------------------
+    def invoke(self, messages) -> Any:
+        backends = self.order()
+        if not backends:
+            raise CircuitOpenError("no backend available: open circuit or no API key")
+
+        if self.hedge_after is not None and len(backends) > 1:
+            return self._hedged(backends[0], backends[1], messages)
+
+        first_error: BaseException | None = None
+        for backend in backends:
+            try:
+                return self._call(backend, messages)
+            except Exception as e:
+                first_error = first_error or e
+                if not self._fell_over(backend, e):
+                    raise
+        raise first_error
+
+    def _hedged(self, primary: Backend, secondary: Backend, messages) -> Any:
+        first = self._executor.submit(self._call, primary, messages)
+        wait([first], timeout=self.hedge_after)
+        if first.done() and (
+            first.exception() is None or not self._fell_over(primary, first.exception())
+        ):
+            return first.result()
+
+        # Primary is slow or fell over: race it against the secondary
+        pending = {first, self._executor.submit(self._call, secondary, messages)}
+        errors = {}
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    # The loser keeps running in the pool; its result is dropped
+                    return future.result()
+                errors[future] = future.exception()
+                # As in invoke: a primary failure that did not demote it
+                # goes to the caller's retry policy, not to the secondary
+                if future is first and not self._fell_over(primary, errors[first]):
+                    raise errors[first]
+        raise errors[first]
+
+    # -----------------------------
+    # 4. Async invoke (with optional hedging)
+    # -----------------------------
+    async def ainvoke(self, messages) -> Any:
+        backends = self.order()
+        if not backends:
+            raise CircuitOpenError("no backend available: open circuit or no API key")
+
+        if self.hedge_after is not None and len(backends) > 1:
+            return await self._ahedged(backends[0], backends[1], messages)
+
+        first_error: BaseException | None = None
+        for backend in backends:
+            try:
+                return await self._acall(backend, messages)
+            except Exception as e:
+                first_error = first_error or e
+                if not self._fell_over(backend, e):
+                    raise
+        raise first_error
+
+    async def _ahedged(self, primary: Backend, secondary: Backend, messages) -> Any:
+        first = asyncio.create_task(self._acall(primary, messages))
+        await asyncio.wait([first], timeout=self.hedge_after)
+        if first.done() and (
+            first.exception() is None or not self._fell_over(primary, first.exception())
+        ):
+            return first.result()
+
+        pending = {first, asyncio.create_task(self._acall(secondary, messages))}
+        errors = {}
+        try:
+            while pending:
+                done, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    if task.exception() is None:
+                        return task.result()
+                    errors[task] = task.exception()
+                    if task is first and not self._fell_over(primary, errors[first]):
+                        raise errors[first]
+            raise errors[first]
+        finally:
+            for task in pending:
+                task.cancel()
@@ -0,0 +1,136 @@
+"""Minimal async server that streams graph runs as Server-Sent Events.
+
+    python -m common.sse_server --port 8000
+    curl -N -X POST localhost:8000/stream/day06 \
+        -d '{"question": "What is agent memory?", "documents": []}'
+    curl -N -X POST localhost:8000/stream/day05 \
+        -d '{"messages": [{"role": "user", "content": "hi"}], "score": 0, "iterations": 0}'
+
+``POST /stream/<graph>`` runs the graph named in ``common.graphs`` on
+the JSON body and forwards every ``common.streaming`` event as an SSE
+frame (``event: token``, ``event: node``, ``event: end``...) as soon
+as it is produced. Plain ASGI, served by uvicorn.
+
+``GET /metrics`` returns per-node latency, LLM call and token metrics
+(``common.metrics``) in the Prometheus text format.
+
+With checkpointing on, ``?thread_id=<id>`` names the run so it can be
+resumed later (see ``common.checkpoint``).
+"""
+
+import argparse
+import json
+from urllib.parse import parse_qs
+
+from common.checkpoint import thread_config
+from common.graphs import GRAPH_MODULES, input_state, load_graph_module
+from common.metrics import render
+from common.streaming import astream_events, to_jsonable
+
+
+def sse_frame(event: dict) -> bytes:
+    data = json.dumps({"node": event["node"], "data": to_jsonable(event["data"])})
+    return f"event: {event['event']}\ndata: {data}\n\n".encode()
+
+
+async def _read_body(receive) -> bytes:
+    body = b""
+    while True:
+        message = await receive()
+        body += message.get("body", b"")
+        if not message.get("more_body"):
+            return body
+
+
+async def _respond(send, status: int, text: str) -> None:
+    await send(
+        {
+            "type": "http.response.start",
+            "status": status,
+            "headers": [(b"content-type", b"text/plain; charset=utf-8")],
+        }
+    )
+    await send({"type": "http.response.body", "body": text.encode()})
+
+
+# -----------------------------
+# ASGI app
+# -----------------------------
+async def app(scope, receive, send) -> None:
+    if scope["type"] == "lifespan":
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    path = scope["path"].rstrip("/")
+    if scope["method"] == "GET" and path == "/graphs":
+        await _respond(send, 200, json.dumps(sorted(GRAPH_MODULES)))
+        return
+    if scope["method"] == "GET" and path == "/metrics":
+        await _respond(send, 200, render())
+        return
+    if scope["method"] != "POST" or not path.startswith("/stream/"):
+        await _respond(send, 404, "not found")
+        return
+
+    name = path.removeprefix("/stream/")
+    if name not in GRAPH_MODULES:
+        await _respond(send, 404, f"unknown graph {name!r}")
+        return
+    try:
+        body = json.loads(await _read_body(receive) or b"{}")
+    except ValueError as e:
+        await _respond(send, 400, f"invalid JSON body: {e}")
+        return
+    if not isinstance(body, dict):
+        await _respond(send, 400, "expected a JSON object")
+        return
+    # Chat-style {"role": ..., "content": ...} dicts become messages
+    try:
+        inputs = input_state(body)
+    except (ValueError, NotImplementedError) as e:
+        await _respond(send, 400, f"invalid messages: {e}")
+        return
+
+    module = load_graph_module(name)
+    await send(
+        {
+            "type": "http.response.start",
+            "status": 200,
+            "headers": [
+                (b"content-type", b"text/event-stream"),
+                (b"cache-control", b"no-cache"),
+                (b"x-accel-buffering", b"no"),
+            ],
+        }
+    )
+    token_nodes = getattr(module, "STREAM_NODES", None)
+    query = parse_qs(scope.get("query_string", b"").decode())
+    config = thread_config(query["thread_id"][0]) if "thread_id" in query else None
+    async for event in astream_events(module.get_graph(), inputs, token_nodes, config):
+        await send(
+            {"type": "http.response.body", "body": sse_frame(event), "more_body": True}
+        )
+    await send({"type": "http.response.body", "body": b""})
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    args = parser.parse_args()
+
+    try:
+        import uvicorn
+    except ImportError as e:
+        raise SystemExit("The SSE server needs uvicorn: pip install uvicorn") from e
+
+    uvicorn.run(app, host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
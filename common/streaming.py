@@ -0,0 +1,106 @@
+"""One event schema for streaming any graph run.
+
+Every event is a dict ``{"event": ..., "node": ..., "data": ...}``:
+
+    token   a chunk of model output from one of ``token_nodes``
+    node    a node finished; ``data`` is the state update it returned
+    end     the run finished; ``data`` is the final state
+    error   the run failed; ``data`` is the error message
+
+Tokens come from LangGraph's ``messages`` stream mode, so nodes keep
+calling ``llm.invoke`` and still stream. A cached response arrives as a
+single token event.
+"""
+
+from collections.abc import Sequence
+from typing import Any, AsyncIterator, Collection, Dict, Iterator
+
+from langchain_core.documents import Document
+from langchain_core.messages import BaseMessage
+
+from common.checkpoint import ensure_thread
+
+STREAM_MODES = ["messages", "updates", "values"]
+
+
+def _event(mode: str, chunk: Any, token_nodes: Collection[str] | None):
+    if mode == "messages":
+        message, metadata = chunk
+        node = metadata.get("langgraph_node")
+        if message.content and (token_nodes is None or node in token_nodes):
+            return {"event": "token", "node": node, "data": message.content}
+        return None
+    if mode == "updates":
+        # One update per node; parallel nodes land in the same superstep
+        return [
+            {"event": "node", "node": node, "data": update}
+            for node, update in chunk.items()
+        ]
+    return None
+
+
+def _flatten(event) -> list:
+    if event is None:
+        return []
+    return event if isinstance(event, list) else [event]
+
+
+# -----------------------------
+# 1. Sync / async event streams
+# -----------------------------
+def stream_events(
+    graph,
+    inputs: dict,
+    token_nodes: Collection[str] | None = None,
+    config: dict | None = None,
+) -> Iterator[Dict[str, Any]]:
+    final = None
+    config = ensure_thread(graph, config)
+    try:
+        for mode, chunk in graph.stream(inputs, config, stream_mode=STREAM_MODES):
+            if mode == "values":
+                final = chunk
+            yield from _flatten(_event(mode, chunk, token_nodes))
+    except Exception as e:
+        yield {"event": "error", "node": None, "data": str(e)}
+        return
+    yield {"event": "end", "node": None, "data": final}
+
+
+async def astream_events(
+    graph,
+    inputs: dict,
+    token_nodes: Collection[str] | None = None,
+    config: dict | None = None,
+) -> AsyncIterator[Dict[str, Any]]:
+    final = None
+    config = ensure_thread(graph, config)
+    try:
+        async for mode, chunk in graph.astream(
+            inputs, config, stream_mode=STREAM_MODES
+        ):
+            if mode == "values":
+                final = chunk
+            for event in _flatten(_event(mode, chunk, token_nodes)):
+                yield event
+    except Exception as e:
+        yield {"event": "error", "node": None, "data": str(e)}
+        return
+    yield {"event": "end", "node": None, "data": final}
+
+
+# -----------------------------
+# 2. JSON-friendly payloads
+# -----------------------------
+def to_jsonable(value: Any) -> Any:
+    if isinstance(value, BaseMessage):
+        return {"type": value.type, "content": value.content}
+    if isinstance(value, Document):
+        return {"page_content": value.page_content, "metadata": value.metadata}
+    if isinstance(value, dict):
+        return {str(k): to_jsonable(v) for k, v in value.items()}
+    if isinstance(value, Sequence) and not isinstance(value, (str, bytes)):
+        return [to_jsonable(v) for v in value]
+    if isinstance(value, (str, int, float, bool)) or value is None:
+        return value
+    return str(value)
@@ -0,0 +1,203 @@
+import asyncio
+import threading
+import time
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeout
+from typing import TYPE_CHECKING, Dict, Iterable, List, Tuple
+
+if TYPE_CHECKING:
+    from langchain_core.messages import ToolCall, ToolMessage
+    from langchain_core.runnables import Runnable
+    from langchain_core.tools import BaseTool
+
+DEFAULT_TOOL_TIMEOUT = 30.0
+MAX_TOOL_WORKERS = 16
+
+
+def _error_message(call: "ToolCall", error: str) -> "ToolMessage":
+    from langchain_core.messages import ToolMessage
+
+    return ToolMessage(
+        content=f"Error: {error}",
+        name=call["name"],
+        tool_call_id=call["id"],
+        status="error",
+    )
+
+
+def _is_async_only(tool: "BaseTool") -> bool:
+    return getattr(tool, "func", None) is None and bool(
+        getattr(tool, "coroutine", None)
+    )
+
+
+# -----------------------------
+# 1. Tool registry with memoised bindings
+# -----------------------------
+class ToolRegistry:
+    """Holds the active tool set and caches everything derived from it.
+
+    ``bind`` serializes tool schemas once per (model, tool set) instead of
+    on every agent step; adding or removing a tool invalidates the cache.
+    ``run_tool_calls``/``arun_tool_calls`` execute every call from one
+    ``AIMessage`` concurrently, each with a deadline and an optional
+    per-tool concurrency cap, and return results in call order.
+
+    A deadline bounds how long the agent waits, not how long the tool
+    runs: Python cannot stop a running thread. A sync tool that times out
+    keeps its worker (and, in ``run_tool_calls``, its concurrency slot)
+    until it returns on its own, so a tool that can hang should enforce
+    its own timeout (e.g. on its HTTP client), or repeated hangs will
+    exhaust the ``max_workers`` pool.
+    """
+
+    def __init__(
+        self,
+        tools: Iterable["BaseTool"] = (),
+        timeout: float = DEFAULT_TOOL_TIMEOUT,
+        max_workers: int = MAX_TOOL_WORKERS,
+    ):
+        self.timeout = timeout
+        self._tools: Dict[str, "BaseTool"] = {}
+        self._timeouts: Dict[str, float] = {}
+        self._limits: Dict[str, int] = {}
+        self._thread_slots: Dict[str, threading.BoundedSemaphore] = {}
+        self._async_slots: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+        self._bound: Dict[Tuple[int, Tuple[int, ...]], "Runnable"] = {}
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="tool"
+        )
+        self._lock = threading.Lock()
+
+        for tool in tools:
+            self.add(tool)
+
+    @property
+    def tools(self) -> List["BaseTool"]:
+        return list(self._tools.values())
+
+    def add(
+        self,
+        tool: "BaseTool",
+        max_concurrency: int | None = None,
+        timeout: float | None = None,
+    ) -> None:
+        with self._lock:
+            self._tools[tool.name] = tool
+            self._timeouts.pop(tool.name, None)
+            self._limits.pop(tool.name, None)
+            self._thread_slots.pop(tool.name, None)
+            if timeout is not None:
+                self._timeouts[tool.name] = timeout
+            if max_concurrency is not None:
+                self._limits[tool.name] = max_concurrency
+                self._thread_slots[tool.name] = threading.BoundedSemaphore(
+                    max_concurrency
+                )
+            self._async_slots.clear()
+            self._bound.clear()
+
+    def remove(self, name: str) -> None:
+        with self._lock:
+            del self._tools[name]
+            self._timeouts.pop(name, None)
+            self._limits.pop(name, None)
+            self._thread_slots.pop(name, None)
+            self._async_slots.clear()
+            self._bound.clear()
+
+    def bind(self, llm) -> "Runnable":
+        with self._lock:
+            key = id(llm), tuple(id(tool) for tool in self._tools.values())
+            if key not in self._bound:
+                self._bound[key] = llm.bind_tools(list(self._tools.values()))
+            return self._bound[key]
+
+    # -----------------------------
+    # 2. Threaded execution (sync tools)
+    # -----------------------------
+    def _run_one(self, tool: "BaseTool", call: "ToolCall") -> "ToolMessage":
+        slot = self._thread_slots.get(tool.name)
+        if slot is not None:
+            slot.acquire()
+        try:
+            if _is_async_only(tool):
+                return asyncio.run(tool.ainvoke(call))
+            return tool.invoke(call)
+        except Exception as e:
+            return _error_message(call, repr(e))
+        finally:
+            if slot is not None:
+                slot.release()
+
+    def run_tool_calls(self, tool_calls: List["ToolCall"]) -> List["ToolMessage"]:
+        start = time.monotonic()
+        futures = []
+        for call in tool_calls:
+            tool = self._tools.get(call["name"])
+            futures.append(tool and self._executor.submit(self._run_one, tool, call))
+
+        results = []
+        for call, future in zip(tool_calls, futures):
+            if future is None:
+                results.append(_error_message(call, f"unknown tool {call['name']!r}"))
+                continue
+            deadline = start + self._timeouts.get(call["name"], self.timeout)
+            try:
+                results.append(
+                    future.result(timeout=max(0, deadline - time.monotonic()))
+                )
+            except FutureTimeout:
+                # Only unstarted calls are dropped; a running one keeps its
+                # worker thread and slot until it finishes (see class doc)
+                future.cancel()
+                results.append(_error_message(call, "tool call timed out"))
+        return results
+
+    # -----------------------------
+    # 3. Asyncio execution (async tools)
+    # -----------------------------
+    def _async_slot(self, name: str) -> asyncio.Semaphore | None:
+        if name not in self._limits:
+            return None
+        slots = self._async_slots.setdefault(asyncio.get_running_loop(), {})
+        if name not in slots:
+            slots[name] = asyncio.Semaphore(self._limits[name])
+        return slots[name]
+
+    async def _arun_one(self, call: "ToolCall") -> "ToolMessage":
+        tool = self._tools.get(call["name"])
+        if tool is None:
+            return _error_message(call, f"unknown tool {call['name']!r}")
+
+        async def invoke() -> "ToolMessage":
+            if getattr(tool, "coroutine", None):
+                return await tool.ainvoke(call)
+            # Sync tools go to our own pool so a hung call can't block
+            # the event loop's default executor on shutdown
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor, tool.invoke, call)
+
+        async def run() -> "ToolMessage":
+            slot = self._async_slot(tool.name)
+            if slot is None:
+                return await invoke()
+            async with slot:
+                return await invoke()
+
+        try:
+            # Cancels the wait; a sync tool already running in the pool
+            # carries on in its thread (see class doc)
+            return await asyncio.wait_for(
+                run(), self._timeouts.get(tool.name, self.timeout)
+            )
+        except TimeoutError:
+            return _error_message(call, "tool call timed out")
+        except Exception as e:
+            return _error_message(call, repr(e))
+
+    async def arun_tool_calls(
+        self, tool_calls: List["ToolCall"]
+    ) -> List["ToolMessage"]:
+        return list(await asyncio.gather(*(self._arun_one(c) for c in tool_calls)))
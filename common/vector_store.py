@@ -0,0 +1,129 @@
+import hashlib
+import os
+import threading
+from functools import lru_cache
+from typing import TYPE_CHECKING, Iterable, List, Optional, Tuple
+
+from common.embeddings import get_embeddings
+
+if TYPE_CHECKING:
+    from langchain_core.documents import Document
+
+CHROMA_PATH = os.getenv("CHROMA_PATH", ".chroma")
+COLLECTION_NAME = os.getenv("CHROMA_COLLECTION", "agentic_rag")
+# Well under Chroma's per-request limit
+UPSERT_BATCH_SIZE = 1000
+
+# Chroma's client setup is not thread-safe; concurrent first opens from
+# worker threads (async graphs, batch runs) must not race each other.
+_open_lock = threading.Lock()
+
+
+# -----------------------------
+# 1. Process-wide client + collection
+# -----------------------------
+@lru_cache(maxsize=None)
+def get_client(path: str = CHROMA_PATH):
+    # Deferred: chromadb is slow to import and only needed by RAG graphs
+    import chromadb
+
+    with _open_lock:
+        return chromadb.PersistentClient(path=path)
+
+
+@lru_cache(maxsize=None)
+def get_collection(name: str = COLLECTION_NAME, path: str = CHROMA_PATH):
+    """Open (or create) a persistent collection once per process.
+
+    Embeddings are computed by ``get_embeddings()`` and passed explicitly,
+    so the collection itself carries no embedding function.
+    """
+    client = get_client(path)
+    with _open_lock:
+        return client.get_or_create_collection(
+            name=name,
+            embedding_function=None,
+            metadata={"hnsw:space": "cosine"},
+        )
+
+
+def content_id(text: str) -> str:
+    """Upsert id for a chunk: the hash of its text, so re-adding dedups."""
+    return hashlib.sha256(text.encode()).hexdigest()
+
+
+def document_id(doc: "Document") -> str:
+    return content_id(doc.page_content)
+
+
+# -----------------------------
+# 2. Bulk ingestion
+# -----------------------------
+def add_documents(
+    docs: Iterable["Document"],
+    embeddings: Optional[List[List[float]]] = None,
+    ids: Optional[List[str]] = None,
+    collection=None,
+) -> int:
+    """Upsert documents in bulk, keyed by content hash unless ids are given."""
+    collection = collection or get_collection()
+    docs = list(docs)
+    if not docs:
+        return 0
+
+    ids = ids or [document_id(doc) for doc in docs]
+    if embeddings is None:
+        embeddings = get_embeddings().embed_documents(
+            [doc.page_content for doc in docs]
+        )
+
+    for start in range(0, len(docs), UPSERT_BATCH_SIZE):
+        end = start + UPSERT_BATCH_SIZE
+        collection.upsert(
+            ids=ids[start:end],
+            embeddings=embeddings[start:end],
+            documents=[doc.page_content for doc in docs[start:end]],
+            # Chroma rejects empty metadata dicts
+            metadatas=[doc.metadata or None for doc in docs[start:end]],
+        )
+
+    # Keep the hybrid keyword index in step without rescanning
+    from common.hybrid import index_documents
+
+    index_documents(collection, ids, docs)
+    return len(docs)
+
+
+# -----------------------------
+# 3. Top-k similarity search
+# -----------------------------
+def similarity_search_with_score(
+    query: str, k: int = 4, where: Optional[dict] = None, collection=None
+) -> List[Tuple["Document", float]]:
+    """Return ``(document, cosine_distance)`` pairs, closest first."""
+    from langchain_core.documents import Document
+
+    collection = collection or get_collection()
+
+    result = collection.query(
+        query_embeddings=[get_embeddings().embed_query(query)],
+        n_results=k,
+        where=where,
+        include=["documents", "metadatas", "distances"],
+    )
+
+    return [
+        (Document(id=doc_id, page_content=text, metadata=metadata or {}), distance)
+        for doc_id, text, metadata, distance in zip(
+            result["ids"][0],
+            result["documents"][0],
+            result["metadatas"][0],
+            result["distances"][0],
+        )
+    ]
+
+
+def similarity_search(
+    query: str, k: int = 4, where: Optional[dict] = None, collection=None
+) -> List["Document"]:
+    return [doc for doc, _ in similarity_search_with_score(query, k, where, collection)]
@@ -0,0 +1,213 @@
+"""Structured YES/NO and score judgements.
+
+Judge calls ask for a tiny schema (``{"verdict": true}``,
+``{"score": 8}``) through tool calling, with a low completion-token cap so
+they finish in a few tokens. When a model ignores the schema, the raw
+reply is parsed leniently ("Yes.", "8/10", "Score: 8"), so a chatty
+answer never crashes the graph.
+
+    LLM_STRUCTURED_OUTPUT=0   # plain prompts + lenient parsing only
+    LLM_JUDGE_MAX_TOKENS=64   # raise for reasoning models
+"""
+
+import json
+import os
+import re
+import threading
+from functools import lru_cache
+from typing import TYPE_CHECKING, Any, Callable, Dict, Tuple, Type
+
+from langgraph.constants import TAG_NOSTREAM
+
+from common.llm import resolve_llm
+
+if TYPE_CHECKING:
+    from pydantic import BaseModel
+
+STRUCTURED_OUTPUT = os.getenv("LLM_STRUCTURED_OUTPUT", "1") != "0"
+JUDGE_MAX_TOKENS = int(os.getenv("LLM_JUDGE_MAX_TOKENS", "32"))
+
+MIN_SCORE = 1
+MAX_SCORE = 10
+
+YES_NO = re.compile(r"\b(yes|no|true|false)\b", re.IGNORECASE)
+# "8", "8/10", "8.5", "Score: 8", "8 out of 10"
+NUMBER = re.compile(r"(?<![\w.])(\d+(?:\.\d+)?)(?:\s*(?:/|out of)\s*(\d+))?")
+
+
+@lru_cache(maxsize=None)
+def _schemas() -> Dict[str, Type["BaseModel"]]:
+    """The ``Verdict`` and ``Score`` models, built on first use.
+
+    pydantic is slow to import, so graph modules that only import the ask
+    helpers do not pay for it until a judgement is made.
+    """
+    from pydantic import BaseModel, Field
+
+    class Verdict(BaseModel):
+        """A yes/no judgement."""
+
+        verdict: bool = Field(description="true for YES, false for NO")
+
+    class Score(BaseModel):
+        """A quality score."""
+
+        score: int = Field(description=f"Integer from {MIN_SCORE} to {MAX_SCORE}")
+
+    return {"Verdict": Verdict, "Score": Score}
+
+
+def __getattr__(name: str):
+    # `from common.verdicts import Verdict` still works
+    if name in ("Verdict", "Score"):
+        return _schemas()[name]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+# -----------------------------
+# 1. Lenient text parsing
+# -----------------------------
+def _json_field(text: str, name: str) -> Any:
+    start, end = text.find("{"), text.rfind("}")
+    if start == -1 or end < start:
+        return None
+    try:
+        return json.loads(text[start : end + 1]).get(name)
+    except (ValueError, AttributeError):
+        return None
+
+
+def parse_yes_no(text: str) -> bool | None:
+    """First YES/NO (or true/false) in ``text``; ``None`` if there is none."""
+    value = _json_field(text, "verdict")
+    if isinstance(value, bool):
+        return value
+
+    match = YES_NO.search(text)
+    if match is None:
+        return None
+    return match.group(1).lower() in ("yes", "true")
+
+
+def parse_score(text: str, low: int = MIN_SCORE, high: int = MAX_SCORE) -> int | None:
+    """First number in ``text``, rescaled from "x/N" and clamped to range."""
+    value = _json_field(text, "score")
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return max(low, min(high, round(value)))
+
+    match = NUMBER.search(text)
+    if match is None:
+        return None
+
+    score = float(match.group(1))
+    if match.group(2) and float(match.group(2)) > 0:
+        score = score / float(match.group(2)) * high
+    return max(low, min(high, round(score)))
+
+
+# -----------------------------
+# 2. Judge runnables
+# -----------------------------
+# (id(llm), schema) -> (llm, runnable); holding llm keeps the id valid
+_judges: Dict[Tuple[int, type], Tuple[Any, Any]] = {}
+_lock = threading.Lock()
+
+
+def _capped(llm):
+    llm = resolve_llm(llm)
+    if "max_tokens" in getattr(type(llm), "model_fields", {}):
+        return llm.model_copy(update={"max_tokens": JUDGE_MAX_TOKENS})
+    return llm
+
+
+def judge(llm, schema: Type["BaseModel"]):
+    """``llm`` with a token cap and, where supported, structured output."""
+    key = id(llm), schema
+    with _lock:
+        if key not in _judges:
+            runnable = _capped(llm)
+            if STRUCTURED_OUTPUT:
+                try:
+                    runnable = runnable.with_structured_output(
+                        schema, method="function_calling", include_raw=True
+                    )
+                except (NotImplementedError, ValueError):
+                    # Model without tool calling: plain text + parsing
+                    pass
+            # Verdicts are control flow, not output: keep them out of the
+            # token stream even when called from a streamed node
+            _judges[key] = llm, runnable.with_config(tags=[TAG_NOSTREAM])
+        return _judges[key][1]
+
+
+def _reply_text(result) -> str:
+    if isinstance(result, dict):
+        # include_raw=True: fall back to whatever the model did say
+        raw = result.get("raw")
+        calls = getattr(raw, "tool_calls", None) or []
+        parts = [json.dumps(call.get("args", {})) for call in calls]
+        parts.append(str(getattr(raw, "content", "") or ""))
+        return "\n".join(parts)
+    return str(result.content)
+
+
+def _interpret(result, field: str, parse: Callable[[str], Any]):
+    if isinstance(result, dict) and result.get("parsed") is not None:
+        return getattr(result["parsed"], field)
+    return parse(_reply_text(result))
+
+
+# -----------------------------
+# 3. Ask helpers
+# -----------------------------
+def ask_yes_no(llm, prompt, default: bool = False) -> bool:
+    """YES/NO judgement; ``default`` when the reply has no verdict at all."""
+    verdict = _interpret(
+        judge(llm, _schemas()["Verdict"]).invoke(prompt), "verdict", parse_yes_no
+    )
+    return default if verdict is None else verdict
+
+
+async def aask_yes_no(llm, prompt, default: bool = False) -> bool:
+    result = await judge(llm, _schemas()["Verdict"]).ainvoke(prompt)
+    verdict = _interpret(result, "verdict", parse_yes_no)
+    return default if verdict is None else verdict
+
+
+def ask_score(llm, prompt, default: int = MIN_SCORE) -> int:
+    """Score in ``[MIN_SCORE, MAX_SCORE]``; ``default`` when none is found."""
+    score = _interpret(
+        judge(llm, _schemas()["Score"]).invoke(prompt), "score", parse_score
+    )
+    return default if score is None else max(MIN_SCORE, min(MAX_SCORE, score))
+
+
+async def aask_score(llm, prompt, default: int = MIN_SCORE) -> int:
+    result = await judge(llm, _schemas()["Score"]).ainvoke(prompt)
+    score = _interpret(result, "score", parse_score)
+    return default if score is None else max(MIN_SCORE, min(MAX_SCORE, score))
+
+
+def ask_scores(llm, prompts, default: int = MIN_SCORE) -> list[int]:
+    """``ask_score`` for many prompts, sent concurrently in one batch.
+
+    A failed call scores ``default`` instead of failing the whole batch.
+    """
+    results = judge(llm, _schemas()["Score"]).batch(
+        list(prompts), return_exceptions=True
+    )
+    return [_batch_score(result, default) for result in results]
+
+
+async def aask_scores(llm, prompts, default: int = MIN_SCORE) -> list[int]:
+    results = await judge(llm, _schemas()["Score"]).abatch(
+        list(prompts), return_exceptions=True
+    )
+    return [_batch_score(result, default) for result in results]
+
+
+def _batch_score(result, default: int) -> int:
+    if isinstance(result, Exception):
+        return default
+    score = _interpret(result, "score", parse_score)
+    return default if score is None else max(MIN_SCORE, min(MAX_SCORE, score))
@@ -0,0 +1,400 @@
+"""Web search that returns chunked ``Document``s.
+
+``search_documents(question)`` does the following:
+1. rewrites the question into a keyword query;
+2. checks a persistent TTL cache keyed on the normalized query;
+3. on a miss, asks the search backend;
+4. fetches the result pages concurrently, each with its own timeout, and
+   falls back to the backend's snippet when a fetch fails;
+5. splits the pages into chunks and keeps those closest to the question.
+
+    WEB_SEARCH_BACKEND=tavily          needs TAVILY_API_KEY
+    WEB_SEARCH_BACKEND=local           pages from WEB_SEARCH_LOCAL_DIR
+    WEB_SEARCH_CACHE=0                 disable the result cache
+    WEB_SEARCH_CACHE_TTL=86400         seconds, 0 = never expire
+    WEB_FETCH_TIMEOUT=5                seconds per page
+
+The default backend is Tavily when ``TAVILY_API_KEY`` is set and the
+local stand-in otherwise, so offline runs and tests never hit the
+network. Without ``WEB_SEARCH_LOCAL_DIR`` the stand-in has no pages and
+every search comes back empty; a warning says so on first use.
+"""
+
+import asyncio
+import hashlib
+import os
+import re
+import warnings
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from functools import lru_cache
+from html.parser import HTMLParser
+from typing import TYPE_CHECKING, Any, Dict, List, Protocol, Sequence
+
+from common.embeddings import tokenize
+from common.ingest import split_text
+
+if TYPE_CHECKING:
+    from langchain_core.documents import Document
+
+MAX_RESULTS = 5
+# Chunks handed to the graph, closest to the question first
+MAX_CHUNKS = 6
+CHUNK_SIZE = 800
+CHUNK_OVERLAP = 100
+FETCH_TIMEOUT = float(os.getenv("WEB_FETCH_TIMEOUT", "5"))
+FETCH_CONCURRENCY = 8
+# Pages are truncated before parsing
+MAX_PAGE_CHARS = 200_000
+
+CACHE_TTL = float(os.getenv("WEB_SEARCH_CACHE_TTL", "86400"))
+CACHE_PATH = os.getenv("WEB_SEARCH_CACHE_PATH", ".web_search_cache.sqlite")
+
+# Words that carry no signal for a search engine
+FILLER = frozenset(
+    "a an the is are was were be do does did what which who whom how why when "
+    "where can could would should please tell me explain describe about of "
+    "to in on for and or".split()
+)
+WHITESPACE = re.compile(r"\s+")
+
+
+@dataclass
+class SearchHit:
+    url: str
+    title: str
+    content: str
+
+
+# -----------------------------
+# 1. Query rewriting
+# -----------------------------
+def normalize_query(query: str) -> str:
+    return WHITESPACE.sub(" ", query).strip().lower().rstrip("?!. ")
+
+
+def rewrite_query(question: str) -> str:
+    """Keyword query: question words and filler dropped, codes kept as-is."""
+    words = [
+        word
+        for word in WHITESPACE.split(question.strip().rstrip("?!. "))
+        if word and word.lower().strip(",;:") not in FILLER
+    ]
+    return " ".join(words) or question.strip()
+
+
+# -----------------------------
+# 2. Backends
+# -----------------------------
+class SearchBackend(Protocol):
+    name: str
+
+    def search(self, query: str, max_results: int) -> List[SearchHit]: ...
+
+    async def asearch(self, query: str, max_results: int) -> List[SearchHit]: ...
+
+
+class TavilyBackend:
+    name = "tavily"
+
+    def __init__(self):
+        # Deferred: langchain_tavily pulls in its HTTP stack on import
+        from langchain_tavily import TavilySearch
+
+        self._tools: Dict[int, Any] = {}
+        self._factory = TavilySearch
+
+    def _tool(self, max_results: int):
+        if max_results not in self._tools:
+            self._tools[max_results] = self._factory(max_results=max_results)
+        return self._tools[max_results]
+
+    @staticmethod
+    def _hits(response) -> List[SearchHit]:
+        if not isinstance(response, dict):
+            return []
+        return [
+            SearchHit(r.get("url", ""), r.get("title", ""), r.get("content", ""))
+            for r in response.get("results", [])
+        ]
+
+    def search(self, query: str, max_results: int) -> List[SearchHit]:
+        return self._hits(self._tool(max_results).invoke({"query": query}))
+
+    async def asearch(self, query: str, max_results: int) -> List[SearchHit]:
+        return self._hits(await self._tool(max_results).ainvoke({"query": query}))
+
+
+class LocalBackend:
+    """Offline stand-in: BM25 over a dict of ``url -> page text``."""
+
+    name = "local"
+
+    def __init__(self, pages: Dict[str, str] | None = None):
+        from common.hybrid import BM25Index
+
+        self.pages = dict(pages or {})
+        self.index = BM25Index()
+        for url, text in self.pages.items():
+            self.index.add(url, text)
+
+    @classmethod
+    def from_directory(cls, root: str) -> "LocalBackend":
+        from common.ingest import iter_files
+
+        return cls(
+            {
+                path.as_uri(): path.read_text(encoding="utf-8", errors="replace")
+                for path in iter_files(root)
+            }
+        )
+
+    def search(self, query: str, max_results: int) -> List[SearchHit]:
+        return [
+            SearchHit(url, url.rsplit("/", 1)[-1], self.pages[url])
+            for url, _ in self.index.search(query, max_results)
+        ]
+
+    async def asearch(self, query: str, max_results: int) -> List[SearchHit]:
+        return self.search(query, max_results)
+
+
+@lru_cache(maxsize=None)
+def get_backend() -> SearchBackend:
+    name = os.getenv("WEB_SEARCH_BACKEND") or (
+        "tavily" if os.getenv("TAVILY_API_KEY") else "local"
+    )
+    if name == "tavily":
+        return TavilyBackend()
+    if name == "local":
+        root = os.getenv("WEB_SEARCH_LOCAL_DIR")
+        if root:
+            return LocalBackend.from_directory(root)
+        warnings.warn(
+            "web search has no backend: set TAVILY_API_KEY, or "
+            "WEB_SEARCH_LOCAL_DIR for offline pages; searches return nothing",
+            RuntimeWarning,
+            stacklevel=2,
+        )
+        return LocalBackend()
+    raise ValueError(f"unknown WEB_SEARCH_BACKEND {name!r}; use tavily or local")
+
+
+# -----------------------------
+# 3. Result cache
+# -----------------------------
+@lru_cache(maxsize=None)
+def get_search_cache():
+    """Persistent ``key -> [Document]`` cache, or ``None`` if disabled."""
+    if os.getenv("WEB_SEARCH_CACHE", "1") == "0":
+        return None
+    from common.llm_cache import SQLiteBackend
+
+    return SQLiteBackend(CACHE_PATH, ttl=CACHE_TTL, table="web_search")
+
+
+def cache_key(
+    backend: SearchBackend,
+    query: str,
+    max_results: int,
+    max_chunks: int = MAX_CHUNKS,
+    fetch: bool = True,
+) -> str:
+    # Everything that changes the returned documents is part of the key
+    parts = [backend.name, max_results, max_chunks, fetch, normalize_query(query)]
+    raw = "\x00".join(map(str, parts))
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+# -----------------------------
+# 4. Concurrent page fetching
+# -----------------------------
+class _TextExtractor(HTMLParser):
+    SKIP = frozenset({"script", "style", "noscript", "head", "nav", "footer", "svg"})
+
+    def __init__(self):
+        super().__init__()
+        self.parts: List[str] = []
+        self._skipping = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in self.SKIP:
+            self._skipping += 1
+
+    def handle_endtag(self, tag):
+        if tag in self.SKIP and self._skipping:
+            self._skipping -= 1
+
+    def handle_data(self, data):
+        if not self._skipping and data.strip():
+            self.parts.append(data.strip())
+
+
+def html_to_text(html: str) -> str:
+    parser = _TextExtractor()
+    parser.feed(html[:MAX_PAGE_CHARS])
+    return "\n".join(parser.parts)
+
+
+def _page_text(response) -> str | None:
+    if response.status_code != 200:
+        return None
+    kind = response.headers.get("content-type", "")
+    if "html" in kind:
+        return html_to_text(response.text)
+    if kind.startswith("text/"):
+        return response.text[:MAX_PAGE_CHARS]
+    return None
+
+
+def _fetchable(hit: SearchHit) -> bool:
+    return hit.url.startswith(("http://", "https://"))
+
+
+@lru_cache(maxsize=None)
+def _fetch_errors() -> tuple:
+    import httpx
+
+    # A malformed result URL raises InvalidURL, which is not an HTTPError
+    return httpx.HTTPError, httpx.InvalidURL
+
+
+@lru_cache(maxsize=None)
+def _http_client():
+    import httpx
+
+    return httpx.Client(timeout=FETCH_TIMEOUT, follow_redirects=True)
+
+
+@lru_cache(maxsize=None)
+def _async_http_client():
+    import httpx
+
+    return httpx.AsyncClient(timeout=FETCH_TIMEOUT, follow_redirects=True)
+
+
+def _fetch(hit: SearchHit) -> str:
+    try:
+        text = _page_text(_http_client().get(hit.url))
+    except _fetch_errors():
+        text = None
+    return text or hit.content
+
+
+def fetch_pages(hits: Sequence[SearchHit]) -> List[str]:
+    """Page text per hit, fetched in parallel; the snippet on any failure."""
+    urls = [hit for hit in hits if _fetchable(hit)]
+    if not urls:
+        return [hit.content for hit in hits]
+    with ThreadPoolExecutor(max_workers=min(FETCH_CONCURRENCY, len(urls))) as pool:
+        pages = dict(zip(map(id, urls), pool.map(_fetch, urls)))
+    return [pages.get(id(hit), hit.content) for hit in hits]
+
+
+async def afetch_pages(hits: Sequence[SearchHit]) -> List[str]:
+    # Pooled like the sync client; bound to the event loop it is first
+    # used on, as the model clients in common.llm are
+    client = _async_http_client()
+    slots = asyncio.Semaphore(FETCH_CONCURRENCY)
+
+    async def fetch(hit: SearchHit) -> str:
+        if not _fetchable(hit):
+            return hit.content
+        async with slots:
+            try:
+                text = _page_text(await client.get(hit.url))
+            except _fetch_errors():
+                text = None
+        return text or hit.content
+
+    return await asyncio.gather(*(fetch(hit) for hit in hits))
+
+
+# -----------------------------
+# 5. Chunking
+# -----------------------------
+def to_documents(
+    question: str,
+    hits: Sequence[SearchHit],
+    pages: Sequence[str],
+    max_chunks: int = MAX_CHUNKS,
+) -> List["Document"]:
+    """Chunk every page and keep the ``max_chunks`` closest to the question."""
+    from langchain_core.documents import Document
+
+    from common.prefilter import cosine_scores
+
+    docs = [
+        Document(
+            page_content=chunk,
+            metadata={"source": hit.url, "title": hit.title, "chunk": index},
+        )
+        for hit, page in zip(hits, pages)
+        for index, chunk in enumerate(split_text(page, CHUNK_SIZE, CHUNK_OVERLAP))
+    ]
+    if len(docs) <= max_chunks:
+        return docs
+
+    scores = cosine_scores(question, [doc.page_content for doc in docs])
+    # Keyword overlap breaks ties between equally similar chunks
+    terms = set(tokenize(question))
+    order = sorted(
+        range(len(docs)),
+        key=lambda i: (scores[i], len(terms & set(tokenize(docs[i].page_content)))),
+        reverse=True,
+    )
+    return [docs[i] for i in order[:max_chunks]]
+
+
+# -----------------------------
+# 6. Search entry points
+# -----------------------------
+def search_documents(
+    question: str,
+    max_results: int = MAX_RESULTS,
+    max_chunks: int = MAX_CHUNKS,
+    fetch: bool = True,
+    backend: SearchBackend | None = None,
+) -> List["Document"]:
+    backend = backend or get_backend()
+    query = rewrite_query(question)
+    cache = get_search_cache()
+    key = cache_key(backend, query, max_results, max_chunks, fetch)
+
+    if cache is not None and (cached := cache.get(key)) is not None:
+        return cached
+
+    hits = backend.search(query, max_results)
+    pages = fetch_pages(hits) if fetch else [hit.content for hit in hits]
+    docs = to_documents(question, hits, pages, max_chunks)
+
+    if cache is not None and docs:
+        cache.set(key, docs)
+    return docs
+
+
+async def asearch_documents(
+    question: str,
+    max_results: int = MAX_RESULTS,
+    max_chunks: int = MAX_CHUNKS,
+    fetch: bool = True,
+    backend: SearchBackend | None = None,
+) -> List["Document"]:
+    backend = backend or get_backend()
+    query = rewrite_query(question)
+    cache = get_search_cache()
+    key = cache_key(backend, query, max_results, max_chunks, fetch)
+
+    # SQLite is blocking; keep it off the event loop
+    if cache is not None:
+        cached = await asyncio.to_thread(cache.get, key)
+        if cached is not None:
+            return cached
+
+    hits = await backend.asearch(query, max_results)
+    pages = await afetch_pages(hits) if fetch else [hit.content for hit in hits]
+    docs = to_documents(question, hits, pages, max_chunks)
+
+    if cache is not None and docs:
+        await asyncio.to_thread(cache.set, key, docs)
+    return docs
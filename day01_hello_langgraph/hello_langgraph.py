@@ -1,9 +1,10 @@
-import os
+from functools import lru_cache
 from typing import TypedDict
 
 from dotenv import load_dotenv
-from langchain_openai import ChatOpenAI
-from langgraph.graph import END, StateGraph
+from langgraph.constants import END
+
+from common.llm import LazyLLM
 
 # Load environment variables from .env file
 load_dotenv()
@@ -20,12 +21,8 @@ class GraphState(TypedDict):
 # -----------------------------
 # 2. Initialize LLM
 # -----------------------------
-llm = ChatOpenAI(
-    model="gemini-2.5-flash",
-    api_key=os.getenv("GEMINI_API_KEY"),
-    base_url="https://generativelanguage.googleapis.com/v1beta/openai/",
-    temperature=0,
-)
+# Built on first call, so importing this module stays cheap
+llm = LazyLLM("gemini")
 
 
 # -----------------------------
@@ -38,23 +35,54 @@ def hello_agent(state: GraphState) -> GraphState:
     return {"response": result.content}
 
 
+async def ahello_agent(state: GraphState) -> GraphState:
+    prompt = f"Reply politely to this message: {state['message']}"
+    result = await llm.ainvoke(prompt)
+
+    return {"response": result.content}
+
+
 # -----------------------------
 # 4. Build the graph
 # -----------------------------
-builder = StateGraph(GraphState)
+@lru_cache(maxsize=None)
+def get_graph():
+    """Build and compile the graph on first use, not at import."""
+    # Deferred: langgraph's graph/pregel modules dominate import time
+    from langchain_core.runnables import RunnableLambda
+    from langgraph.graph import StateGraph
+
+    from common.metrics import instrument
+
+    builder = StateGraph(GraphState)
+
+    # graph.invoke runs hello_agent, graph.ainvoke runs ahello_agent
+    builder.add_node("hello_agent", RunnableLambda(hello_agent, afunc=ahello_agent))
+
+    builder.set_entry_point("hello_agent")
+    builder.add_edge("hello_agent", END)
+
+    # Per-node latency, LLM calls and tokens (see common.metrics)
+    return instrument(builder.compile(), "day01")
+
 
-builder.add_node("hello_agent", hello_agent)
+def __getattr__(name: str):
+    # `module.graph` still works; it is built on first access
+    if name == "graph":
+        return get_graph()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
-builder.set_entry_point("hello_agent")
-builder.add_edge("hello_agent", END)
 
-graph = builder.compile()
+# Nodes whose model output is forwarded token by token
+# (see common.streaming / common.sse_server)
+STREAM_NODES = {"hello_agent"}
 
 
 # -----------------------------
 # 5. Run the graph
 # -----------------------------
 if __name__ == "__main__":
+    graph = get_graph()
     input_state = {"message": "Hello, LangGraph!"}
 
     output = graph.invoke(input_state)
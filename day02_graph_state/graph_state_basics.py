@@ -1,6 +1,7 @@
+from functools import lru_cache
 from typing import TypedDict
 
-from langgraph.graph import StateGraph, END
+from langgraph.constants import END
 
 
 # -----------------------------
@@ -26,26 +27,39 @@ def step_two(state: GraphState) -> GraphState:
 # -----------------------------
 # 3. Build graph
 # -----------------------------
-builder = StateGraph(GraphState)
+@lru_cache(maxsize=None)
+def get_graph():
+    """Build and compile the graph on first use, not at import."""
+    # Deferred: langgraph's graph/pregel modules dominate import time
+    from langgraph.graph import StateGraph
 
-builder.add_node("step_one", step_one)
-builder.add_node("step_two", step_two)
+    from common.metrics import instrument
 
-builder.set_entry_point("step_one")
-builder.add_edge("step_one", "step_two")
-builder.add_edge("step_two", END)
+    builder = StateGraph(GraphState)
 
-graph = builder.compile()
+    builder.add_node("step_one", step_one)
+    builder.add_node("step_two", step_two)
+
+    builder.set_entry_point("step_one")
+    builder.add_edge("step_one", "step_two")
+    builder.add_edge("step_two", END)
+
+    # Per-node latency, LLM calls and tokens (see common.metrics)
+    return instrument(builder.compile(), "day02_state")
+
+
+def __getattr__(name: str):
+    # `module.graph` still works; it is built on first access
+    if name == "graph":
+        return get_graph()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 # -----------------------------
 # 4. Run graph
 # -----------------------------
 if __name__ == "__main__":
+    graph = get_graph()
     result = graph.invoke({"input_text": "Hello LangGraph state!"})
     # {'input_text': 'Hello LangGraph state!', 'step_1': 'Processed step 1: Hello LangGraph state!', 'step_2': 'Processed step 2 after -> Processed step 1: Hello LangGraph state!'}
-    # Save as PNG
-    graph.get_graph().draw_mermaid_png(
-        output_file_path="day02_graph_state/graph_state_basics.png"
-    )
     print(result)
@@ -1,7 +1,8 @@
-from typing import TypedDict, List, Annotated
+from functools import lru_cache
 from operator import add
+from typing import TypedDict, List, Annotated
 
-from langgraph.graph import StateGraph, END
+from langgraph.constants import END
 
 
 # -----------------------------
@@ -25,26 +26,39 @@ def node_b(state: GraphState) -> GraphState:
 # -----------------------------
 # 3. Graph with reducer
 # -----------------------------
-builder = StateGraph(GraphState)
+@lru_cache(maxsize=None)
+def get_graph():
+    """Build and compile the graph on first use, not at import."""
+    # Deferred: langgraph's graph/pregel modules dominate import time
+    from langgraph.graph import StateGraph
+
+    from common.metrics import instrument
+
+    builder = StateGraph(GraphState)
+
+    builder.add_node("node_a", node_a)
+    builder.add_node("node_b", node_b)
+
+    builder.set_entry_point("node_a")
+    builder.add_edge("node_a", "node_b")
+    builder.add_edge("node_b", END)
 
-builder.add_node("node_a", node_a)
-builder.add_node("node_b", node_b)
+    # Per-node latency, LLM calls and tokens (see common.metrics)
+    return instrument(builder.compile(), "day02_reducers")
 
-builder.set_entry_point("node_a")
-builder.add_edge("node_a", "node_b")
-builder.add_edge("node_b", END)
 
-graph = builder.compile()
+def __getattr__(name: str):
+    # `module.graph` still works; it is built on first access
+    if name == "graph":
+        return get_graph()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 # -----------------------------
 # 4. Run
 # -----------------------------
 if __name__ == "__main__":
+    graph = get_graph()
     result = graph.invoke({"events": []})
     # {"events": ["event from node A", "event from node B"]}
-    # Save as PNG
-    graph.get_graph().draw_mermaid_png(
-        output_file_path="day02_graph_state/reducers_example.png"
-    )
     print(result)
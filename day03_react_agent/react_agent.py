@@ -1,13 +1,14 @@
 import os
-from typing import Annotated, List, Literal, TypedDict
-from operator import add
+from functools import lru_cache
+from typing import Annotated, Literal, TypedDict
 
 from dotenv import load_dotenv
-from langchain_core.messages import AIMessage, HumanMessage
-from langchain_core.tools import tool
-from langchain_openai import ChatOpenAI
-from langgraph.graph import END, StateGraph
-from langgraph.prebuilt import ToolNode
+from langgraph.constants import END
+
+from common.context_budget import ContextBudget
+from common.llm import LazyLLM
+from common.message_log import AppendLog, append_log
+from common.tools import ToolRegistry
 
 load_dotenv()
 
@@ -16,13 +17,17 @@ load_dotenv()
 # 1. Define state
 # -----------------------------
 class AgentState(TypedDict):
-    messages: Annotated[List, add]
+    messages: Annotated[AppendLog, append_log]
+
+
+TOOL_TIMEOUT = 30.0
+# Prompt budget for each agent step
+MAX_CONTEXT_TOKENS = 16_000
 
 
 # -----------------------------
 # 2. Define a simple tool
 # -----------------------------
-@tool
 def get_current_time() -> str:
     """Returns the current time in UTC."""
     from datetime import datetime, timezone
@@ -30,36 +35,62 @@ def get_current_time() -> str:
     return datetime.now(timezone.utc).isoformat()
 
 
-tools = [get_current_time]
-tool_node = ToolNode(tools)
+# Tools can be added/removed at runtime (optionally with a per-tool
+# timeout and concurrency cap); bindings are rebuilt on change
+@lru_cache(maxsize=None)
+def get_registry() -> ToolRegistry:
+    """The shared registry, built on first use (langchain_core is slow to import)."""
+    from langchain_core.tools import tool
+
+    return ToolRegistry([tool(get_current_time)], timeout=TOOL_TIMEOUT)
 
 
 # -----------------------------
 # 3. LLM
 # -----------------------------
-llm = ChatOpenAI(
-    model="mistralai/devstral-2512:free",
-    base_url="https://openrouter.ai/api/v1",
-    api_key=os.getenv("OPENROUTER_API_KEY"),
-    temperature=0,
-)
+llm = LazyLLM()
+
+context_budget = ContextBudget(MAX_CONTEXT_TOKENS)
 
 
 # -----------------------------
 # 4. Agent (think + act)
 # -----------------------------
 def agent(state: AgentState) -> AgentState:
-    # Bind tools to the LLM so it knows what tools are available
-    llm_with_tools = llm.bind_tools(tools)
-    response = llm_with_tools.invoke(state["messages"])
+    # Tool-bound model is cached per tool set, not rebuilt every step
+    llm_with_tools = get_registry().bind(llm)
+    # Trim old turns (tool calls stay paired with their results)
+    response = llm_with_tools.invoke(context_budget.fit(state["messages"]))
     # Return just the new message - the reducer will append it
     return {"messages": [response]}
 
 
+async def aagent(state: AgentState) -> AgentState:
+    llm_with_tools = get_registry().bind(llm)
+    response = await llm_with_tools.ainvoke(context_budget.fit(state["messages"]))
+    return {"messages": [response]}
+
+
 # -----------------------------
-# 5. Decide next step
+# 5. Tools (act)
+# -----------------------------
+# All tool calls from one AIMessage run concurrently (threads for sync,
+# asyncio under ainvoke), each with a deadline; results keep call order
+def tools(state: AgentState) -> AgentState:
+    return {"messages": get_registry().run_tool_calls(state["messages"][-1].tool_calls)}
+
+
+async def atools(state: AgentState) -> AgentState:
+    tool_calls = state["messages"][-1].tool_calls
+    return {"messages": await get_registry().arun_tool_calls(tool_calls)}
+
+
+# -----------------------------
+# 6. Decide next step
 # -----------------------------
 def should_continue(state: AgentState) -> Literal["tools", END]:
+    from langchain_core.messages import AIMessage
+
     last_message = state["messages"][-1]
 
     # If the LLM requested a tool → execute it
@@ -71,35 +102,60 @@ def should_continue(state: AgentState) -> Literal["tools", END]:
 
 
 # -----------------------------
-# 6. Build graph
+# 7. Build graph
 # -----------------------------
-builder = StateGraph(AgentState)
+@lru_cache(maxsize=None)
+def get_graph():
+    """Build and compile the graph on first use, not at import."""
+    # Deferred: langgraph's graph/pregel modules dominate import time
+    from langchain_core.runnables import RunnableLambda
+    from langgraph.graph import StateGraph
 
-builder.add_node("agent", agent)
-builder.add_node("tools", tool_node)
+    from common.checkpoint import get_checkpointer
+    from common.metrics import instrument
 
-builder.set_entry_point("agent")
+    builder = StateGraph(AgentState)
 
-builder.add_conditional_edges(
-    "agent",
-    should_continue,
-)
+    builder.add_node("agent", RunnableLambda(agent, afunc=aagent))
+    builder.add_node("tools", RunnableLambda(tools, afunc=atools))
+
+    builder.set_entry_point("agent")
+
+    builder.add_conditional_edges(
+        "agent",
+        should_continue,
+    )
 
-builder.add_edge("tools", "agent")
+    builder.add_edge("tools", "agent")
 
-graph = builder.compile()
+    # Checkpoints every step when CHECKPOINT_BACKEND is set (see common.checkpoint)
+    graph = builder.compile(checkpointer=get_checkpointer())
+    # Per-node latency, LLM calls and tokens (see common.metrics)
+    return instrument(graph, "day03")
+
+
+def __getattr__(name: str):
+    # `module.graph` / `module.registry` still work; built on first access
+    if name == "graph":
+        return get_graph()
+    if name == "registry":
+        return get_registry()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 # -----------------------------
-# 7. Run
+# 8. Run
 # -----------------------------
 if __name__ == "__main__":
+    from langchain_core.messages import AIMessage, HumanMessage
+
+    from common.checkpoint import run_or_resume
+
+    graph = get_graph()
     initial_state = {"messages": [HumanMessage(content="What is the current time?")]}
 
-    result = graph.invoke(initial_state)
-    graph.get_graph().draw_mermaid_png(
-        output_file_path="day03_react_agent/react_agent.png"
-    )
+    # THREAD_ID=<id> resumes that run if it was interrupted
+    result = run_or_resume(graph, initial_state, os.getenv("THREAD_ID"))
 
     for msg in result["messages"]:
         role = msg.__class__.__name__
@@ -1,10 +1,17 @@
+import asyncio
 import os
-from typing import List, Literal, TypedDict
+import time
+from functools import lru_cache
+from typing import Annotated, Literal, TypedDict
 
 from dotenv import load_dotenv
-from langchain_core.messages import AIMessage, HumanMessage
-from langchain_openai import ChatOpenAI
-from langgraph.graph import END, StateGraph
+from langgraph.constants import END
+
+from common.context_budget import ContextBudget
+from common.llm import LazyLLM
+from common.message_log import AppendLog, append_log
+from common.retry import RetryPolicy, is_retryable, retry_after
+from common.routing import Backend, ModelRouter
 
 load_dotenv()
 
@@ -13,34 +20,77 @@ load_dotenv()
 # 1. Define state
 # -----------------------------
 class AgentState(TypedDict):
-    messages: List
+    messages: Annotated[AppendLog, append_log]
     retries: int
     error: str | None
+    retryable: bool
+    retry_after: float | None
 
 
 MAX_RETRIES = 2
+# Prompt budget for each agent call
+MAX_CONTEXT_TOKENS = 16_000
+
+# Fall back to the secondary after this many consecutive primary failures
+FALLBACK_AFTER_FAILURES = 2
+# Demote the primary while its rolling p95 latency exceeds this (seconds)
+LATENCY_BUDGET_P95 = 20.0
+# Fire a hedged call to the secondary after this many seconds (None = off)
+HEDGE_AFTER = None
+
+RETRY_POLICY = RetryPolicy(max_retries=MAX_RETRIES, base_delay=0.5, max_delay=8.0)
 
 
 # -----------------------------
-# 2. LLM
+# 2. LLMs (primary + fallback)
 # -----------------------------
-llm = ChatOpenAI(
-    model="mistralai/devstral-2512:free",
-    base_url="https://openrouter.ai/api/v1",
-    api_key=os.getenv("OPENROUTER_API_KEY"),
-    temperature=0,
+# Client-side retries are off: the graph owns the retry loop
+llm = LazyLLM("openrouter", max_retries=0)
+fallback_llm = LazyLLM("gemini", max_retries=0)
+
+router = ModelRouter(
+    [
+        Backend("devstral", llm, endpoint="openrouter"),
+        Backend("gemini", fallback_llm, endpoint="gemini"),
+    ],
+    failure_threshold=FALLBACK_AFTER_FAILURES,
+    p95_budget=LATENCY_BUDGET_P95,
+    hedge_after=HEDGE_AFTER,
 )
 
+context_budget = ContextBudget(MAX_CONTEXT_TOKENS)
+
 
 # -----------------------------
 # 3. Agent node (can fail)
 # -----------------------------
 def agent(state: AgentState) -> AgentState:
+    # The router skips backends with an open circuit and falls back to
+    # the secondary when the primary is failing or too slow
     try:
-        response = llm.invoke(state["messages"])
-        return {"messages": state["messages"] + [response], "error": None}
+        response = router.invoke(context_budget.fit(state["messages"]))
     except Exception as e:
-        return {"messages": state["messages"], "error": str(e)}
+        return failure(e)
+
+    # Return just the new message - the reducer appends it in O(1)
+    return {"messages": [response], "error": None}
+
+
+async def aagent(state: AgentState) -> AgentState:
+    try:
+        response = await router.ainvoke(context_budget.fit(state["messages"]))
+    except Exception as e:
+        return failure(e)
+
+    return {"messages": [response], "error": None}
+
+
+def failure(error: Exception) -> AgentState:
+    return {
+        "error": str(error),
+        "retryable": is_retryable(error),
+        "retry_after": retry_after(error),
+    }
 
 
 # -----------------------------
@@ -50,7 +100,11 @@ def decide_next_step(state: AgentState) -> Literal["retry", END]:
     if state["error"] is None:
         return END
 
-    if state["retries"] >= MAX_RETRIES:
+    # Fatal errors (auth, bad request, open circuit) are never retried
+    if not state["retryable"]:
+        return END
+
+    if state["retries"] >= RETRY_POLICY.max_retries:
         return END
 
     return "retry"
@@ -60,42 +114,77 @@ def decide_next_step(state: AgentState) -> Literal["retry", END]:
 # 5. Retry node
 # -----------------------------
 def retry(state: AgentState) -> AgentState:
+    # Exponential backoff with jitter, never sooner than Retry-After
+    time.sleep(RETRY_POLICY.delay(state["retries"], state["retry_after"]))
+    return {"retries": state["retries"] + 1}
+
+
+async def aretry(state: AgentState) -> AgentState:
+    await asyncio.sleep(RETRY_POLICY.delay(state["retries"], state["retry_after"]))
     return {"retries": state["retries"] + 1}
 
 
 # -----------------------------
 # 6. Build graph
 # -----------------------------
-builder = StateGraph(AgentState)
+@lru_cache(maxsize=None)
+def get_graph():
+    """Build and compile the graph on first use, not at import."""
+    # Deferred: langgraph's graph/pregel modules dominate import time
+    from langchain_core.runnables import RunnableLambda
+    from langgraph.graph import StateGraph
+
+    from common.checkpoint import get_checkpointer
+    from common.metrics import instrument
 
-builder.add_node("agent", agent)
-builder.add_node("retry", retry)
+    builder = StateGraph(AgentState)
 
-builder.set_entry_point("agent")
+    # Sync implementations serve graph.invoke, async ones graph.ainvoke
+    builder.add_node("agent", RunnableLambda(agent, afunc=aagent))
+    builder.add_node("retry", RunnableLambda(retry, afunc=aretry))
 
-builder.add_conditional_edges("agent", decide_next_step, {"retry": "retry", END: END})
+    builder.set_entry_point("agent")
 
-builder.add_edge("retry", "agent")
+    builder.add_conditional_edges(
+        "agent", decide_next_step, {"retry": "retry", END: END}
+    )
 
-graph = builder.compile()
+    builder.add_edge("retry", "agent")
+
+    # Checkpoints every step when CHECKPOINT_BACKEND is set (see common.checkpoint)
+    graph = builder.compile(checkpointer=get_checkpointer())
+    # Per-node latency, LLM calls and tokens (see common.metrics)
+    return instrument(graph, "day04")
+
+
+def __getattr__(name: str):
+    # `module.graph` still works; it is built on first access
+    if name == "graph":
+        return get_graph()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 # -----------------------------
 # 7. Run
 # -----------------------------
 if __name__ == "__main__":
+    from langchain_core.messages import AIMessage, HumanMessage
+
+    from common.checkpoint import run_or_resume
+
+    graph = get_graph()
     initial_state = {
         "messages": [
             HumanMessage(content="Explain why retries are dangerous in agent systems.")
         ],
         "retries": 0,
         "error": None,
+        "retryable": False,
+        "retry_after": None,
     }
 
-    result = graph.invoke(initial_state)
-    graph.get_graph().draw_mermaid_png(
-        output_file_path="day04_fault_tolerance/fault_tolerant_agent.png"
-    )
+    # THREAD_ID=<id> resumes that run if it was interrupted
+    result = run_or_resume(graph, initial_state, os.getenv("THREAD_ID"))
 
     print("Retries:", result["retries"])
 
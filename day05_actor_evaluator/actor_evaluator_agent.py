@@ -1,10 +1,15 @@
+import asyncio
 import os
-from typing import List, Literal, TypedDict
+from functools import lru_cache
+from typing import Annotated, Literal, TypedDict
 
 from dotenv import load_dotenv
-from langchain_core.messages import AIMessage, HumanMessage
-from langchain_openai import ChatOpenAI
-from langgraph.graph import END, StateGraph
+from langgraph.constants import END, START
+
+from common.context_budget import ContextBudget, summarize_with
+from common.llm import LazyLLM
+from common.message_log import AppendLog, append_log
+from common.verdicts import aask_score, aask_scores, ask_score, ask_scores
 
 load_dotenv()
 
@@ -12,31 +17,40 @@ load_dotenv()
 # -----------------------------
 # 1. Define state
 # -----------------------------
+def candidate_pool(left: list | None, right: list | None) -> list:
+    """Reducer: parallel drafts accumulate; ``None`` empties the pool."""
+    if right is None:
+        return []
+    return (left or []) + right
+
+
 class AgentState(TypedDict):
-    messages: List
+    messages: Annotated[AppendLog, append_log]
     score: int
     iterations: int
+    # Best-of-N drafts awaiting evaluation
+    candidates: Annotated[list, candidate_pool]
 
 
 MAX_ITERATIONS = 2
 QUALITY_THRESHOLD = 7
+# Drafts generated in parallel per round; >1 multiplies actor calls
+BEST_OF_N = int(os.getenv("BEST_OF_N", "1"))
+# Prompt budget for each actor call
+MAX_CONTEXT_TOKENS = 16_000
 
 
 # -----------------------------
 # 2. LLMs (separate roles)
 # -----------------------------
-actor_llm = ChatOpenAI(
-    model="mistralai/devstral-2512:free",
-    base_url="https://openrouter.ai/api/v1",
-    api_key=os.getenv("OPENROUTER_API_KEY"),
-    temperature=0.7,
-)
+# Both roles share one connection pool; only the sampling differs
+actor_llm = LazyLLM(temperature=0.7)
+
+evaluator_llm = LazyLLM()
 
-evaluator_llm = ChatOpenAI(
-    model="mistralai/devstral-2512:free",
-    base_url="https://openrouter.ai/api/v1",
-    api_key=os.getenv("OPENROUTER_API_KEY"),
-    temperature=0,
+# Older drafts are summarized rather than dropped outright
+context_budget = ContextBudget(
+    MAX_CONTEXT_TOKENS, summarizer=summarize_with(evaluator_llm)
 )
 
 
@@ -44,36 +58,95 @@ evaluator_llm = ChatOpenAI(
 # 3. Actor node (generation)
 # -----------------------------
 def actor(state: AgentState) -> AgentState:
-    prompt = state["messages"]
+    # Keep the question and the latest drafts/critiques within budget
+    prompt = context_budget.fit(state["messages"])
 
     response = actor_llm.invoke(prompt)
 
-    return {"messages": state["messages"] + [response]}
+    return {"messages": [response]}
+
+
+async def aactor(state: AgentState) -> AgentState:
+    # Budgeting may call the summarizer, which is blocking
+    prompt = await asyncio.to_thread(context_budget.fit, state["messages"])
+
+    response = await actor_llm.ainvoke(prompt)
+
+    return {"messages": [response]}
+
+
+def fan_out(state: AgentState) -> list:
+    # One `actor` task per draft, all in the same step
+    from langgraph.types import Send
+
+    return [Send("actor", {"messages": state["messages"]}) for _ in range(BEST_OF_N)]
+
+
+def draft(state: AgentState) -> AgentState:
+    # Drafts go to the candidate pool, not the transcript
+    return {"candidates": actor(state)["messages"]}
+
+
+async def adraft(state: AgentState) -> AgentState:
+    return {"candidates": (await aactor(state))["messages"]}
 
 
 # -----------------------------
 # 4. Evaluator node (judgment)
 # -----------------------------
-def evaluator(state: AgentState) -> AgentState:
-    last_answer = state["messages"][-1].content
+def score_prompt(answer: str) -> list:
+    from langchain_core.messages import HumanMessage
 
-    eval_prompt = [
+    return [
         HumanMessage(
             content=(
                 "You are an evaluator. Score the answer from 1–10 "
                 "based on correctness, clarity, and completeness.\n\n"
-                f"Answer:\n{last_answer}\n\n"
+                f"Answer:\n{answer}\n\n"
                 "Respond with only a number."
             )
         )
     ]
 
-    score_msg = evaluator_llm.invoke(eval_prompt)
-    score = int(score_msg.content.strip())
+
+def evaluator_prompt(state: AgentState) -> list:
+    return score_prompt(state["messages"][-1].content)
+
+
+def evaluator(state: AgentState) -> AgentState:
+    # Structured score with lenient fallback ("8/10", "Score: 8")
+    score = ask_score(evaluator_llm, evaluator_prompt(state))
+
+    return {"score": score}
+
+
+async def aevaluator(state: AgentState) -> AgentState:
+    score = await aask_score(evaluator_llm, evaluator_prompt(state))
 
     return {"score": score}
 
 
+def pick_best(candidates: list, scores: list) -> AgentState:
+    # Only the winning draft enters the transcript; the pool is emptied
+    best = max(range(len(candidates)), key=scores.__getitem__)
+
+    return {"messages": [candidates[best]], "score": scores[best], "candidates": None}
+
+
+def evaluate_candidates(state: AgentState) -> AgentState:
+    # All drafts are scored concurrently in one batch
+    prompts = [score_prompt(c.content) for c in state["candidates"]]
+
+    return pick_best(state["candidates"], ask_scores(evaluator_llm, prompts))
+
+
+async def aevaluate_candidates(state: AgentState) -> AgentState:
+    prompts = [score_prompt(c.content) for c in state["candidates"]]
+    scores = await aask_scores(evaluator_llm, prompts)
+
+    return pick_best(state["candidates"], scores)
+
+
 # -----------------------------
 # 5. Decide whether to revise
 # -----------------------------
@@ -91,13 +164,15 @@ def should_continue(state: AgentState) -> Literal["revise", END]:
 # 6. Revision node
 # -----------------------------
 def revise(state: AgentState) -> AgentState:
+    from langchain_core.messages import HumanMessage
+
     critique = (
         f"The previous answer scored {state['score']}/10. "
         "Improve clarity, correctness, and completeness."
     )
 
     return {
-        "messages": state["messages"] + [HumanMessage(content=critique)],
+        "messages": [HumanMessage(content=critique)],
         "iterations": state["iterations"] + 1,
     }
 
@@ -105,29 +180,70 @@ def revise(state: AgentState) -> AgentState:
 # -----------------------------
 # 7. Build graph
 # -----------------------------
-builder = StateGraph(AgentState)
-
-builder.add_node("actor", actor)
-builder.add_node("evaluator", evaluator)
-builder.add_node("revise", revise)
+@lru_cache(maxsize=None)
+def get_graph():
+    """Build and compile the graph on first use, not at import."""
+    # Deferred: langgraph's graph/pregel modules dominate import time
+    from langchain_core.runnables import RunnableLambda
+    from langgraph.graph import StateGraph
+
+    from common.checkpoint import get_checkpointer
+    from common.metrics import instrument
+
+    builder = StateGraph(AgentState)
+
+    # Sync implementations serve graph.invoke, async ones graph.ainvoke
+    if BEST_OF_N > 1:
+        # Best-of-N: every round fans out N drafts in parallel, scores
+        # them in one batch and revises only if even the best one fails
+        builder.add_node("actor", RunnableLambda(draft, afunc=adraft))
+        builder.add_node(
+            "evaluator",
+            RunnableLambda(evaluate_candidates, afunc=aevaluate_candidates),
+        )
+        builder.add_conditional_edges(START, fan_out, ["actor"])
+        builder.add_conditional_edges("revise", fan_out, ["actor"])
+    else:
+        builder.add_node("actor", RunnableLambda(actor, afunc=aactor))
+        builder.add_node("evaluator", RunnableLambda(evaluator, afunc=aevaluator))
+        builder.set_entry_point("actor")
+        builder.add_edge("revise", "actor")
+    builder.add_node("revise", revise)
+
+    builder.add_edge("actor", "evaluator")
+
+    builder.add_conditional_edges(
+        "evaluator", should_continue, {"revise": "revise", END: END}
+    )
 
-builder.set_entry_point("actor")
+    # Checkpoints every step when CHECKPOINT_BACKEND is set (see common.checkpoint)
+    graph = builder.compile(checkpointer=get_checkpointer())
+    # Per-node latency, LLM calls and tokens (see common.metrics)
+    return instrument(graph, "day05")
 
-builder.add_edge("actor", "evaluator")
 
-builder.add_conditional_edges(
-    "evaluator", should_continue, {"revise": "revise", END: END}
-)
+def __getattr__(name: str):
+    # `module.graph` still works; it is built on first access
+    if name == "graph":
+        return get_graph()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
-builder.add_edge("revise", "actor")
 
-graph = builder.compile()
+# Nodes whose model output is forwarded token by token
+# (see common.streaming / common.sse_server). Parallel best-of-N drafts
+# would interleave their tokens in one stream, so they are not streamed
+STREAM_NODES = {"actor"} if BEST_OF_N == 1 else set()
 
 
 # -----------------------------
 # 8. Run
 # -----------------------------
 if __name__ == "__main__":
+    from langchain_core.messages import AIMessage, HumanMessage
+
+    from common.checkpoint import run_or_resume
+
+    graph = get_graph()
     initial_state = {
         "messages": [
             HumanMessage(content="Explain why retries are dangerous in agent systems.")
@@ -136,10 +252,8 @@ if __name__ == "__main__":
         "iterations": 0,
     }
 
-    result = graph.invoke(initial_state)
-    graph.get_graph().draw_mermaid_png(
-        output_file_path="day05_actor_evaluator/actor_evaluator_agent.png"
-    )
+    # THREAD_ID=<id> resumes that run if it was interrupted
+    result = run_or_resume(graph, initial_state, os.getenv("THREAD_ID"))
 
     print(f"\nFinal score: {result['score']}\n")
 
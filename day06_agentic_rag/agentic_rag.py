@@ -1,11 +1,23 @@
+import asyncio
 import os
-from typing import List, Literal, TypedDict
+from functools import lru_cache
+from typing import TYPE_CHECKING, List, Literal, TypedDict
 
 from dotenv import load_dotenv
-from langchain_core.documents import Document
-from langchain_core.messages import HumanMessage
-from langchain_openai import ChatOpenAI
-from langgraph.graph import END, StateGraph
+from langgraph.constants import END
+
+from common import vector_store
+from common.grading import (
+    agrade_documents_concurrently,
+    grade_documents_concurrently,
+)
+from common.hybrid import hybrid_search
+from common.llm import LazyLLM
+from common.prefilter import prefilter_documents
+from common.web_search import asearch_documents, search_documents
+
+if TYPE_CHECKING:
+    from langchain_core.documents import Document
 
 load_dotenv()
 
@@ -15,67 +27,119 @@ load_dotenv()
 # -----------------------------
 class GraphState(TypedDict):
     question: str
-    documents: List[Document]
+    # List[Document]; LangGraph evaluates these hints when the graph is
+    # built, and Document is only imported for type checking
+    documents: list
     answer: str
     needs_web_search: bool
+    filters: dict | None
+
+
+TOP_K = 4
+GRADING_CONCURRENCY = 4
+# Stop grading once this many documents have passed
+MIN_RELEVANT_DOCS = 2
+
+
+# Seed corpus so the demo has something to retrieve on a fresh index;
+# load a real corpus with `python -m common.ingest <dir>`
+@lru_cache(maxsize=None)
+def seed_documents() -> List["Document"]:
+    from langchain_core.documents import Document
+
+    return [
+        Document(
+            page_content="Agent memory allows LLM agents to retain context across steps.",
+            metadata={"source": "seed"},
+        )
+    ]
 
 
 # -----------------------------
 # 2. LLM
 # -----------------------------
-llm = ChatOpenAI(
-    model="mistralai/devstral-2512:free",
-    base_url="https://openrouter.ai/api/v1",
-    api_key=os.getenv("OPENROUTER_API_KEY"),
-    temperature=0,
-)
+llm = LazyLLM()
 
 
 # -----------------------------
-# 3. Retrieve node (vector store stub)
+# 3. Retrieve node (BM25 + Chroma vector store)
 # -----------------------------
 def retrieve(state: GraphState) -> GraphState:
-    # Simulated vector store retrieval
-    docs = [
-        Document(
-            page_content="Agent memory allows LLM agents to retain context across steps."
-        )
-    ]
+    # Hybrid top-k against the persistent collection, optionally filtered
+    # on metadata, e.g. {"source": "handbook.md"}; exact-term matches the
+    # embeddings miss no longer fall through to web_search
+    docs = hybrid_search(state["question"], k=TOP_K, where=state.get("filters"))
 
     return {"documents": docs, "needs_web_search": False}
 
 
+async def aretrieve(state: GraphState) -> GraphState:
+    # Chroma's client is blocking; keep it off the event loop
+    return await asyncio.to_thread(retrieve, state)
+
+
 # -----------------------------
 # 4. Relevance grading node
 # -----------------------------
 def grade_documents(state: GraphState) -> GraphState:
-    question = state["question"]
-    docs = state["documents"]
-
-    grading_prompt = (
-        "Determine if the following documents are relevant "
-        "to answering the question.\n\n"
-        f"Question: {question}\n\n"
-        f"Documents: {[d.page_content for d in docs]}\n\n"
-        "Respond with YES or NO."
-    )
+    # Cheap local scoring settles the obvious hits and misses; only cosine
+    # scores between common.prefilter's bands go to the LLM
+    bands = prefilter_documents(state["question"], state["documents"])
+
+    # Grade the ambiguous rest separately and in parallel, keeping only the
+    # relevant ones so a single bad chunk can't sink the whole batch
+    still_needed = MIN_RELEVANT_DOCS - len(bands.accepted)
+    graded = []
+    if still_needed > 0:
+        graded = grade_documents_concurrently(
+            llm,
+            state["question"],
+            bands.ambiguous,
+            max_concurrency=GRADING_CONCURRENCY,
+            min_relevant=still_needed,
+        )
+
+    return _keep_relevant(state["documents"], bands.accepted + graded)
+
+
+async def agrade_documents(state: GraphState) -> GraphState:
+    bands = prefilter_documents(state["question"], state["documents"])
+
+    still_needed = MIN_RELEVANT_DOCS - len(bands.accepted)
+    graded = []
+    if still_needed > 0:
+        graded = await agrade_documents_concurrently(
+            llm,
+            state["question"],
+            bands.ambiguous,
+            max_concurrency=GRADING_CONCURRENCY,
+            min_relevant=still_needed,
+        )
 
-    result = llm.invoke(grading_prompt)
+    return _keep_relevant(state["documents"], bands.accepted + graded)
 
-    needs_web_search = result.content.strip().upper() != "YES"
 
-    return {"needs_web_search": needs_web_search}
+def _keep_relevant(docs: List["Document"], relevant: List["Document"]) -> GraphState:
+    # Preserve retrieval order
+    keep = {id(doc) for doc in relevant}
+    relevant = [doc for doc in docs if id(doc) in keep]
+
+    return {"documents": relevant, "needs_web_search": not relevant}
 
 
 # -----------------------------
-# 5. Web search fallback node (stub)
+# 5. Web search fallback node
 # -----------------------------
 def web_search(state: GraphState) -> GraphState:
-    docs = state["documents"] + [
-        Document(
-            page_content="Web search: Agent memory is a mechanism to store and recall intermediate reasoning steps."
-        )
-    ]
+    # Tavily when TAVILY_API_KEY is set, a local stand-in otherwise;
+    # results are cached and pages fetched in parallel (common.web_search)
+    docs = state["documents"] + search_documents(state["question"])
+
+    return {"documents": docs}
+
+
+async def aweb_search(state: GraphState) -> GraphState:
+    docs = state["documents"] + await asearch_documents(state["question"])
 
     return {"documents": docs}
 
@@ -83,16 +147,24 @@ def web_search(state: GraphState) -> GraphState:
 # -----------------------------
 # 6. Generate answer node
 # -----------------------------
-def generate(state: GraphState) -> GraphState:
+def generate_prompt(state: GraphState) -> str:
     context = "\n".join(doc.page_content for doc in state["documents"])
 
-    prompt = (
+    return (
         f"Answer the question using the context below.\n\n"
         f"Context:\n{context}\n\n"
         f"Question:\n{state['question']}"
     )
 
-    answer = llm.invoke(prompt).content
+
+def generate(state: GraphState) -> GraphState:
+    answer = llm.invoke(generate_prompt(state)).content
+
+    return {"answer": answer}
+
+
+async def agenerate(state: GraphState) -> GraphState:
+    answer = (await llm.ainvoke(generate_prompt(state))).content
 
     return {"answer": answer}
 
@@ -109,45 +181,80 @@ def decide_next_step(state: GraphState) -> Literal["web_search", "generate"]:
 # -----------------------------
 # 8. Build graph
 # -----------------------------
-builder = StateGraph(GraphState)
+@lru_cache(maxsize=None)
+def get_graph():
+    """Build and compile the graph on first use, not at import."""
+    # Deferred: langgraph's graph/pregel modules dominate import time
+    from langchain_core.runnables import RunnableLambda
+    from langgraph.graph import StateGraph
+
+    from common.checkpoint import get_checkpointer
+    from common.metrics import instrument
+
+    builder = StateGraph(GraphState)
+
+    # Each node has a sync and an async implementation: graph.invoke uses the
+    # former, graph.ainvoke/astream the latter
+    builder.add_node("retrieve", RunnableLambda(retrieve, afunc=aretrieve))
+    builder.add_node(
+        "grade_documents", RunnableLambda(grade_documents, afunc=agrade_documents)
+    )
+    builder.add_node("web_search", RunnableLambda(web_search, afunc=aweb_search))
+    builder.add_node("generate", RunnableLambda(generate, afunc=agenerate))
 
-builder.add_node("retrieve", retrieve)
-builder.add_node("grade_documents", grade_documents)
-builder.add_node("web_search", web_search)
-builder.add_node("generate", generate)
+    builder.set_entry_point("retrieve")
 
-builder.set_entry_point("retrieve")
+    builder.add_edge("retrieve", "grade_documents")
 
-builder.add_edge("retrieve", "grade_documents")
+    builder.add_conditional_edges(
+        "grade_documents",
+        decide_next_step,
+        {"web_search": "web_search", "generate": "generate"},
+    )
 
-builder.add_conditional_edges(
-    "grade_documents",
-    decide_next_step,
-    {"web_search": "web_search", "generate": "generate"},
-)
+    builder.add_edge("web_search", "generate")
+    builder.add_edge("generate", END)
 
-builder.add_edge("web_search", "generate")
-builder.add_edge("generate", END)
+    # Checkpoints every step when CHECKPOINT_BACKEND is set (see common.checkpoint)
+    graph = builder.compile(checkpointer=get_checkpointer())
+    # Per-node latency, LLM calls and tokens (see common.metrics)
+    return instrument(graph, "day06")
 
-graph = builder.compile()
+
+def __getattr__(name: str):
+    # `module.graph` / `module.SEED_DOCUMENTS` still work; built on first access
+    if name == "graph":
+        return get_graph()
+    if name == "SEED_DOCUMENTS":
+        return seed_documents()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+# Nodes whose model output is forwarded token by token
+# (see common.streaming / common.sse_server)
+STREAM_NODES = {"generate"}
 
 
 # -----------------------------
 # 9. Run
 # -----------------------------
 if __name__ == "__main__":
+    from common.checkpoint import run_or_resume
+
+    graph = get_graph()
     initial_state = {
         "question": "What is agent memory?",
         "documents": [],
         "answer": "",
         "needs_web_search": False,
+        "filters": None,
     }
 
-    result = graph.invoke(initial_state)
+    if vector_store.get_collection().count() == 0:
+        vector_store.add_documents(seed_documents())
 
-    graph.get_graph().draw_mermaid_png(
-        output_file_path="day06_agentic_rag/agentic_rag.png"
-    )
+    # THREAD_ID=<id> resumes that run if it was interrupted
+    result = run_or_resume(graph, initial_state, os.getenv("THREAD_ID"))
 
     print("\nFinal Answer:\n")
     print(result["answer"])
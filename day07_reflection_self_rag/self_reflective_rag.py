@@ -1,10 +1,24 @@
+import asyncio
 import os
-from typing import List, Literal, TypedDict
+from functools import lru_cache
+from typing import TYPE_CHECKING, List, Literal, TypedDict
 
 from dotenv import load_dotenv
-from langchain_core.documents import Document
-from langchain_openai import ChatOpenAI
-from langgraph.graph import END, StateGraph
+from langgraph.constants import END
+
+from common import vector_store
+from common.grounding import (
+    answer_grounding,
+    aspeculative_generate,
+    speculative_generate,
+)
+from common.hybrid import hybrid_search
+from common.llm import LazyLLM
+from common.prefilter import cosine_scores
+from common.verdicts import aask_yes_no, ask_yes_no
+
+if TYPE_CHECKING:
+    from langchain_core.documents import Document
 
 load_dotenv()
 
@@ -14,74 +28,157 @@ load_dotenv()
 # -----------------------------
 class GraphState(TypedDict):
     question: str
-    documents: List[Document]
+    # List[Document]; LangGraph evaluates these hints when the graph is
+    # built, and Document is only imported for type checking
+    documents: list
     answer: str
     grounded: bool
+    # Set when grounding was verified during generation
+    verified: bool
     iterations: int
 
 
 MAX_ITERATIONS = 2
+TOP_K = 4
+# Local answer/context similarity bands; only scores in between go to the LLM
+GROUNDED_ACCEPT = 0.8
+GROUNDED_REJECT = 0.05
+# Opt-in: verify sentences while the answer streams and stop at the
+# first unsupported one instead of running a separate reflect round trip
+SPECULATIVE_GROUNDING = os.getenv("SPECULATIVE_GROUNDING", "0") == "1"
+
+
+# Seed corpus so the demo has something to retrieve on a fresh index;
+# load a real corpus with `python -m common.ingest <dir>`
+@lru_cache(maxsize=None)
+def seed_documents() -> List["Document"]:
+    from langchain_core.documents import Document
+
+    return [
+        Document(
+            page_content="Agent memory allows LLM agents to store and recall intermediate information across steps.",
+            metadata={"source": "seed"},
+        )
+    ]
 
 
 # -----------------------------
 # 2. LLM
 # -----------------------------
-llm = ChatOpenAI(
-    model="mistralai/devstral-2512:free",
-    base_url="https://openrouter.ai/api/v1",
-    api_key=os.getenv("OPENROUTER_API_KEY"),
-    temperature=0,
-)
+llm = LazyLLM()
 
 
 # -----------------------------
-# 3. Retrieve node (stub)
+# 3. Retrieve node (BM25 + Chroma vector store)
 # -----------------------------
 def retrieve(state: GraphState) -> GraphState:
-    docs = [
-        Document(
-            page_content="Agent memory allows LLM agents to store and recall intermediate information across steps."
-        )
-    ]
+    # Better top-k up front means fewer regenerate loops later
+    docs = hybrid_search(state["question"], k=TOP_K)
 
     return {"documents": docs}
 
 
+async def aretrieve(state: GraphState) -> GraphState:
+    # Chroma's client is blocking; keep it off the event loop
+    return await asyncio.to_thread(retrieve, state)
+
+
 # -----------------------------
 # 4. Generate answer
 # -----------------------------
-def generate(state: GraphState) -> GraphState:
+def generate_prompt(state: GraphState) -> str:
     context = "\n".join(doc.page_content for doc in state["documents"])
 
-    prompt = (
+    return (
         "Answer the question using ONLY the context below.\n\n"
         f"Context:\n{context}\n\n"
         f"Question:\n{state['question']}"
     )
 
-    answer = llm.invoke(prompt).content
 
-    return {"answer": answer}
+def can_retry(iterations: int) -> bool:
+    # Aborting only pays off if there is a regeneration left to run
+    return iterations < MAX_ITERATIONS
+
+
+def generate(state: GraphState) -> GraphState:
+    if SPECULATIVE_GROUNDING:
+        result = speculative_generate(
+            llm,
+            generate_prompt(state),
+            state["documents"],
+            abort_early=can_retry(state["iterations"]),
+        )
+        return {"answer": result.answer, "grounded": result.grounded, "verified": True}
+
+    answer = llm.invoke(generate_prompt(state)).content
+
+    return {"answer": answer, "verified": False}
+
+
+async def agenerate(state: GraphState) -> GraphState:
+    if SPECULATIVE_GROUNDING:
+        result = await aspeculative_generate(
+            llm,
+            generate_prompt(state),
+            state["documents"],
+            abort_early=can_retry(state["iterations"]),
+        )
+        return {"answer": result.answer, "grounded": result.grounded, "verified": True}
+
+    answer = (await llm.ainvoke(generate_prompt(state))).content
+
+    return {"answer": answer, "verified": False}
 
 
 # -----------------------------
 # 5. Reflection / grounding check
 # -----------------------------
-def reflect(state: GraphState) -> GraphState:
-    prompt = (
+def local_grounding(state: GraphState) -> bool | None:
+    """Settle clear-cut cases locally; ``None`` means ask the LLM."""
+    # Every sentence clearly supported (or one clearly not) by word overlap
+    grounded = answer_grounding(state["answer"], state["documents"])
+    if grounded is not None:
+        return grounded
+
+    context = "\n".join(doc.page_content for doc in state["documents"])
+    similarity = cosine_scores(state["answer"], [context])[0]
+
+    if similarity >= GROUNDED_ACCEPT:
+        return True
+    if similarity < GROUNDED_REJECT:
+        return False
+    return None
+
+
+def reflect_prompt(state: GraphState) -> str:
+    return (
         "Check whether the answer is fully grounded in the provided context.\n\n"
         f"Context:\n{[d.page_content for d in state['documents']]}\n\n"
         f"Answer:\n{state['answer']}\n\n"
         "Respond with YES or NO."
     )
 
-    result = llm.invoke(prompt).content.strip().upper()
 
-    grounded = result == "YES"
+def reflect(state: GraphState) -> GraphState:
+    # Clear-cut cases skip the LLM round trip
+    grounded = local_grounding(state)
+    if grounded is not None:
+        return {"grounded": grounded}
+
+    grounded = ask_yes_no(llm, reflect_prompt(state))
 
     return {"grounded": grounded}
 
 
+async def areflect(state: GraphState) -> GraphState:
+    grounded = local_grounding(state)
+    if grounded is not None:
+        return {"grounded": grounded}
+
+    return {"grounded": await aask_yes_no(llm, reflect_prompt(state))}
+
+
 # -----------------------------
 # 6. Decide next step
 # -----------------------------
@@ -95,66 +192,150 @@ def decide_next_step(state: GraphState) -> Literal["regenerate", END]:
     return "regenerate"
 
 
+def after_generation(state: GraphState) -> Literal["reflect", "regenerate", END]:
+    # Speculative generation already checked grounding; skip reflect
+    if state.get("verified"):
+        return decide_next_step(state)
+
+    return "reflect"
+
+
 # -----------------------------
 # 7. Regeneration node
 # -----------------------------
-def regenerate(state: GraphState) -> GraphState:
+def regenerate_prompt(state: GraphState) -> str:
     critique = (
         "The previous answer was not fully grounded in the context. "
         "Regenerate a grounded answer using only the provided documents."
     )
 
-    revised_prompt = (
+    return (
         f"{critique}\n\n"
         f"Context:\n{[d.page_content for d in state['documents']]}\n\n"
         f"Question:\n{state['question']}"
     )
 
-    answer = llm.invoke(revised_prompt).content
 
-    return {"answer": answer, "iterations": state["iterations"] + 1}
+def regenerate(state: GraphState) -> GraphState:
+    iterations = state["iterations"] + 1
+
+    if SPECULATIVE_GROUNDING:
+        result = speculative_generate(
+            llm,
+            regenerate_prompt(state),
+            state["documents"],
+            abort_early=can_retry(iterations),
+        )
+        return {
+            "answer": result.answer,
+            "grounded": result.grounded,
+            "verified": True,
+            "iterations": iterations,
+        }
+
+    answer = llm.invoke(regenerate_prompt(state)).content
+
+    return {"answer": answer, "verified": False, "iterations": iterations}
+
+
+async def aregenerate(state: GraphState) -> GraphState:
+    iterations = state["iterations"] + 1
+
+    if SPECULATIVE_GROUNDING:
+        result = await aspeculative_generate(
+            llm,
+            regenerate_prompt(state),
+            state["documents"],
+            abort_early=can_retry(iterations),
+        )
+        return {
+            "answer": result.answer,
+            "grounded": result.grounded,
+            "verified": True,
+            "iterations": iterations,
+        }
+
+    answer = (await llm.ainvoke(regenerate_prompt(state))).content
+
+    return {"answer": answer, "verified": False, "iterations": iterations}
 
 
 # -----------------------------
 # 8. Build graph
 # -----------------------------
-builder = StateGraph(GraphState)
+@lru_cache(maxsize=None)
+def get_graph():
+    """Build and compile the graph on first use, not at import."""
+    # Deferred: langgraph's graph/pregel modules dominate import time
+    from langchain_core.runnables import RunnableLambda
+    from langgraph.graph import StateGraph
 
-builder.add_node("retrieve", retrieve)
-builder.add_node("generate", generate)
-builder.add_node("reflect", reflect)
-builder.add_node("regenerate", regenerate)
+    from common.checkpoint import get_checkpointer
+    from common.metrics import instrument
 
-builder.set_entry_point("retrieve")
+    builder = StateGraph(GraphState)
 
-builder.add_edge("retrieve", "generate")
-builder.add_edge("generate", "reflect")
+    # Each node has a sync and an async implementation: graph.invoke uses the
+    # former, graph.ainvoke/astream the latter
+    builder.add_node("retrieve", RunnableLambda(retrieve, afunc=aretrieve))
+    builder.add_node("generate", RunnableLambda(generate, afunc=agenerate))
+    builder.add_node("reflect", RunnableLambda(reflect, afunc=areflect))
+    builder.add_node("regenerate", RunnableLambda(regenerate, afunc=aregenerate))
 
-builder.add_conditional_edges(
-    "reflect", decide_next_step, {"regenerate": "regenerate", END: END}
-)
+    builder.set_entry_point("retrieve")
+
+    builder.add_edge("retrieve", "generate")
+
+    routes = {"reflect": "reflect", "regenerate": "regenerate", END: END}
+    builder.add_conditional_edges("generate", after_generation, routes)
+
+    builder.add_conditional_edges(
+        "reflect", decide_next_step, {"regenerate": "regenerate", END: END}
+    )
 
-builder.add_edge("regenerate", "reflect")
+    builder.add_conditional_edges("regenerate", after_generation, routes)
 
-graph = builder.compile()
+    # Checkpoints every step when CHECKPOINT_BACKEND is set (see common.checkpoint)
+    graph = builder.compile(checkpointer=get_checkpointer())
+    # Per-node latency, LLM calls and tokens (see common.metrics)
+    return instrument(graph, "day07")
+
+
+def __getattr__(name: str):
+    # `module.graph` / `module.SEED_DOCUMENTS` still work; built on first access
+    if name == "graph":
+        return get_graph()
+    if name == "SEED_DOCUMENTS":
+        return seed_documents()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+# Nodes whose model output is forwarded token by token
+# (see common.streaming / common.sse_server)
+STREAM_NODES = {"generate", "regenerate"}
 
 
 # -----------------------------
 # 9. Run
 # -----------------------------
 if __name__ == "__main__":
+    from common.checkpoint import run_or_resume
+
+    graph = get_graph()
     initial_state = {
         "question": "What is agent memory?",
         "documents": [],
         "answer": "",
         "grounded": False,
+        "verified": False,
         "iterations": 0,
     }
 
-    result = graph.invoke(initial_state)
-    graph.get_graph().draw_mermaid_png(
-        output_file_path="day07_reflection_self_rag/self_reflective_rag.png"
-    )
+    if vector_store.get_collection().count() == 0:
+        vector_store.add_documents(seed_documents())
+
+    # THREAD_ID=<id> resumes that run if it was interrupted
+    result = run_or_resume(graph, initial_state, os.getenv("THREAD_ID"))
 
     print("\nFinal Answer:\n")
     print(result["answer"])
@@ -1,5 +1,156 @@
-def main():
-    print("Hello from agentic-ai-30-days!")
+"""Run any day0x graph over a JSONL file of input states.
+
+    python main.py --list
+    python main.py day06 questions.jsonl -o answers.jsonl --concurrency 16
+    cat states.jsonl | python main.py day01 - --timeout 60
+
+Each input line is one JSON object, the graph's initial state;
+``{"role": "user", "content": ...}`` entries under ``messages`` become
+chat messages. Lines are read lazily and run concurrently
+(``common.batch``); each result is written as soon as its run finishes,
+in completion order:
+
+    {"index": 3, "ok": true, "elapsed": 1.92, "output": {...}}
+    {"index": 1, "ok": false, "elapsed": 60.0, "error": "timed out"}
+
+``index`` is the 0-based line number among non-blank input lines. A
+summary (count, failures, throughput, latency percentiles) goes to
+stderr; ``--metrics PATH`` also writes per-node Prometheus metrics
+(``common.metrics``).
+"""
+
+import argparse
+import asyncio
+import json
+import statistics
+import sys
+import time
+from contextlib import ExitStack
+from typing import AsyncIterator, List, TextIO
+
+from common.graphs import GRAPH_MODULES, get_graph, input_state
+
+
+# -----------------------------
+# 1. Streamed JSONL input/output
+# -----------------------------
+async def read_jsonl(f: TextIO) -> AsyncIterator[dict]:
+    # Read in a worker thread: a slow pipe must not stall runs in flight
+    lineno = 0
+    while line := await asyncio.to_thread(f.readline):
+        lineno += 1
+        if not line.strip():
+            continue
+        try:
+            item = json.loads(line)
+        except ValueError as e:
+            raise ValueError(f"line {lineno}: invalid JSON: {e}") from None
+        if not isinstance(item, dict):
+            raise ValueError(f"line {lineno}: expected a JSON object")
+        yield input_state(item)
+
+
+def result_record(result) -> dict:
+    from common.streaming import to_jsonable
+
+    record = {
+        "index": result.index,
+        "ok": result.ok,
+        "elapsed": round(result.elapsed, 4),
+    }
+    if result.ok:
+        record["output"] = to_jsonable(result.output)
+    else:
+        record["error"] = result.error
+    return record
+
+
+# -----------------------------
+# 2. Batch run
+# -----------------------------
+async def run(
+    name: str,
+    source: TextIO,
+    sink: TextIO,
+    concurrency: int = 8,
+    timeout: float | None = None,
+) -> List[float]:
+    """Run graph ``name`` on every line of ``source``; return latencies."""
+    from common.batch import run_batch
+
+    graph = get_graph(name)
+    latencies = []
+    failures = 0
+    start = time.perf_counter()
+
+    async for result in run_batch(
+        graph, read_jsonl(source), concurrency=concurrency, timeout=timeout
+    ):
+        sink.write(json.dumps(result_record(result)) + "\n")
+        sink.flush()
+        latencies.append(result.elapsed)
+        failures += not result.ok
+
+    wall = time.perf_counter() - start
+    print(summary(len(latencies), failures, wall, latencies), file=sys.stderr)
+    return latencies
+
+
+def summary(count: int, failures: int, wall: float, latencies: List[float]) -> str:
+    line = f"{count} runs, {failures} failed in {wall:.2f}s"
+    if count:
+        line += f" ({count / wall:.1f}/s)"
+    if count >= 2:
+        cuts = statistics.quantiles(latencies, n=100)
+        line += f"; latency p50 {cuts[49]:.2f}s p95 {cuts[94]:.2f}s"
+    return line
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("graph", nargs="?", help="graph name, see --list")
+    parser.add_argument("input", nargs="?", default="-", help="JSONL file, - = stdin")
+    parser.add_argument("-o", "--output", default="-", help="JSONL file, - = stdout")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--timeout", type=float, help="seconds per run")
+    parser.add_argument("--metrics", help="write Prometheus metrics here at the end")
+    parser.add_argument("--list", action="store_true", help="list graphs and exit")
+    args = parser.parse_args()
+
+    if args.list:
+        for name, module in sorted(GRAPH_MODULES.items()):
+            print(f"{name:<16}{module}")
+        return
+    if args.graph not in GRAPH_MODULES:
+        parser.error(f"choose a graph from {sorted(GRAPH_MODULES)}")
+    if args.concurrency < 1:
+        parser.error("--concurrency must be at least 1")
+
+    # Closes whichever files were opened, however the run ends
+    with ExitStack() as files:
+        try:
+            source = (
+                sys.stdin
+                if args.input == "-"
+                else files.enter_context(open(args.input))
+            )
+            sink = (
+                sys.stdout
+                if args.output == "-"
+                else files.enter_context(open(args.output, "w"))
+            )
+        except OSError as e:
+            parser.error(str(e))
+        try:
+            asyncio.run(run(args.graph, source, sink, args.concurrency, args.timeout))
+        except ValueError as e:
+            parser.exit(1, f"{args.input}: {e}\n")
+        finally:
+            if args.metrics:
+                from common.metrics import render
+
+                with open(args.metrics, "w") as f:
+                    f.write(render())
 
 
 if __name__ == "__main__":
@@ -0,0 +1,111 @@
+from typing import Annotated, TypedDict
+
+import pytest
+from langgraph.constants import END
+from langgraph.graph import StateGraph
+
+from common.checkpoint import (
+    APPEND_LOG,
+    DELTA,
+    SNAPSHOT_EVERY,
+    SQLiteSaver,
+    run_or_resume,
+    thread_config,
+)
+from common.message_log import AppendLog, append_log
+
+# Enough steps to cross a full-snapshot boundary of the delta chain
+STEPS = SNAPSHOT_EVERY + 8
+EXPECTED = [f"entry {i}" for i in range(STEPS)]
+
+
+class State(TypedDict):
+    log: Annotated[AppendLog, append_log]
+    step: int
+
+
+def build_graph(saver, fail_at: int | None = None, calls: list | None = None):
+    calls = [] if calls is None else calls
+
+    def step(state: State) -> State:
+        calls.append(state["step"])
+        if state["step"] == fail_at:
+            raise RuntimeError("crash")
+        return {"log": [f"entry {state['step']}"], "step": state["step"] + 1}
+
+    def route(state: State) -> str:
+        return END if state["step"] >= STEPS else "step"
+
+    builder = StateGraph(State)
+    builder.add_node("step", step)
+    builder.set_entry_point("step")
+    builder.add_conditional_edges("step", route)
+    return builder.compile(checkpointer=saver).with_config(recursion_limit=STEPS * 2)
+
+
+def run(graph, thread_id: str) -> dict:
+    return graph.invoke({"log": [], "step": 0}, thread_config(thread_id))
+
+
+def blob_types(saver: SQLiteSaver) -> list:
+    rows = saver._conn.execute("SELECT type FROM blobs WHERE channel = 'log'")
+    return [type_ for (type_,) in rows]
+
+
+def test_log_round_trips_across_snapshot_boundary(tmp_path):
+    path = str(tmp_path / "checkpoints.sqlite")
+    saver = SQLiteSaver(path)
+    result = run(build_graph(saver), "t1")
+    assert list(result["log"]) == EXPECTED
+
+    # Mostly deltas, with a full copy at the start and at the boundary
+    types = blob_types(saver)
+    assert types.count(DELTA) > 0
+    assert sum(type_.startswith(APPEND_LOG) for type_ in types) >= 2
+
+    # A fresh saver has no in-memory log state and must replay the chain
+    reopened = SQLiteSaver(path)
+    latest = reopened.get_tuple(thread_config("t1"))
+    assert list(latest.checkpoint["channel_values"]["log"]) == EXPECTED
+    assert isinstance(latest.checkpoint["channel_values"]["log"], AppendLog)
+
+
+def test_list_returns_every_checkpoint_newest_first(tmp_path):
+    saver = SQLiteSaver(str(tmp_path / "checkpoints.sqlite"))
+    graph = build_graph(saver)
+    run(graph, "t1")
+    run(graph, "t2")
+
+    items = list(saver.list(thread_config("t1")))
+    assert {item.config["configurable"]["thread_id"] for item in items} == {"t1"}
+    logs = [list(item.checkpoint["channel_values"].get("log", [])) for item in items]
+    assert logs[0] == EXPECTED
+    # Each older checkpoint holds a prefix of the next one
+    for newer, older in zip(logs, logs[1:]):
+        assert newer[: len(older)] == older
+        assert len(older) <= len(newer)
+
+    assert len(list(saver.list(thread_config("t1"), limit=3))) == 3
+    before = list(saver.list(thread_config("t1"), before=items[0].config))
+    assert [item.config for item in before] == [item.config for item in items[1:]]
+
+
+@pytest.mark.parametrize("fail_at", [3, SNAPSHOT_EVERY + 2])
+def test_resume_continues_from_last_checkpoint(tmp_path, fail_at):
+    path = str(tmp_path / "checkpoints.sqlite")
+    with pytest.raises(RuntimeError):
+        run(build_graph(SQLiteSaver(path), fail_at=fail_at), "t1")
+
+    # Resume in a "new process": fresh saver on the same file
+    calls = []
+    graph = build_graph(SQLiteSaver(path), calls=calls)
+    result = run_or_resume(graph, {"log": [], "step": 0}, "t1")
+
+    assert list(result["log"]) == EXPECTED
+    # Completed steps are not run again
+    assert calls == list(range(fail_at, STEPS))
+
+    # A finished thread returns its saved state without running anything
+    calls.clear()
+    assert list(run_or_resume(graph, None, "t1")["log"]) == EXPECTED
+    assert calls == []
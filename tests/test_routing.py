@@ -0,0 +1,87 @@
+import asyncio
+import itertools
+import time
+
+import pytest
+
+from common.retry import get_circuit_breaker, is_retryable
+from common.routing import Backend, ModelRouter
+
+_names = itertools.count()
+# Error classification imports the provider SDKs on first use; do that
+# now so it does not skew the hedging races below
+is_retryable(ValueError())
+
+
+class FakeLLM:
+    """Answers (or raises) after ``delay`` seconds."""
+
+    def __init__(self, delay: float = 0.0, reply: str = "ok", error=None):
+        self.delay = delay
+        self.reply = reply
+        self.error = error
+
+    def invoke(self, messages):
+        time.sleep(self.delay)
+        if self.error is not None:
+            raise self.error
+        return self.reply
+
+    async def ainvoke(self, messages):
+        await asyncio.sleep(self.delay)
+        if self.error is not None:
+            raise self.error
+        return self.reply
+
+
+def backend(llm) -> Backend:
+    # A fresh endpoint per backend: circuit breakers are process-wide
+    name = f"test-endpoint-{next(_names)}"
+    return Backend(name, llm, endpoint=name)
+
+
+def test_cancelled_half_open_probe_releases_the_breaker():
+    primary = backend(FakeLLM(delay=1.0, reply="primary"))
+    secondary = backend(FakeLLM(delay=0.0, reply="secondary"))
+    breaker = get_circuit_breaker(primary.endpoint)
+    breaker.recovery_timeout = 0.05
+    for _ in range(breaker.failure_threshold):
+        breaker.record_failure()
+    time.sleep(breaker.recovery_timeout)
+    assert breaker.state == "half_open"
+
+    router = ModelRouter([primary, secondary], hedge_after=0.01)
+    # order() only skips open circuits, so the primary's call is the probe;
+    # the secondary wins the race and the probe task is cancelled
+    assert asyncio.run(router.ainvoke([])) == "secondary"
+
+    time.sleep(breaker.recovery_timeout)
+    assert breaker.allow()
+
+
+def hedged_router() -> ModelRouter:
+    # The primary fails after the hedge fired but before the secondary answers
+    primary = backend(FakeLLM(delay=0.05, error=ValueError("primary failed")))
+    secondary = backend(FakeLLM(delay=0.3, reply="secondary"))
+    return ModelRouter([primary, secondary], failure_threshold=2, hedge_after=0.01)
+
+
+def test_hedged_primary_failure_is_not_masked_by_the_secondary():
+    with pytest.raises(ValueError, match="primary failed"):
+        hedged_router().invoke([])
+
+
+def test_async_hedged_primary_failure_is_not_masked_by_the_secondary():
+    with pytest.raises(ValueError, match="primary failed"):
+        asyncio.run(hedged_router().ainvoke([]))
+
+
+def test_fall_back_after_failure_threshold():
+    primary = backend(FakeLLM(error=ValueError("primary failed")))
+    secondary = backend(FakeLLM(reply="secondary"))
+    router = ModelRouter([primary, secondary], failure_threshold=2)
+
+    with pytest.raises(ValueError, match="primary failed"):
+        router.invoke([])
+    # The second failure in a row demotes the primary and falls back
+    assert router.invoke([]) == "secondary"
@@ -0,0 +1,62 @@
+import pytest
+
+from common.verdicts import MAX_SCORE, MIN_SCORE, parse_score, parse_yes_no
+
+
+@pytest.mark.parametrize(
+    "text, expected",
+    [
+        ("8", 8),
+        ("8/10", 8),
+        ("Score: 8", 8),
+        ("8 out of 10", 8),
+        ("I'd give it a 7.", 7),
+        ("8.6", 9),
+        # Other scales are rescaled to 1-10
+        ("4/5", 8),
+        ("80/100", 8),
+        # Clamped into range
+        ("15", MAX_SCORE),
+        ("0", MIN_SCORE),
+        ("0/10", MIN_SCORE),
+        # Structured replies win over numbers in the surrounding text
+        ('{"score": 7}', 7),
+        ('Here you go: {"score": 6} (out of 10)', 6),
+        ('{"score": 12}', MAX_SCORE),
+        # Digits inside words are not scores
+        ("v2 model: 6", 6),
+        ("no number here", None),
+        ("", None),
+    ],
+)
+def test_parse_score(text, expected):
+    assert parse_score(text) == expected
+
+
+def test_parse_score_custom_range():
+    assert parse_score("9/10", low=0, high=5) == 4
+    assert parse_score("-", low=0, high=5) is None
+
+
+@pytest.mark.parametrize(
+    "text, expected",
+    [
+        ("YES", True),
+        ("Yes.", True),
+        ("no", False),
+        ("NO - the document is off topic", False),
+        ("true", True),
+        ("False", False),
+        # First verdict wins
+        ("Yes, though not in every case no", True),
+        ('{"verdict": false}', False),
+        ('{"verdict": true} and some chatter: no', True),
+        # Whole words only
+        ("eyes", None),
+        ("Nothing relevant", None),
+        ("maybe", None),
+        ("", None),
+    ],
+)
+def test_parse_yes_no(text, expected):
+    assert parse_yes_no(text) is expected